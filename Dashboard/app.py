@@ -1,9 +1,10 @@
 # app.py
+import os
 import dash
 from dash import html
 import dash_bootstrap_components as dbc
-from data.database import DatabaseManager
 from components.layout import LayoutManager
+from utils import instrumentation
 import config
 
 # Initialize the Dash app
@@ -14,21 +15,20 @@ app = dash.Dash(
     title=config.APP_TITLE
 )
 
+# Callback latency metrics on config.METRICS_ENDPOINT
+instrumentation.register_endpoint(app.server)
+
 # Initialize components
-db_manager = DatabaseManager()
 layout_manager = LayoutManager()
 
 def create_app_layout():
-    """Create the main app layout."""
+    """Create the main app layout; evaluated on every page load, without querying the database."""
     try:
-        # Get available crops from database
-        crops = db_manager.get_available_crops()
-        
-        if not crops:
+        if not os.path.exists(config.DATABASE_PATH):
             return html.Div([
                 dbc.Alert([
                     html.H4("Database Connection Error", className="alert-heading"),
-                    html.P("Could not connect to the database or no crops found."),
+                    html.P(f"Database file not found: {config.DATABASE_PATH}"),
                     html.Hr(),
                     html.P([
                         "Please check your database configuration in ",
@@ -39,7 +39,7 @@ def create_app_layout():
             ])
         
         return html.Div([
-            layout_manager.create_sidebar(crops),
+            layout_manager.create_sidebar(),
             layout_manager.create_main_content()
         ])
     
@@ -53,8 +53,8 @@ def create_app_layout():
             ], color="danger", style={"margin": "2rem"})
         ])
 
-# Set the app layout
-app.layout = create_app_layout()
+# Dash calls the layout function for every page load
+app.layout = create_app_layout
 
 # Import callbacks (this registers all the callback functions)
 from components import callbacks
@@ -0,0 +1,177 @@
+/* assets/clientside.js */
+
+// Replace the "(year)" at the end of a figure's title
+function retitle(layout, year, count) {
+    var title = layout.title;
+    var text = typeof title === 'string' ? title : (title && title.text);
+    if (!text) {
+        return layout;
+    }
+    text = text.replace(/\(\d{4}\)$/, '(' + year + ')');
+    if (count !== undefined) {
+        text = text.replace(/^Top \d+/, 'Top ' + count);
+    }
+    var newTitle = typeof title === 'string' ? text : Object.assign({}, title, {text: text});
+    return Object.assign({}, layout, {title: newTitle});
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    trends: {
+        // Keep the points of every trace that fall inside the slider's year range,
+        // and mark the year picked in the year selector
+        filterYears: function(figure, yearRange, year) {
+            if (!figure || !figure.data) {
+                return window.dash_clientside.no_update;
+            }
+            if (!yearRange || yearRange.length !== 2) {
+                return figure;
+            }
+            var start = yearRange[0];
+            var end = yearRange[1];
+            var data = figure.data.map(function(trace) {
+                if (!Array.isArray(trace.x) || !Array.isArray(trace.y)) {
+                    return trace;
+                }
+                var x = [];
+                var y = [];
+                for (var i = 0; i < trace.x.length; i++) {
+                    if (trace.x[i] >= start && trace.x[i] <= end) {
+                        x.push(trace.x[i]);
+                        y.push(trace.y[i]);
+                    }
+                }
+                return Object.assign({}, trace, {x: x, y: y});
+            });
+            var layout = figure.layout;
+            if (layout && data.length && year >= start && year <= end) {
+                layout = Object.assign({}, layout, {shapes: [{
+                    type: 'line', xref: 'x', yref: 'paper', x0: year, x1: year, y0: 0, y1: 1,
+                    line: {color: '#7f7f7f', width: 1, dash: 'dot'}
+                }]});
+            }
+            return Object.assign({}, figure, {data: data, layout: layout});
+        }
+    },
+    timeline: {
+        // Show one year of the top producers timeline in the bar chart's empty trace
+        showProducers: function(figure, timeline, year) {
+            if (!figure || !figure.data) {
+                return window.dash_clientside.no_update;
+            }
+            if (!timeline || !timeline.years || !figure.data.length || year === null || year === undefined) {
+                return figure;
+            }
+            var slice = timeline.years[year];
+            var bar = figure.data[0];
+            if (!slice) {
+                return Object.assign({}, figure, {
+                    data: [Object.assign({}, bar, {x: [], y: []})],
+                    layout: retitle(figure.layout, year)
+                });
+            }
+            var marker = Object.assign({}, bar.marker, {color: slice.colors});
+            return Object.assign({}, figure, {
+                data: [Object.assign({}, bar, {x: slice.x, y: slice.y, marker: marker})],
+                layout: retitle(figure.layout, year, slice.x.length)
+            });
+        },
+
+        // Show one year of the trade timeline in the world map or the trade bars.
+        // Each flow stays at its latest year when the selected year is past it.
+        showTrade: function(figure, timeline, year) {
+            if (!figure || !figure.data) {
+                return window.dash_clientside.no_update;
+            }
+            if (!timeline || year === null || year === undefined) {
+                return figure;
+            }
+            var titleYear = null;
+            var data = figure.data.map(function(trace) {
+                var flow = timeline[String(trace.name).toLowerCase()];
+                if (!flow) {
+                    return trace;
+                }
+                var shown = flow.last === null ? year : Math.min(year, flow.last);
+                var slice = flow.years[shown] || {x: [], y: []};
+                if (slice.x.length && titleYear === null) {
+                    titleYear = shown;
+                }
+                var update = trace.type === 'choropleth' ? {locations: slice.x, z: slice.y} : {x: slice.x, y: slice.y};
+                update.visible = slice.x.length > 0;
+                return Object.assign({}, trace, update);
+            });
+            return Object.assign({}, figure, {
+                data: data,
+                layout: retitle(figure.layout, titleYear === null ? year : titleYear)
+            });
+        },
+
+        // Draw one year of the trade flow timeline into the flow map's arc traces,
+        // each arc in the widest trace whose minimum share of the year's largest flow it reaches
+        showFlows: function(figure, flows, year) {
+            if (!figure || !figure.data) {
+                return window.dash_clientside.no_update;
+            }
+            if (!flows || !flows.years || year === null || year === undefined) {
+                return figure;
+            }
+            var shown = Math.min(year, flows.last);
+            var edges = flows.years[shown] || [];
+            var nodes = flows.nodes;
+            var largest = edges.length ? edges[0][2] : 0;
+            var arcs = figure.data.map(function(trace) {
+                return trace.mode === 'lines' ? {lon: [], lat: [], text: []} : null;
+            });
+            var ends = {};
+            edges.forEach(function(edge) {
+                // A year whose flows are all zero draws every arc in the narrowest trace
+                var share = largest > 0 ? Math.max(edge[2], 0) / largest : 0;
+                var widest = -1;
+                figure.data.forEach(function(trace, i) {
+                    if (arcs[i] && share >= trace.meta.share &&
+                            (widest < 0 || trace.meta.share > figure.data[widest].meta.share)) {
+                        widest = i;
+                    }
+                });
+                var label = nodes.name[edge[0]] + ' → ' + nodes.name[edge[1]] + ': ' +
+                    Math.round(edge[2]).toLocaleString('en-US');
+                arcs[widest].lon.push(nodes.lon[edge[0]], nodes.lon[edge[1]], null);
+                arcs[widest].lat.push(nodes.lat[edge[0]], nodes.lat[edge[1]], null);
+                arcs[widest].text.push(label, label, null);
+                ends[edge[0]] = true;
+                ends[edge[1]] = true;
+            });
+            var ids = Object.keys(ends).map(Number);
+            var data = figure.data.map(function(trace, i) {
+                if (arcs[i]) {
+                    return Object.assign({}, trace, arcs[i]);
+                }
+                return Object.assign({}, trace, {
+                    lon: ids.map(function(id) { return nodes.lon[id]; }),
+                    lat: ids.map(function(id) { return nodes.lat[id]; }),
+                    text: ids.map(function(id) { return nodes.name[id]; })
+                });
+            });
+            return Object.assign({}, figure, {data: data, layout: retitle(figure.layout, shown)});
+        },
+
+        // Play/pause button and its interval: step the year selector once per tick,
+        // starting over from the first year and stopping at the last
+        play: function(nClicks, nIntervals, year, stopped, minYear, maxYear) {
+            var noUpdate = window.dash_clientside.no_update;
+            var triggered = window.dash_clientside.callback_context.triggered;
+            var trigger = triggered.length ? triggered[0].prop_id : '';
+            if (trigger === 'year-play.n_clicks') {
+                if (!stopped) {
+                    return [noUpdate, true, '▶ Play'];
+                }
+                return [year >= maxYear ? minYear : year, false, '⏸ Pause'];
+            }
+            if (trigger === 'year-play-interval.n_intervals' && !stopped) {
+                var next = Math.min(year + 1, maxYear);
+                return next >= maxYear ? [next, true, '▶ Play'] : [next, false, noUpdate];
+            }
+            return [noUpdate, noUpdate, noUpdate];
+        }
+    }
+});
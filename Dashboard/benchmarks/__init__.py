@@ -0,0 +1,4 @@
+"""
+Benchmarks for the agricultural dashboard.
+Run from the Dashboard directory, e.g. ``python -m benchmarks.bench_storage``.
+"""
@@ -0,0 +1,114 @@
+# benchmarks/bench_categorical.py
+"""Memory of the per-crop frames and top-partner groupby time, with and without Categorical name columns.
+
+    python -m benchmarks.bench_categorical [--countries 200] [--items 20] [--partners 100]
+        [--reporters 5] [--repeat 20] [--out bench_categorical.json]
+
+Every crop's frames are read through DatabaseManager with
+config.CATEGORICAL_COLUMNS off (plain strings) and on (Categoricals over
+the dimension tables), and DataProcessor.get_top_trade_partners is timed
+on both. The on-disk size of the dictionary-encoded reporter table is
+reported next to the trade table it is built from.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import numpy as np
+import config
+from benchmarks.synthetic import build_database
+from data.database import DatabaseManager
+from utils.data_processing import DataProcessor
+
+def crop_frames(db: DatabaseManager, crop: str) -> dict:
+    """The frames a crop page reads: production, the default reporter's imports and exports, all trade."""
+    partners = db.get_trade_partners(crop)
+    return {
+        'production': db.get_production_data(crop),
+        'imports': partners['imports'],
+        'exports': partners['exports'],
+        'trade': db.get_trade_data(crop),
+    }
+
+def frame_bytes(frames: dict) -> dict:
+    return {name: int(df.memory_usage(index=True, deep=True).sum()) for name, df in frames.items()}
+
+def time_groupby(frames: dict, repeat: int) -> dict:
+    """Milliseconds per DataProcessor.get_top_trade_partners call on each trade frame."""
+    timings = {}
+    for name in ('imports', 'trade'):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            DataProcessor.get_top_trade_partners(frames[name], config.TOP_N_COUNTRIES)
+        timings[name] = (time.perf_counter() - start) * 1000 / repeat
+    return timings
+
+def table_mb(db_path: str, table_name: str):
+    """Size of a table's B-tree in MB, or None if SQLite was built without dbstat."""
+    try:
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute("SELECT SUM(pgsize) / 1e6 FROM dbstat WHERE name = ?", (table_name,)).fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--partners", type=int, default=100)
+    parser.add_argument("--reporters", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    db_path = build_database(os.path.join(tempfile.mkdtemp(prefix="agri-bench-"), "bench.db"),
+                             args.countries, args.items, args.partners, seed=args.seed,
+                             n_reporters=args.reporters)
+    # Every frame must be read from the database in the mode being measured
+    config.CACHE_ENABLED = False
+    db = DatabaseManager(db_path)
+    crops = db.get_available_crops()
+
+    memory = {False: [], True: []}
+    groupby = {False: [], True: []}
+    for categorical in (False, True):
+        config.CATEGORICAL_COLUMNS = categorical
+        for crop in crops:
+            frames = crop_frames(db, crop)
+            memory[categorical].append(frame_bytes(frames))
+            groupby[categorical].append(time_groupby(frames, args.repeat))
+    db.pool.close_all()
+
+    results = {'crops': len(crops), 'frames': {}, 'groupby': {},
+               'table_mb': {name: table_mb(db_path, name) for name in (config.TRADE_TABLE,
+                                                                        config.REPORTER_TRADE_TABLE)}}
+    for name in memory[False][0]:
+        before = float(np.mean([m[name] for m in memory[False]]))
+        after = float(np.mean([m[name] for m in memory[True]]))
+        results['frames'][name] = {'object_kb': round(before / 1024, 1), 'categorical_kb': round(after / 1024, 1),
+                                   'reduction': round(1 - after / before, 3)}
+    for name in groupby[False][0]:
+        before = float(np.median([g[name] for g in groupby[False]]))
+        after = float(np.median([g[name] for g in groupby[True]]))
+        results['groupby'][name] = {'object_ms': round(before, 3), 'categorical_ms': round(after, 3),
+                                    'speedup': round(before / after, 2)}
+
+    print(f"{len(crops)} crops, {args.reporters} reporters, {args.partners} partners; mean per crop frame")
+    print(f"{'frame':<12}{'object KB':>12}{'categorical KB':>16}{'reduction':>11}")
+    for name, r in results['frames'].items():
+        print(f"{name:<12}{r['object_kb']:>12,.1f}{r['categorical_kb']:>16,.1f}{r['reduction']:>11.0%}")
+    print(f"{'get_top_trade_partners':<24}{'object ms':>11}{'categorical ms':>16}{'speedup':>9}")
+    for name, r in results['groupby'].items():
+        print(f"{name:<24}{r['object_ms']:>11.2f}{r['categorical_ms']:>16.2f}{r['speedup']:>8.1f}x")
+    for name, mb in results['table_mb'].items():
+        if mb is not None:
+            print(f"{name}: {mb:,.1f} MB on disk")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
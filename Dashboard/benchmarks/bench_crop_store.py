@@ -0,0 +1,73 @@
+# benchmarks/bench_crop_store.py
+"""crop-data-store payload size and callback latency, JSON records vs server-side handle.
+
+    python -m benchmarks.bench_crop_store [--db main_database.db] [--repeat 5]
+
+Without --db a synthetic database is generated in a temporary directory.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from plotly.io.json import to_json_plotly
+import config
+from benchmarks.synthetic import build_database
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="existing SQLite database (default: synthetic)")
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--partners", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    config.DATABASE_PATH = args.db or build_database(
+        os.path.join(tempfile.mkdtemp(prefix="agri-bench-"), "bench.db"),
+        args.countries, args.items, args.partners
+    )
+    # Measure the data path, not cached figures
+    config.FIGURE_CACHE_ENABLED = False
+    # callbacks creates its DatabaseManager at import time, so import it after choosing the database
+    from components import callbacks
+
+    crops = callbacks.db_manager.get_available_crops()
+    print(f"{len(crops)} crops x {args.repeat} repeats")
+    print(f"{'mode':<14}{'payload KB':>12}{'load ms':>10}{'charts ms':>11}")
+
+    for mode, server_side in (("json-records", False), ("server-side", True)):
+        config.SERVER_SIDE_DATA = server_side
+        payloads, load_times, chart_times = [], [], []
+        for _ in range(args.repeat):
+            # Start every repeat cold, as on a fresh page visit
+            callbacks.crop_store.cache.clear()
+            callbacks.analysis.cache.clear()
+            for crop in crops:
+                start = time.perf_counter()
+                stored = callbacks.load_crop_data(crop)
+                payload = to_json_plotly(stored)
+                load_times.append((time.perf_counter() - start) * 1000)
+                payloads.append(len(payload))
+
+                start = time.perf_counter()
+                # The browser hands each chart callback the deserialized store
+                stored = json.loads(payload)
+                callbacks.update_world_trade_map(stored)
+                callbacks.update_trade_breakdown(stored)
+                callbacks.update_trade_mirror(stored)
+                callbacks.update_top_producers(stored)
+                callbacks.update_trade_timeline(stored)
+                callbacks.update_production_timeline(stored)
+                callbacks.update_trade_flow_map(stored)
+                callbacks.update_trade_flow_timeline(stored)
+                callbacks.update_yearwise_production(stored)
+                callbacks.update_summary_stats(stored)
+                chart_times.append((time.perf_counter() - start) * 1000)
+
+        print(f"{mode:<14}{statistics.mean(payloads) / 1024:>12.1f}"
+              f"{statistics.mean(load_times):>10.2f}{statistics.mean(chart_times):>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/bench_ingest.py
+"""Full reload vs incremental ingest of a new FAOSTAT release.
+
+    python -m benchmarks.bench_ingest [--countries 200] [--items 20] [--partners 100]
+        [--changed-items 0.1] [--workers 2]
+
+A synthetic release is written as CSV and loaded, then a second release
+that revises the latest values of --changed-items of the items (and drops
+some of their rows) and adds a new item is loaded into two copies of that
+database: once in full and once with process_csv_files(incremental=True).
+Both must end up with the same tables.
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import config
+from benchmarks.synthetic import build_database
+import data_loading
+import data_prep
+
+# Tables that must be identical after a full and an incremental load
+COMPARED_TABLES = [config.PRODUCTION_TABLE, config.TRADE_TABLE, config.PRODUCTION_LONG_TABLE,
+                   config.REPORTER_TRADE_TABLE, config.REPORTERS_TABLE, config.TOP_PRODUCERS_TABLE,
+                   config.CROP_SUMMARY_TABLE, config.TOP_PARTNERS_TABLE]
+
+# Incremental loads append new names to the dimension tables instead of renumbering them,
+# so the reporter table is compared by name
+DECODED = {
+    config.REPORTER_TRADE_TABLE: f"""
+        SELECT r.Name AS Reporter, i.Name AS Item, t.Flow, p.Name AS Partner, t.Year,
+               t.Quantity, t.Value, t.UnitPrice
+        FROM "{config.REPORTER_TRADE_TABLE}" t
+        JOIN "{config.AREA_TABLE}" r ON r.Id = t.ReporterId
+        JOIN "{config.AREA_TABLE}" p ON p.Id = t.PartnerId
+        JOIN "{config.ITEM_TABLE}" i ON i.Id = t.ItemId
+    """,
+}
+
+def write_release(tables: dict, out_dir: str) -> list:
+    """Write each table as CSV and return data_prep datasets that load them."""
+    os.makedirs(out_dir, exist_ok=True)
+    datasets = []
+    for table_name, df in tables.items():
+        path = os.path.join(out_dir, f"{table_name}.csv")
+        df.to_csv(path, index=False)
+        datasets.append({'source': path, 'table': table_name, 'drop': [], 'year_flags': "",
+                         'dtypes': {'Year': 'Int64', 'Value': 'float64'} if 'Year' in df else {}})
+    return datasets
+
+def next_release(tables: dict, changed_items: float, rng) -> dict:
+    """Revise the latest values of some items, drop a few of their rows and add a new item."""
+    production, trade = tables[config.PRODUCTION_TABLE].copy(), tables[config.TRADE_TABLE].copy()
+    items = production['Item'].unique()
+    revised = rng.choice(items, size=max(1, round(len(items) * changed_items)), replace=False)
+
+    last_year = [column for column in production.columns if column.startswith("Y")][-1]
+    rows = production['Item'].isin(revised)
+    production.loc[rows, last_year] = production.loc[rows, last_year] * 1.1
+    production = production.drop(production.index[rows & (rng.random(len(production)) < 0.01)])
+    new_item = production[production['Item'] == items[0]].assign(Item="Crop new")
+    production = pd.concat([production, new_item], ignore_index=True)
+
+    rows = trade['Item'].isin(revised)
+    trade.loc[rows & (trade['Year'] == trade['Year'].max()), 'Value'] += 1
+    trade = trade.drop(trade.index[rows & (rng.random(len(trade)) < 0.01)])
+    return {config.PRODUCTION_TABLE: production, config.TRADE_TABLE: trade}
+
+def copy_database(source: str, target: str):
+    """Copy a WAL-mode database file after moving the log into it."""
+    with sqlite3.connect(source) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    shutil.copy(source, target)
+
+def read_sorted(db_path: str, table_name: str) -> pd.DataFrame:
+    with sqlite3.connect(db_path) as conn:
+        df = pd.read_sql_query(DECODED.get(table_name, f'SELECT * FROM "{table_name}"'), conn)
+    return df.sort_values(list(df.columns), ignore_index=True)
+
+def timed_load(db_path: str, datasets: list, workers: int, incremental: bool) -> float:
+    start = time.perf_counter()
+    changed = data_prep.process_csv_files(db_path, datasets, workers, incremental=incremental)
+    if changed or not incremental:
+        data_loading.post_load(db_path, changed if incremental else None)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--partners", type=int, default=100)
+    parser.add_argument("--reporters", type=int, default=5)
+    parser.add_argument("--changed-items", type=float, default=0.1,
+                        help="fraction of items revised in the new release")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="agri-bench-")
+    source = build_database(os.path.join(workdir, "source.db"), args.countries, args.items, args.partners,
+                            seed=args.seed, n_reporters=args.reporters)
+    with sqlite3.connect(source) as conn:
+        first = {config.PRODUCTION_TABLE: pd.read_sql_query(f"SELECT * FROM {config.PRODUCTION_TABLE}", conn),
+                 config.TRADE_TABLE: pd.read_sql_query(f"SELECT * FROM {config.TRADE_TABLE}", conn)
+                     .drop(columns=[config.TRADE_FLOW_COLUMN])}
+    second = next_release(first, args.changed_items, np.random.default_rng(args.seed + 1))
+
+    base = os.path.join(workdir, "base.db")
+    timed_load(base, write_release(first, os.path.join(workdir, "release1")), args.workers, incremental=False)
+    full, incremental = os.path.join(workdir, "full.db"), os.path.join(workdir, "incremental.db")
+    copy_database(base, full)
+    copy_database(base, incremental)
+
+    datasets = write_release(second, os.path.join(workdir, "release2"))
+    full_seconds = timed_load(full, datasets, args.workers, incremental=False)
+    incremental_seconds = timed_load(incremental, datasets, args.workers, incremental=True)
+
+    for table_name in COMPARED_TABLES:
+        pd.testing.assert_frame_equal(read_sorted(full, table_name), read_sorted(incremental, table_name),
+                                      check_dtype=False, obj=table_name)
+
+    rows = sum(len(df) for df in second.values())
+    print(f"{rows:,} rows in the new release, {args.changed_items:.0%} of items revised; "
+          f"{len(COMPARED_TABLES)} tables identical after both loads")
+    print(f"{'load':<14}{'seconds':>10}")
+    print(f"{'full':<14}{full_seconds:>10.1f}")
+    print(f"{'incremental':<14}{incremental_seconds:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_mirror.py
+"""Time and peak memory of the mirror reconciliation as the chunk size grows.
+
+    python -m benchmarks.bench_mirror [--countries 200] [--items 5] [--partners 100]
+        [--reporters 20] [--chunks 100000,1000000,0] [--out bench_mirror.json]
+
+Trade_Mirror is rebuilt from the synthetic trade table once per chunk size
+(0: the whole table in one chunk, i.e. a single hash join), with
+tracemalloc recording the peak memory the reconciliation allocates.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from benchmarks.synthetic import build_database
+import data_aggregation
+
+def rebuild(db_path: str, chunksize: int) -> dict:
+    """Rebuild Trade_Mirror with the given chunk size; seconds, peak MB and rows."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        conn.execute("BEGIN")
+        data_aggregation.build_trade_mirror(conn, chunksize=chunksize)
+        conn.execute("COMMIT")
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows = conn.execute(f'SELECT COUNT(*) FROM "{data_aggregation.MIRROR_TABLE}"').fetchone()[0]
+    finally:
+        conn.close()
+    return {'seconds': round(seconds, 2), 'peak_mb': round(peak / 1e6, 1), 'rows': rows}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--partners", type=int, default=100)
+    parser.add_argument("--reporters", type=int, default=20)
+    parser.add_argument("--chunks", default="100000,1000000,0",
+                        help="comma-separated chunk sizes in trade rows; 0 reads the whole table at once")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    db_path = build_database(os.path.join(tempfile.mkdtemp(prefix="agri-bench-"), "bench.db"),
+                             args.countries, args.items, args.partners, seed=args.seed,
+                             n_reporters=args.reporters)
+    with sqlite3.connect(db_path) as conn:
+        trade_rows = conn.execute(f'SELECT COUNT(*) FROM "{data_aggregation.TRADE_TABLE}"').fetchone()[0]
+
+    results = {'trade_rows': trade_rows, 'reporters': args.reporters, 'chunks': {}}
+    print(f"{trade_rows:,} trade rows, {args.reporters} reporters")
+    print(f"{'chunk rows':>12}{'seconds':>10}{'peak MB':>10}{'mirror rows':>14}")
+    for chunksize in (int(size) for size in args.chunks.split(",")):
+        result = rebuild(db_path, chunksize or trade_rows)
+        results['chunks'][chunksize or 'all'] = result
+        print(f"{chunksize or 'all':>12}{result['seconds']:>10.2f}{result['peak_mb']:>10.1f}{result['rows']:>14,}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
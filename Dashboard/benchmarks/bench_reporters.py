@@ -0,0 +1,107 @@
+# benchmarks/bench_reporters.py
+"""Trade partner lookup latency per reporter as the number of reporters grows.
+
+    python -m benchmarks.bench_reporters [--reporters 1,5,10,20] [--items 5] [--partners 50]
+        [--repeat 10] [--out bench_reporters.json]
+
+For each reporter count a synthetic database is generated and one
+reporter's imports and exports of a crop are read with
+DatabaseManager.get_trade_partners (the reporter-clustered table, caching
+off), and with the same filter on the unclustered trade table for
+comparison. With clustering the latency should not depend on how many
+other reporters the database holds.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import config
+from benchmarks.synthetic import build_database
+from data_loading import TRADE_MEASURES, measure_sql
+from data.database import DatabaseManager
+
+# The same rows read from the trade table through its (Item, Element) index,
+# with the quantity and value elements pivoted and scaled at query time
+MEASURE_SUMS = ", ".join(f"{measure_sql(measure)} AS {measure}" for measure in TRADE_MEASURES)
+UNCLUSTERED_QUERY = f"""
+    SELECT "{config.TRADE_REPORTER_COLUMN}", "{config.TRADE_PARTNER_COLUMN}", {config.TRADE_YEAR_COLUMN},
+           {MEASURE_SUMS}, {config.TRADE_FLOW_COLUMN}
+    FROM {config.TRADE_TABLE} t
+    WHERE {config.TRADE_ITEM_COLUMN} = ? AND "{config.TRADE_REPORTER_COLUMN}" = ?
+    AND {config.TRADE_FLOW_COLUMN} IS NOT NULL
+    GROUP BY "{config.TRADE_PARTNER_COLUMN}", {config.TRADE_FLOW_COLUMN}, {config.TRADE_YEAR_COLUMN}
+"""
+
+def time_lookups(lookup, crops, reporters, repeat: int) -> np.ndarray:
+    """Latencies in milliseconds of lookup(crop, reporter) for every pair, repeat times."""
+    timings = []
+    for _ in range(repeat):
+        for crop in crops:
+            for reporter in reporters:
+                start = time.perf_counter()
+                lookup(crop, reporter)
+                timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+def measure(n_reporters: int, args) -> dict:
+    db_path = build_database(
+        os.path.join(tempfile.mkdtemp(prefix="agri-bench-"), "bench.db"),
+        max(args.countries, n_reporters + args.partners), args.items, args.partners, seed=args.seed,
+        n_reporters=n_reporters
+    )
+    db = DatabaseManager(db_path)
+    crops = db.get_available_crops()
+    # The same sample of reporters is timed at every scale
+    reporters = db.get_reporters()[:args.sample]
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(f"SELECT COUNT(*) FROM {config.TRADE_TABLE}").fetchone()[0]
+        clustered = time_lookups(db.get_trade_partners, crops, reporters, args.repeat)
+        unclustered = time_lookups(
+            lambda crop, reporter: pd.read_sql_query(UNCLUSTERED_QUERY, conn, params=[crop, reporter]),
+            crops, reporters, args.repeat
+        )
+    finally:
+        conn.close()
+        db.pool.close_all()
+    return {
+        'reporters': n_reporters,
+        'trade_rows': rows,
+        'clustered_p50_ms': round(float(np.percentile(clustered, 50)), 3),
+        'clustered_p95_ms': round(float(np.percentile(clustered, 95)), 3),
+        'unclustered_p50_ms': round(float(np.percentile(unclustered, 50)), 3),
+        'unclustered_p95_ms': round(float(np.percentile(unclustered, 95)), 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reporters", default="1,5,10,20", help="comma-separated reporter counts")
+    parser.add_argument("--countries", type=int, default=100)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--partners", type=int, default=50)
+    parser.add_argument("--sample", type=int, default=5, help="reporters timed at every scale")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    # Every lookup must reach the database
+    config.CACHE_ENABLED = False
+    results = [measure(int(n), args) for n in args.reporters.split(",")]
+
+    print(f"{args.items} crops, {args.partners} partners per reporter, {args.sample} reporters timed")
+    print(f"{'reporters':>10}{'trade rows':>12}{'clustered p50':>15}{'p95':>8}{'unclustered p50':>17}{'p95':>8}")
+    for r in results:
+        print(f"{r['reporters']:>10}{r['trade_rows']:>12,}{r['clustered_p50_ms']:>15.2f}{r['clustered_p95_ms']:>8.2f}"
+              f"{r['unclustered_p50_ms']:>17.2f}{r['unclustered_p95_ms']:>8.2f}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({'items': args.items, 'partners': args.partners, 'results': results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# benchmarks/bench_requests.py
+"""Load test of the dashboard request path: latency percentiles, throughput and peak memory.
+
+    python -m benchmarks.bench_requests [--db main_database.db]
+        [--countries 200] [--items 20] [--partners 100] [--reporters 1] [--years 1961-2023]
+        [--passes 5] [--threads 1] [--out results.json] [--compare baseline.json]
+
+Every pass opens each crop's page the way the browser does: display_page,
+load_crop_data, then the chart and summary callbacks on the deserialized
+store. The first pass starts with empty caches (cold); later passes are
+warm and run on --threads threads. The DatabaseManager, DataProcessor and
+GraphGenerator calls behind the callbacks are timed on their own as well.
+
+Results are written as JSON; --compare reports p95 regressions against an
+earlier result file and exits with status 1 if there are any. Without --db
+a synthetic database is generated in a separate process, so the peak
+memory reported is the dashboard's own.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+import numpy as np
+import pandas as pd
+from plotly.io.json import to_json_plotly
+import config
+from benchmarks.synthetic import build_database
+from data_loading import peak_rss_mb
+
+PERCENTILES = (50, 95, 99)
+
+def summarize(seconds: list) -> dict:
+    """Count, mean and percentiles of a list of durations, in milliseconds."""
+    ms = np.asarray(seconds) * 1000
+    summary = {'count': len(ms), 'mean_ms': round(float(ms.mean()), 3)}
+    for q, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+        summary[f"p{q}_ms"] = round(float(value), 3)
+    return summary
+
+def timed(timings: dict, name: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    timings.setdefault(name, []).append(time.perf_counter() - start)
+    return result
+
+def page_view(callbacks, crop: str) -> dict:
+    """Run every callback of one crop page view and return their durations in seconds."""
+    timings = {}
+    slug = callbacks.get_slug_index(callbacks.db_manager).slug(crop)
+    start = time.perf_counter()
+    timed(timings, 'display_page', callbacks.display_page, f"/crop/{slug}")
+    stored = timed(timings, 'load_crop_data', callbacks.load_crop_data, crop)
+    # Round-trip the store through JSON as Dash and the browser do
+    stored = timed(timings, 'store_roundtrip', lambda: json.loads(to_json_plotly(stored)))
+    timed(timings, 'update_world_trade_map', callbacks.update_world_trade_map, stored)
+    timed(timings, 'update_trade_breakdown', callbacks.update_trade_breakdown, stored)
+    timed(timings, 'update_trade_mirror', callbacks.update_trade_mirror, stored)
+    timed(timings, 'update_top_producers', callbacks.update_top_producers, stored)
+    timed(timings, 'update_trade_timeline', callbacks.update_trade_timeline, stored)
+    timed(timings, 'update_production_timeline', callbacks.update_production_timeline, stored)
+    timed(timings, 'update_trade_flow_map', callbacks.update_trade_flow_map, stored)
+    timed(timings, 'update_trade_flow_timeline', callbacks.update_trade_flow_timeline, stored)
+    timed(timings, 'update_yearwise_production', callbacks.update_yearwise_production, stored)
+    timed(timings, 'update_summary_stats', callbacks.update_summary_stats, stored)
+    timings['page_view'] = [time.perf_counter() - start]
+    return timings
+
+def component_calls(callbacks, crop: str) -> dict:
+    """Time the DatabaseManager, DataProcessor and GraphGenerator calls behind a crop page."""
+    db, processor, graphs = callbacks.db_manager, callbacks.data_processor, callbacks.graph_generator
+    timings = {}
+    production = timed(timings, 'db.get_production_data', db.get_production_data, crop)
+    timed(timings, 'db.get_trade_partners', db.get_trade_partners, crop)
+    timed(timings, 'db.get_top_producers', db.get_top_producers, crop)
+    timed(timings, 'db.get_crop_summary', db.get_crop_summary, crop)
+    top = timed(timings, 'processor.get_top_producers', processor.get_top_producers, production,
+                config.TOP_N_COUNTRIES)
+    top = timed(timings, 'processor.add_india_to_top_producers', processor.add_india_to_top_producers,
+                top, production)
+    timed(timings, 'processor.calculate_growth_rate', processor.calculate_growth_rate, production,
+          config.LATEST_YEAR - 10, config.LATEST_YEAR)
+    countries = top['Area'].tolist() if not top.empty else []
+    series = timed(timings, 'db.get_production_series', db.get_production_series, crop, countries,
+                   config.MIN_YEAR, config.MAX_YEAR)
+    timed(timings, 'graphs.create_world_trade_map', graphs.create_world_trade_map, crop)
+    timed(timings, 'graphs.create_combined_trade_bar', graphs.create_combined_trade_bar, crop)
+    timed(timings, 'graphs.create_top_producers_bar', graphs.create_top_producers_bar, crop)
+    timed(timings, 'graphs.create_yearwise_production_line', graphs.create_yearwise_production_line,
+          series, crop, countries)
+    return timings
+
+def merge(into: dict, timings: dict):
+    for name, seconds in timings.items():
+        into.setdefault(name, []).extend(seconds)
+
+def clear_caches(callbacks):
+    for cache in (callbacks.db_manager.cache, callbacks.figure_cache, callbacks.crop_store.cache,
+                  callbacks.analysis.cache):
+        if cache is not None:
+            cache.clear()
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> list:
+    """p95 latencies that got slower than the baseline by more than tolerance (and 1ms)."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for section in ('cold', 'warm', 'components'):
+        for name, current in results[section].items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous:
+                continue
+            before, after = previous['p95_ms'], current['p95_ms']
+            if after > before * (1 + tolerance) and after - before > 1:
+                regressions.append(f"{section}/{name}: p95 {before:.2f}ms -> {after:.2f}ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="existing SQLite database (default: synthetic)")
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--partners", type=int, default=100)
+    parser.add_argument("--reporters", type=int, default=1)
+    parser.add_argument("--years", default=f"{config.MIN_YEAR}-{config.MAX_YEAR}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--passes", type=int, default=5, help="page views per crop; the first is cold")
+    parser.add_argument("--threads", type=int, default=1, help="concurrent page views in warm passes")
+    parser.add_argument("--out", default="bench_requests.json", help="where to write the JSON results")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results to check for p95 regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown, e.g. 0.2 = 20%%")
+    args = parser.parse_args()
+
+    first_year, last_year = (int(year) for year in args.years.split("-"))
+    scale = {'countries': args.countries, 'items': args.items, 'partners': args.partners,
+             'reporters': args.reporters, 'years': [first_year, last_year], 'seed': args.seed}
+    workdir = tempfile.mkdtemp(prefix="agri-bench-")
+    db_path = args.db
+    if not db_path:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+            db_path = executor.submit(
+                build_database, os.path.join(workdir, "bench.db"), args.countries, args.items,
+                args.partners, range(first_year, last_year + 1), args.seed, args.reporters
+            ).result()
+        print(f"Built synthetic database in {time.perf_counter() - start:.1f}s")
+
+    config.DATABASE_PATH = db_path
+    config.FIGURE_CACHE_DIR = os.path.join(workdir, "figure_cache")
+    # callbacks creates its DatabaseManager at import time, so import it after choosing the database
+    from components import callbacks
+    from utils import instrumentation
+
+    crops = callbacks.db_manager.get_available_crops()
+
+    clear_caches(callbacks)
+    cold = {}
+    for crop in crops:
+        merge(cold, page_view(callbacks, crop))
+
+    warm = {}
+    start = time.perf_counter()
+    views = [crop for _ in range(args.passes - 1) for crop in crops]
+    with ThreadPoolExecutor(args.threads) as executor:
+        for timings in executor.map(lambda crop: page_view(callbacks, crop), views):
+            merge(warm, timings)
+    warm_seconds = time.perf_counter() - start
+
+    clear_caches(callbacks)
+    components = {}
+    for crop in crops:
+        merge(components, component_calls(callbacks, crop))
+
+    results = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'database': None if not args.db else os.path.abspath(args.db),
+        'scale': None if args.db else scale,
+        'crops': len(crops),
+        'passes': args.passes,
+        'threads': args.threads,
+        'config': {name: getattr(config, name) for name in (
+            'STORAGE_BACKEND', 'USE_PRECOMPUTED_AGGREGATES', 'SERVER_SIDE_DATA', 'CACHE_ENABLED',
+            'FIGURE_CACHE_ENABLED', 'INSTRUMENTATION_ENABLED')},
+        'cold': {name: summarize(seconds) for name, seconds in cold.items()},
+        'warm': {name: summarize(seconds) for name, seconds in warm.items()} if views else {},
+        'components': {name: summarize(seconds) for name, seconds in components.items()},
+        'throughput_views_per_s': round(len(views) / warm_seconds, 2) if views else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'callback_phases': instrumentation.metrics.snapshot(),
+    }
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+
+    print(f"{len(crops)} crops, {args.passes} passes, {args.threads} threads")
+    print(f"{'':<50}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for section in ('cold', 'warm', 'components'):
+        for name, summary in results[section].items():
+            print(f"{section + ' ' + name:<50}{summary['p50_ms']:>9.2f}{summary['p95_ms']:>9.2f}"
+                  f"{summary['p99_ms']:>9.2f}")
+    if views:
+        print(f"Warm throughput: {results['throughput_views_per_s']:.1f} page views/s")
+    print(f"Peak RSS: {results['peak_rss_mb']:.0f} MB")
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No p95 regressions against {args.compare}")
+
+if __name__ == "__main__":
+    main()
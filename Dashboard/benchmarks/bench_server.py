@@ -0,0 +1,190 @@
+# benchmarks/bench_server.py
+"""HTTP throughput of the dev server (app.py) vs gunicorn with preloaded workers.
+
+    python -m benchmarks.bench_server [--db main_database.db] [--clients 8] [--seconds 20]
+        [--workers 4] [--threads 4] [--out bench_server.json]
+
+Each server is started on a free port against the same database, then
+--clients client processes open random crop pages for --seconds: the
+page route plus every server callback of the page, posted to
+/_dash-update-component as the browser does. Requires gunicorn. Without
+--db a synthetic database is generated in a temporary directory.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import config
+from benchmarks.synthetic import build_database
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def callback_request(output: str, inputs: list) -> dict:
+    """Body of a Dash callback request with a single output."""
+    component_id, prop = output.split(".")
+    return {
+        "output": output,
+        "outputs": {"id": component_id, "property": prop},
+        "inputs": [{"id": i, "property": p, "value": v} for (i, p, v) in inputs],
+        "changedPropIds": [f"{inputs[0][0]}.{inputs[0][1]}"],
+        "state": [],
+    }
+
+def post(conn: http.client.HTTPConnection, body: dict) -> dict:
+    payload = json.dumps(body)
+    try:
+        conn.request("POST", "/_dash-update-component", payload, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+    except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+        # The server closed an idle keep-alive connection; reconnect once
+        conn.close()
+        conn.request("POST", "/_dash-update-component", payload, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+    data = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"HTTP {response.status}")
+    return json.loads(data)
+
+def page_view(conn: http.client.HTTPConnection, crop: str, slug: str):
+    """The server round trips of opening one crop page."""
+    post(conn, callback_request("page-content.children", [("url", "pathname", f"/crop/{slug}")]))
+    stored = post(conn, callback_request("crop-data-store.data", [("selected-crop", "data", crop)]))
+    stored = stored["response"]["crop-data-store"]["data"]
+    for output in ("world-trade-map-figure.data", "trade-breakdown-figure.data", "trade-timeline.data",
+                   "trade-mirror-chart.figure"):
+        post(conn, callback_request(output, [("crop-data-store", "data", stored),
+                                             ("reporter-select", "value", config.DEFAULT_REPORTER)]))
+    for output in ("top-producers-figure.data", "production-timeline.data", "yearwise-production-figure.data",
+                   "summary-stats.children"):
+        post(conn, callback_request(output, [("crop-data-store", "data", stored)]))
+    for output in ("trade-flow-figure.data", "trade-flow-timeline.data"):
+        post(conn, callback_request(output, [("crop-data-store", "data", stored),
+                                             ("trade-flow-level", "value", "countries")]))
+
+def run_client(port: int, crops: list, seconds: float, seed: int) -> dict:
+    """Open random crop pages, given as (name, slug) pairs, until the time is up.
+
+    Returns the page view latencies and the number of errors.
+    """
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            page_view(conn, *rng.choice(crops))
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    conn.close()
+    return {"latencies": latencies, "errors": errors}
+
+def wait_until_up(port: int, process: subprocess.Popen, timeout: float = 120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError("server did not start")
+
+def server_command(name: str, port: int, args) -> list:
+    if name == "dev":
+        # app.py's app.run, without the reloader so the process can be stopped cleanly
+        return [sys.executable, "-c",
+                f"import app, config; app.app.run(host='127.0.0.1', port={port}, "
+                f"debug=config.DEBUG_MODE, use_reloader=False)"]
+    return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{port}",
+            "-w", str(args.workers), "--threads", str(args.threads), "wsgi:application"]
+
+def measure(name: str, db_path: str, crops: list, args) -> dict:
+    port = free_port()
+    env = {**os.environ, "AGRISHORE_DATABASE": db_path}
+    process = subprocess.Popen(server_command(name, port, args), cwd=DASHBOARD_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port, process)
+        # One pass over every crop first, so both servers are measured warm
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        for crop, slug in crops:
+            page_view(conn, crop, slug)
+        conn.close()
+
+        with ProcessPoolExecutor(args.clients) as executor:
+            results = list(executor.map(run_client, [port] * args.clients, [crops] * args.clients,
+                                        [args.seconds] * args.clients, range(args.clients)))
+    finally:
+        process.terminate()
+        process.wait(30)
+
+    latencies = np.array([s for r in results for s in r["latencies"]]) * 1000
+    return {
+        "page_views": len(latencies),
+        "errors": sum(r["errors"] for r in results),
+        "page_views_per_s": round(len(latencies) / args.seconds, 2),
+        "requests_per_s": round(len(latencies) * 7 / args.seconds, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="existing SQLite database (default: synthetic)")
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--partners", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS)
+    parser.add_argument("--threads", type=int, default=config.SERVER_THREADS)
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    db_path = args.db or build_database(
+        os.path.join(tempfile.mkdtemp(prefix="agri-bench-"), "bench.db"),
+        args.countries, args.items, args.partners
+    )
+    # Read the crop list the same way the servers do
+    os.environ["AGRISHORE_DATABASE"] = db_path
+    from data.database import DatabaseManager
+    from data.catalog import get_slug_index
+    db_manager = DatabaseManager(db_path)
+    slugs = get_slug_index(db_manager)
+    crops = [(crop, slugs.slug(crop)) for crop in db_manager.get_available_crops()]
+
+    results = {name: measure(name, db_path, crops, args) for name in ("dev", "gunicorn")}
+
+    print(f"{len(crops)} crops, {args.clients} clients, {args.seconds:.0f}s, "
+          f"gunicorn {args.workers} workers x {args.threads} threads")
+    print(f"{'server':<10}{'views/s':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['page_views_per_s']:>10.1f}{r['requests_per_s']:>10.1f}"
+              f"{r['p50_ms'] or 0:>10.1f}{r['p95_ms'] or 0:>10.1f}{r['errors']:>8}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"crops": len(crops), "clients": args.clients, "seconds": args.seconds,
+                       "workers": args.workers, "threads": args.threads, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_storage.py
+"""Per-crop load latency of the SQLite and Parquet storage backends.
+
+    python -m benchmarks.bench_storage [--db main_database.db] [--repeat 20]
+
+Without --db a synthetic database is generated in a temporary directory.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import pandas as pd
+from data.database import DatabaseManager
+from benchmarks.synthetic import build_database
+from data_loading import export_parquet
+
+def load_crop(db: DatabaseManager, crop: str):
+    """Everything a crop page reads from storage."""
+    return db.get_production_data(crop), db.get_trade_partners(crop)
+
+def time_backend(db: DatabaseManager, crops, repeat: int) -> list:
+    """Return per-crop latencies in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        for crop in crops:
+            # Measure the storage read, not a ResultCache hit
+            if db.cache is not None:
+                db.cache.clear()
+            start = time.perf_counter()
+            load_crop(db, crop)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="existing SQLite database (default: synthetic)")
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--partners", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="agri-bench-")
+    db_path = args.db or build_database(os.path.join(workdir, "bench.db"), args.countries,
+                                        args.items, args.partners)
+    parquet_dir = os.path.join(workdir, "parquet")
+    export_parquet(db_path, parquet_dir)
+
+    backends = {
+        'sqlite': DatabaseManager(db_path, backend="sqlite"),
+        'parquet': DatabaseManager(db_path, backend="parquet", parquet_dir=parquet_dir),
+    }
+    crops = backends['sqlite'].get_available_crops()
+
+    # Both backends must return identical frames
+    for crop in crops:
+        production, trade = load_crop(backends['sqlite'], crop)
+        columnar_production, columnar_trade = load_crop(backends['parquet'], crop)
+        pd.testing.assert_frame_equal(production, columnar_production)
+        for key in ('imports', 'exports'):
+            pd.testing.assert_frame_equal(trade[key], columnar_trade[key])
+
+    print(f"{len(crops)} crops x {args.repeat} repeats")
+    print(f"{'backend':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, db in backends.items():
+        timings = sorted(time_backend(db, crops, args.repeat))
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<10}{statistics.mean(timings):>10.2f}{statistics.median(timings):>10.2f}{p95:>10.2f}")
+
+if __name__ == "__main__":
+    main()
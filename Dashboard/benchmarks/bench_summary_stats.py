@@ -0,0 +1,89 @@
+# benchmarks/bench_summary_stats.py
+"""Summary stats for every crop and year: per-crop loop vs the batch engine.
+
+    python -m benchmarks.bench_summary_stats [--db main_database.db] [--years 2014-2023]
+
+The loop reads each crop with DatabaseManager and repeats what
+update_summary_stats does for every year; the batch engine is
+data_aggregation.summary_stats over the whole long table. Without --db a
+synthetic database is generated in a temporary directory.
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import config
+from data.database import DatabaseManager
+from utils.data_processing import DataProcessor
+from benchmarks.synthetic import build_database
+from data_aggregation import FOCUS_COUNTRY, GROWTH_YEARS, summary_stats
+
+def crop_year_stats(production_df: pd.DataFrame, year: int) -> dict:
+    """The statistics update_summary_stats computes for one crop and year."""
+    year_col = f"Y{year}"
+    stats = {'GlobalProduction': production_df[year_col].sum()}
+    india_data = production_df[production_df['Area'] == FOCUS_COUNTRY]
+    if not india_data.empty:
+        stats['FocusProduction'] = india_data[year_col].iloc[0]
+        sorted_countries = production_df.sort_values(year_col, ascending=False).reset_index(drop=True)
+        stats['FocusRank'] = sorted_countries[sorted_countries['Area'] == FOCUS_COUNTRY].index[0] + 1
+    growth_data = DataProcessor.calculate_growth_rate(production_df, year - GROWTH_YEARS, year)
+    if not growth_data.empty:
+        stats['GrowthRate'] = growth_data['CAGR'].mean()
+    return stats
+
+def loop_stats(db: DatabaseManager, years) -> pd.DataFrame:
+    rows = []
+    for crop in db.get_available_crops():
+        production_df = db.get_production_data(crop)
+        for year in years:
+            rows.append({'Item': crop, 'Year': year, **crop_year_stats(production_df, year)})
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="existing SQLite database (default: synthetic)")
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=40)
+    parser.add_argument("--partners", type=int, default=20)
+    parser.add_argument("--years", default=f"{config.LATEST_YEAR - 9}-{config.LATEST_YEAR}",
+                        help="year range the loop covers, e.g. 2014-2023 (the engine always does all years)")
+    args = parser.parse_args()
+
+    db_path = args.db or build_database(
+        os.path.join(tempfile.mkdtemp(prefix="agri-bench-"), "bench.db"),
+        args.countries, args.items, args.partners
+    )
+    first, last = (int(year) for year in args.years.split("-"))
+    years = range(first, last + 1)
+
+    config.CACHE_ENABLED = False
+    db = DatabaseManager(db_path)
+
+    start = time.perf_counter()
+    looped = loop_stats(db, years)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = summary_stats(db_path, config.PRODUCTION_ELEMENT)
+    batch_seconds = time.perf_counter() - start
+
+    # The engine must agree with the per-crop path on the years both cover
+    merged = looped.merge(batch, on=['Item', 'Year'], suffixes=('_loop', '_batch'))
+    # Sorting puts a missing value last, so the loop still ranks the focus
+    # country in years it has no production; the engine leaves the rank empty
+    merged.loc[merged['FocusProduction_loop'].isna(), 'FocusRank_loop'] = np.nan
+    for column in ('GlobalProduction', 'FocusProduction', 'FocusRank', 'GrowthRate'):
+        if f"{column}_loop" in merged:
+            np.testing.assert_allclose(merged[f"{column}_loop"].astype(float),
+                                       merged[f"{column}_batch"].astype(float), rtol=1e-9, equal_nan=True)
+
+    print(f"{looped['Item'].nunique()} crops")
+    print(f"{'method':<8}{'crop-years':>12}{'seconds':>10}{'crop-years/s':>14}")
+    print(f"{'loop':<8}{len(looped):>12,}{loop_seconds:>10.2f}{len(looped) / loop_seconds:>14,.0f}")
+    print(f"{'batch':<8}{len(batch):>12,}{batch_seconds:>10.2f}{len(batch) / batch_seconds:>14,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# benchmarks/bench_timeline.py
+"""Cost of the year selector: year cubes and timelines vs re-ranking each year with pandas.
+
+    python -m benchmarks.bench_timeline [--countries 200] [--items 20] [--partners 100]
+        [--repeat 5] [--out bench_timeline.json]
+
+For every crop the area × year and partner × year cubes are built from
+DatabaseManager reads, then the top producers and partners of all years
+are ranked from the cubes (what the timeline callbacks send) and, for
+comparison, one year at a time with DataProcessor as a server callback per
+year would. If node is on the PATH, the clientside functions in
+assets/clientside.js are timed re-slicing the three charts for every year.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import config
+from benchmarks.synthetic import build_database
+from data.cube import YearCube
+from data.database import DatabaseManager
+from components.graphs import GraphGenerator
+from utils.data_processing import DataProcessor
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Re-slice the figures for every year, as dragging the year selector does
+NODE_SCRIPT = """
+global.window = {dash_clientside: {no_update: null, callback_context: {triggered: []}}};
+require(process.argv[1]);
+const d = require(process.argv[2]);
+const timeline = window.dash_clientside.timeline;
+const start = process.hrtime.bigint();
+let frames = 0;
+for (let r = 0; r < 20; r++) {
+    for (const year of d.years) {
+        timeline.showTrade(d.map, d.trade, year);
+        timeline.showTrade(d.bar, d.trade, year);
+        timeline.showProducers(d.producers, d.production, year);
+        frames++;
+    }
+}
+console.log(Number(process.hrtime.bigint() - start) / 1000 / frames);
+"""
+
+def per_year_pandas(production, trade: dict, years: list):
+    """Top producers (with India) and top partners of each year, one DataProcessor call per year."""
+    for year in years:
+        top = DataProcessor.get_top_producers(production, config.TOP_N_COUNTRIES, year)
+        DataProcessor.add_india_to_top_producers(top, production, year)
+        for key in ('imports', 'exports'):
+            DataProcessor.get_top_trade_partners(trade[key], config.TOP_N_COUNTRIES, year)
+
+def from_cubes(db: DatabaseManager, crop: str):
+    """Build the cubes and the timelines the year selector receives."""
+    production = YearCube.from_frame(db.get_production_history(crop), 'Area', 'Year', 'Production')
+    trade = db.get_trade_partners(crop)
+    cubes = {key: YearCube.from_frame(trade[key], config.TRADE_PARTNER_COLUMN, config.TRADE_YEAR_COLUMN,
+                                      config.TRADE_VALUE_COLUMN) for key in ('imports', 'exports')}
+    production_timeline = GraphGenerator.create_producers_timeline(
+        production.top_by_year(config.TOP_N_COUNTRIES, always='India'))
+    trade_timeline = GraphGenerator.create_trade_timeline(
+        {key: cube.top_by_year(config.TOP_N_COUNTRIES) for key, cube in cubes.items()})
+    return production, cubes, production_timeline, trade_timeline
+
+def clientside_us(crop: str, production_timeline: dict, trade_timeline: dict):
+    """Microseconds to re-slice the three charts for one year in node, or None without node."""
+    node = shutil.which("node")
+    if node is None:
+        return None
+    figures = {
+        'map': json.loads(GraphGenerator.create_world_trade_map(crop).to_json()),
+        'bar': json.loads(GraphGenerator.create_combined_trade_bar(crop).to_json()),
+        'producers': json.loads(GraphGenerator.create_top_producers_bar(crop).to_json()),
+        'production': production_timeline, 'trade': trade_timeline,
+        'years': list(range(config.MIN_YEAR, config.LATEST_YEAR + 1)),
+    }
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(figures, f)
+    try:
+        result = subprocess.run([node, "-e", NODE_SCRIPT, os.path.join(DASHBOARD_DIR, "assets", "clientside.js"),
+                                 f.name], capture_output=True, text=True, check=True)
+        return float(result.stdout)
+    finally:
+        os.unlink(f.name)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--partners", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    db_path = build_database(os.path.join(tempfile.mkdtemp(prefix="agri-bench-"), "bench.db"),
+                             args.countries, args.items, args.partners, seed=args.seed)
+    db = DatabaseManager(db_path)
+    crops = db.get_available_crops()
+    years = list(range(config.MIN_YEAR, config.LATEST_YEAR + 1))
+
+    cube_ms, pandas_ms, cube_kb, payload_kb, node_us = [], [], [], [], []
+    for crop in crops:
+        # Time the computation only; the database reads are cached after the first call
+        production, trade = db.get_production_data(crop), db.get_trade_partners(crop)
+        db.get_production_history(crop)
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            cubes = from_cubes(db, crop)
+            cube_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            per_year_pandas(production, trade, years)
+            pandas_ms.append((time.perf_counter() - start) * 1000)
+        production_cube, trade_cubes, production_timeline, trade_timeline = cubes
+        cube_kb.append((production_cube.nbytes + sum(cube.nbytes for cube in trade_cubes.values())) / 1024)
+        payload_kb.append(len(json.dumps([production_timeline, trade_timeline])) / 1024)
+        if len(node_us) < 3:
+            node_us.append(clientside_us(crop, production_timeline, trade_timeline))
+    db.pool.close_all()
+
+    results = {
+        'crops': len(crops), 'years': len(years),
+        'cube_and_timelines_ms': round(statistics.median(cube_ms), 2),
+        'pandas_per_year_ms': round(statistics.median(pandas_ms), 2),
+        'cube_kb': round(statistics.mean(cube_kb), 1),
+        'timeline_payload_kb': round(statistics.mean(payload_kb), 1),
+        'clientside_us_per_year': None if None in node_us else round(statistics.median(node_us), 1),
+    }
+    print(f"{len(crops)} crops, {len(years)} years, {args.countries} countries, {args.partners} partners; "
+          f"median per crop")
+    print(f"cubes + timelines of all years:   {results['cube_and_timelines_ms']:>8.2f} ms")
+    print(f"pandas, one year at a time:       {results['pandas_per_year_ms']:>8.2f} ms")
+    print(f"cube memory:                      {results['cube_kb']:>8.1f} KB")
+    print(f"timeline payload:                 {results['timeline_payload_kb']:>8.1f} KB")
+    if results['clientside_us_per_year'] is not None:
+        print(f"clientside re-slice, 3 charts:    {results['clientside_us_per_year']:>8.1f} us per year")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
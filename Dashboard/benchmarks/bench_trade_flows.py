@@ -0,0 +1,142 @@
+# benchmarks/bench_trade_flows.py
+"""Cost of the trade flow map: precomputed edge tables vs ranking the flows per request.
+
+    python -m benchmarks.bench_trade_flows [--countries 200] [--items 10] [--partners 100]
+        [--reporters 20] [--repeat 5] [--out bench_trade_flows.json]
+
+For every crop the exporter -> importer flows of all years are read the way
+the flow map callbacks do (from Trade_Edges or Trade_Region_Edges, located
+and capped at FLOW_MAP_MAX_ARCS per year) and, for comparison, computed
+from the trade table on each request with the query the edge tables are
+built from. The timeline payload and arcs per year are reported per level
+of detail; if node is on the PATH, timeline.showFlows in
+assets/clientside.js is timed drawing every year.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+import pandas as pd
+import config
+from benchmarks.synthetic import build_database
+from data.database import DatabaseManager
+from components.graphs import GraphGenerator
+from utils.analysis import CropAnalysis
+from utils.geo import locate
+from data_aggregation import trade_edges_query
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Draw the flows of every year, as dragging the year selector does
+NODE_SCRIPT = """
+global.window = {dash_clientside: {no_update: null, callback_context: {triggered: []}}};
+require(process.argv[1]);
+const d = require(process.argv[2]);
+const timeline = window.dash_clientside.timeline;
+const years = Object.keys(d.flows.years).map(Number);
+const start = process.hrtime.bigint();
+let frames = 0;
+for (let r = 0; r < 20; r++) {
+    for (const year of years) {
+        timeline.showFlows(d.figure, d.flows, year);
+        frames++;
+    }
+}
+console.log(Number(process.hrtime.bigint() - start) / 1000 / frames);
+"""
+
+def on_the_fly(db_path: str, area_geo, crop: str):
+    """The same flows with the edges ranked from the trade table on each request."""
+    with sqlite3.connect(db_path) as conn:
+        edges = pd.read_sql_query(trade_edges_query("Item = ?"), conn, params=(crop, crop))
+    flows = locate(edges, area_geo).sort_values(['Year', 'Value'], ascending=[True, False], kind='stable')
+    return flows.groupby('Year').head(config.FLOW_MAP_MAX_ARCS)
+
+def clientside_us(crop: str, level: str, flows: dict):
+    """Microseconds to draw one year of the flow map in node, or None without node."""
+    node = shutil.which("node")
+    if node is None or not flows:
+        return None
+    figure = json.loads(GraphGenerator.create_trade_flow_map(crop, level).to_json())
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump({'figure': figure, 'flows': flows}, f)
+    try:
+        result = subprocess.run([node, "-e", NODE_SCRIPT, os.path.join(DASHBOARD_DIR, "assets", "clientside.js"),
+                                 f.name], capture_output=True, text=True, check=True)
+        return float(result.stdout)
+    finally:
+        os.unlink(f.name)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--partners", type=int, default=100)
+    parser.add_argument("--reporters", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    db_path = build_database(os.path.join(tempfile.mkdtemp(prefix="agri-bench-"), "bench.db"),
+                             args.countries, args.items, args.partners, seed=args.seed,
+                             n_reporters=args.reporters)
+    # Without the result cache every call reads the edges from SQLite again
+    config.CACHE_ENABLED = False
+    db = DatabaseManager(db_path)
+    crops = db.get_available_crops()
+    area_geo = db.get_area_geo()
+    with sqlite3.connect(db_path) as conn:
+        table_rows = {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                      for table in (config.TRADE_TABLE, config.TRADE_EDGES_TABLE, config.REGION_EDGES_TABLE)}
+
+    results = {'crops': len(crops), 'reporters': args.reporters, 'table_rows': table_rows}
+    fly_ms = []
+    for crop in crops:
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            on_the_fly(db_path, area_geo, crop)
+            fly_ms.append((time.perf_counter() - start) * 1000)
+    results['on_the_fly_ms'] = round(statistics.median(fly_ms), 2)
+
+    for level in ("countries", "regions"):
+        edge_ms, payload_kb, arcs, node_us = [], [], [], []
+        for crop in crops:
+            for _ in range(args.repeat):
+                # A fresh analysis so that every repeat reads and locates the edges
+                analysis = CropAnalysis(db, None)
+                start = time.perf_counter()
+                timeline = GraphGenerator.create_trade_flow_timeline(analysis.trade_flows(crop, level))
+                edge_ms.append((time.perf_counter() - start) * 1000)
+            payload_kb.append(len(json.dumps(timeline)) / 1024)
+            arcs.extend(len(edges) for edges in timeline.get('years', {}).values())
+            if len(node_us) < 3:
+                node_us.append(clientside_us(crop, level, timeline))
+        results[level] = {
+            'edge_tables_ms': round(statistics.median(edge_ms), 2),
+            'timeline_payload_kb': round(statistics.mean(payload_kb), 1),
+            'arcs_per_year': round(statistics.mean(arcs), 1) if arcs else 0,
+            'clientside_us_per_year': None if None in node_us else round(statistics.median(node_us), 1),
+        }
+    db.pool.close_all()
+
+    print(f"{len(crops)} crops, {args.reporters} reporters, {args.partners} partners; median per crop")
+    print("rows: " + ", ".join(f"{table} {rows:,}" for table, rows in table_rows.items()))
+    print(f"countries, ranked from the trade table: {results['on_the_fly_ms']:>8.2f} ms")
+    for level in ("countries", "regions"):
+        level_results = results[level]
+        print(f"{level + ', from the edge tables:':<40}{level_results['edge_tables_ms']:>8.2f} ms"
+              f"  {level_results['timeline_payload_kb']:>7.1f} KB  {level_results['arcs_per_year']:>6.1f} arcs/year")
+        if level_results['clientside_us_per_year'] is not None:
+            print(f"{level + ', clientside draw:':<40}{level_results['clientside_us_per_year']:>8.1f} us per year")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
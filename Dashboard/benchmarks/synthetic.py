@@ -0,0 +1,80 @@
+# benchmarks/synthetic.py
+"""Synthetic FAOSTAT-shaped databases for benchmarks."""
+import os
+import sqlite3
+import sys
+import numpy as np
+import pandas as pd
+import config
+
+# Derived tables are built by the real loader in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import data_loading
+
+TRADE_ELEMENTS = [
+    ('Import quantity', 't'),
+    ('Import value', '1000 USD'),
+    ('Export quantity', 't'),
+    ('Export value', '1000 USD'),
+]
+
+def country_names(n: int) -> list:
+    """India plus n - 1 other areas: those with a centroid in data_loading.AREA_GEO_FILE, then generated names."""
+    located = []
+    if os.path.exists(data_loading.AREA_GEO_FILE):
+        located = sorted(set(pd.read_csv(data_loading.AREA_GEO_FILE)['Area']) - {'India'})
+    generated = [f"Country {i:03d}" for i in range(1, n)]
+    return (['India'] + located + generated)[:n]
+
+def item_names(n: int) -> list:
+    return [f"Crop {i:03d}" for i in range(n)]
+
+def trade_rows(rng, reporter: str, partners: list, items: list, year_list: list) -> pd.DataFrame:
+    """Imports and exports of one reporter with every partner, item, element and year."""
+    n_rows = len(items) * len(partners) * len(TRADE_ELEMENTS) * len(year_list)
+    return pd.DataFrame({
+        'Reporter Countries': reporter,
+        'Partner Countries': np.tile(np.repeat(partners, len(TRADE_ELEMENTS) * len(year_list)), len(items)),
+        'Element': np.tile(np.repeat([e for e, _ in TRADE_ELEMENTS], len(year_list)), len(items) * len(partners)),
+        'Item': np.repeat(items, len(partners) * len(TRADE_ELEMENTS) * len(year_list)),
+        'Year': np.tile(year_list, len(items) * len(partners) * len(TRADE_ELEMENTS)),
+        'Unit': np.tile(np.repeat([u for _, u in TRADE_ELEMENTS], len(year_list)), len(items) * len(partners)),
+        'Value': rng.gamma(1.5, 800.0, size=n_rows).round(1),
+    })
+
+def build_database(path: str, n_countries: int = 200, n_items: int = 20, n_partners: int = 100,
+                   years: range = range(config.MIN_YEAR, config.MAX_YEAR + 1), seed: int = 0,
+                   n_reporters: int = 1) -> str:
+    """Create a SQLite database with the production and trade tables the dashboard reads.
+
+    The production table has one row per Area and Item in the wide Y#### layout;
+    the trade table has the imports and exports of n_reporters reporters
+    (India first) with n_partners partners each.
+    """
+    rng = np.random.default_rng(seed)
+    countries = country_names(n_countries)
+    items = item_names(n_items)
+    year_list = list(years)
+
+    production = pd.DataFrame({
+        'Area': np.tile(countries, n_items),
+        'Item': np.repeat(items, n_countries),
+        'Element': config.PRODUCTION_ELEMENT,
+        'Unit': '1000 USD',
+    })
+    values = rng.gamma(2.0, 5000.0, size=(len(production), len(year_list)))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    production = pd.concat(
+        [production, pd.DataFrame(values, columns=[f"Y{year}" for year in year_list])], axis=1
+    )
+
+    with sqlite3.connect(path) as conn:
+        production.to_sql(config.PRODUCTION_TABLE, conn, if_exists='replace', index=False)
+        for i, reporter in enumerate(countries[:n_reporters]):
+            partners = [country for country in countries if country != reporter][:n_partners]
+            trade_rows(rng, reporter, partners, items, year_list).to_sql(
+                config.TRADE_TABLE, conn, if_exists='replace' if i == 0 else 'append', index=False
+            )
+
+    data_loading.post_load(path)
+    return path
@@ -1,23 +1,89 @@
 # components/callbacks.py
-from dash import callback, Input, Output, State
+from dash import callback, clientside_callback, ClientsideFunction, ctx, Input, Output, State
+import json
 import pandas as pd
 from urllib.parse import unquote
+from typing import Callable
 from data.database import DatabaseManager
+from data.cache import ResultCache, is_empty
+from data.crop_store import CropDataStore
+from data.catalog import get_slug_index
 from utils.data_processing import DataProcessor
+from utils.analysis import CropAnalysis
 from components.graphs import GraphGenerator
 from components.layout import LayoutManager
+from utils import instrumentation
+from utils.instrumentation import instrumented, report_error
 import config
 
+# Split callback time into database, processing and figure building
+instrumentation.instrument_class(DatabaseManager, "db")
+instrumentation.instrument_class(DataProcessor, "processing")
+instrumentation.instrument_class(GraphGenerator, "figure")
+
 # Initialize components
 db_manager = DatabaseManager()
 data_processor = DataProcessor()
 graph_generator = GraphGenerator()
 layout_manager = LayoutManager()
+crop_store = CropDataStore(db_manager)
+analysis = CropAnalysis(db_manager, crop_store)
+figure_cache = ResultCache(
+    max_bytes=config.FIGURE_CACHE_MAX_BYTES, disk_dir=config.FIGURE_CACHE_DIR, version=db_manager.data_version
+) if config.FIGURE_CACHE_ENABLED else None
+
+def cached_figure(chart: str, stored_data: dict, load: Callable[[], object],
+                  render: Callable[[object], object], *variant) -> dict:
+    """Figure for a static chart as a plain JSON dict, rendered once per crop and data version.
+
+    load() reads the chart's input and render(input) builds the figure. An
+    empty input is what DatabaseManager returns on errors, so its figure is
+    returned but not cached. variant holds whatever else the figure depends
+    on, e.g. the year or reporter.
+    """
+    if figure_cache is None:
+        return render(load())
+    key = repr((chart, stored_data["crop"]) + variant)
+    uncached = []
+    
+    def build():
+        data = load()
+        if is_empty(data):
+            uncached.append(render(data))
+            return None
+        return json.loads(render(data).to_json())
+    
+    figure = figure_cache.get_or_compute(key, build)
+    return uncached[0] if figure is None else figure
+
+instrumentation.metrics.add_collector("dashboard_db_pool", db_manager.pool.metrics)
+if db_manager.cache is not None:
+    instrumentation.metrics.add_collector("dashboard_query_cache", db_manager.cache.stats)
+if figure_cache is not None:
+    instrumentation.metrics.add_collector("dashboard_figure_cache", figure_cache.stats)
+instrumentation.metrics.add_collector("dashboard_analysis_cache", analysis.cache.stats)
+
+@callback(
+    [Output("crop-results", "children"),
+     Output("crop-pagination", "max_value"),
+     Output("crop-pagination", "active_page")],
+    [Input("crop-search", "value"),
+     Input("crop-pagination", "active_page")]
+)
+@instrumented
+def update_crop_results(query, page):
+    """Show one page of the crops matching the sidebar search."""
+    # A new search starts again from the first page
+    if ctx.triggered_id == "crop-search":
+        page = 1
+    links, pages = get_slug_index(db_manager).search(query or "", page or 1)
+    return layout_manager.create_crop_links(links), pages, min(page or 1, pages)
 
 @callback(
     Output("page-content", "children"),
     [Input("url", "pathname")]
 )
+@instrumented
 def display_page(pathname):
     """Handle page routing."""
     if pathname == "/" or pathname is None:
@@ -25,24 +91,14 @@ def display_page(pathname):
     
     elif pathname.startswith("/crop/"):
         try:
-            # Extract crop name from URL
-            crop_slug = pathname.split("/crop/")[1]
-            crop_name = unquote(crop_slug).replace("-", " ").title()
-            
-            # Verify crop exists in database
-            available_crops = db_manager.get_available_crops()
-            
-            # Try to find exact match or similar match
-            matching_crop = None
-            for crop in available_crops:
-                if crop.lower() == crop_name.lower():
-                    matching_crop = crop
-                    break
+            # Resolve the slug through the per-generation index
+            crop_slug = unquote(pathname.split("/crop/")[1]).strip("/")
+            matching_crop = get_slug_index(db_manager).resolve(crop_slug)
             
             if matching_crop:
-                return layout_manager.create_crop_page_layout(matching_crop)
+                return layout_manager.create_crop_page_layout(matching_crop, db_manager.get_reporters())
             else:
-                return layout_manager.create_error_page(f"Crop '{crop_name}' not found in database.")
+                return layout_manager.create_error_page(f"Crop '{crop_slug}' not found in database.")
         
         except Exception as e:
             return layout_manager.create_error_page(f"Error loading crop data: {str(e)}")
@@ -54,17 +110,25 @@ def display_page(pathname):
     Output("crop-data-store", "data"),
     [Input("selected-crop", "data")]
 )
+@instrumented
 def load_crop_data(crop):
     """Load and store crop data."""
     if not crop:
         return {}
     
     try:
+        if config.SERVER_SIDE_DATA:
+            # Build the frames once here; chart callbacks read them from crop_store.
+            # With precomputed aggregates no chart needs the raw frames.
+            if not config.USE_PRECOMPUTED_AGGREGATES:
+                crop_store.get(crop)
+            return crop_store.handle(crop)
+        
         # Get production data
         production_data = db_manager.get_production_data(crop)
         
         # Get trade data
-        trade_data = db_manager.get_india_trade_partners(crop)
+        trade_data = db_manager.get_trade_partners(crop)
         
         # Process and store data
         data = {
@@ -77,144 +141,217 @@ def load_crop_data(crop):
         return data
     
     except Exception as e:
-        print(f"Error loading crop data: {e}")
+        report_error("Error loading crop data", e)
         return {}
 
 @callback(
-    Output("world-trade-map", "figure"),
-    [Input("crop-data-store", "data")]
+    Output("world-trade-map-figure", "data"),
+    [Input("crop-data-store", "data"),
+     Input("reporter-select", "value")]
+)
+@instrumented
+def update_world_trade_map(stored_data, reporter=config.DEFAULT_REPORTER):
+    """Create the empty world trade map; the year selector draws one year of the trade timeline in the browser."""
+    crop = stored_data.get("crop", "") if stored_data else ""
+    return graph_generator.create_world_trade_map(crop, reporter or config.DEFAULT_REPORTER)
+
+@callback(
+    Output("trade-breakdown-figure", "data"),
+    [Input("crop-data-store", "data"),
+     Input("reporter-select", "value")]
+)
+@instrumented
+def update_trade_breakdown(stored_data, reporter=config.DEFAULT_REPORTER):
+    """Create the empty trade breakdown chart; the year selector draws one year of the trade timeline in the browser."""
+    crop = stored_data.get("crop", "") if stored_data else ""
+    return graph_generator.create_combined_trade_bar(crop, reporter or config.DEFAULT_REPORTER)
+
+@callback(
+    Output("trade-mirror-chart", "figure"),
+    [Input("crop-data-store", "data"),
+     Input("reporter-select", "value")]
 )
-def update_world_trade_map(stored_data):
-    """Update the world trade map."""
+@instrumented
+def update_trade_mirror(stored_data, reporter=config.DEFAULT_REPORTER):
+    """Update the reporter's reported vs mirror trade chart from the reconciled trade table."""
     if not stored_data or not stored_data.get("crop"):
-        return graph_generator.create_world_trade_map({}, "")
+        return graph_generator.create_mirror_trade_chart(pd.DataFrame(), "")
     
     try:
-        # Reconstruct dataframes from stored data
-        imports_df = pd.DataFrame(stored_data.get("trade_imports", []))
-        exports_df = pd.DataFrame(stored_data.get("trade_exports", []))
-        
-        trade_data = {
-            'imports': imports_df,
-            'exports': exports_df
-        }
-        
-        return graph_generator.create_world_trade_map(trade_data, stored_data["crop"])
+        reporter = reporter or config.DEFAULT_REPORTER
+        return cached_figure(
+            "trade-mirror-chart", stored_data, lambda: db_manager.get_trade_mirror(stored_data["crop"], reporter),
+            lambda mirror: graph_generator.create_mirror_trade_chart(mirror, stored_data["crop"], reporter),
+            reporter
+        )
     
     except Exception as e:
-        print(f"Error creating world trade map: {e}")
-        return graph_generator.create_world_trade_map({}, "")
+        report_error("Error creating mirror trade chart", e)
+        return graph_generator.create_mirror_trade_chart(pd.DataFrame(), "")
+
+@callback(
+    Output("top-producers-figure", "data"),
+    [Input("crop-data-store", "data")]
+)
+@instrumented
+def update_top_producers(stored_data):
+    """Create the empty top producers chart; the year selector draws one year of the production timeline in the browser."""
+    crop = stored_data.get("crop", "") if stored_data else ""
+    return graph_generator.create_top_producers_bar(crop)
 
 @callback(
-    Output("trade-breakdown-chart", "figure"),
+    Output("production-timeline", "data"),
     [Input("crop-data-store", "data")]
 )
-def update_trade_breakdown(stored_data):
-    """Update trade breakdown chart."""
+@instrumented
+def update_production_timeline(stored_data):
+    """Top producers of every year for the year selector, ranked from the crop's area × year cube."""
     if not stored_data or not stored_data.get("crop"):
-        return graph_generator.create_combined_trade_bar({}, "")
+        return {}
     
     try:
-        imports_df = pd.DataFrame(stored_data.get("trade_imports", []))
-        exports_df = pd.DataFrame(stored_data.get("trade_exports", []))
-        
-        trade_data = {
-            'imports': imports_df,
-            'exports': exports_df
-        }
-        
-        return graph_generator.create_combined_trade_bar(trade_data, stored_data["crop"])
+        return graph_generator.create_producers_timeline(analysis.producers_by_year(stored_data["crop"]))
     
     except Exception as e:
-        print(f"Error creating trade breakdown: {e}")
-        return graph_generator.create_combined_trade_bar({}, "")
+        report_error("Error creating production timeline", e)
+        return {}
 
 @callback(
-    Output("top-producers-chart", "figure"),
-    [Input("crop-data-store", "data")]
+    Output("trade-timeline", "data"),
+    [Input("crop-data-store", "data"),
+     Input("reporter-select", "value")]
 )
-def update_top_producers(stored_data):
-    """Update top producers chart."""
+@instrumented
+def update_trade_timeline(stored_data, reporter=config.DEFAULT_REPORTER):
+    """A reporter's top partners of every year for the year selector, ranked from partner × year cubes."""
     if not stored_data or not stored_data.get("crop"):
-        return graph_generator.create_top_producers_bar(pd.DataFrame(), "")
+        return {}
     
     try:
-        production_df = pd.DataFrame(stored_data.get("production_data", []))
-        
-        if not production_df.empty:
-            # Get top producers
-            top_producers = data_processor.get_top_producers(production_df, config.TOP_N_COUNTRIES)
-            
-            # Ensure India is included
-            top_producers_with_india = data_processor.add_india_to_top_producers(
-                top_producers, production_df
-            )
-            
-            return graph_generator.create_top_producers_bar(
-                top_producers_with_india, stored_data["crop"]
-            )
-        else:
-            return graph_generator.create_top_producers_bar(pd.DataFrame(), stored_data["crop"])
+        reporter = reporter or config.DEFAULT_REPORTER
+        return graph_generator.create_trade_timeline(analysis.partners_by_year(stored_data["crop"], reporter))
     
     except Exception as e:
-        print(f"Error creating top producers chart: {e}")
-        return graph_generator.create_top_producers_bar(pd.DataFrame(), "")
+        report_error("Error creating trade timeline", e)
+        return {}
 
 @callback(
-    Output("yearwise-production-chart", "figure"),
+    Output("trade-flow-figure", "data"),
+    [Input("crop-data-store", "data"),
+     Input("trade-flow-level", "value")]
+)
+@instrumented
+def update_trade_flow_map(stored_data, level="countries"):
+    """Create the empty trade flow map; the year selector draws one year of the flows in the browser."""
+    crop = stored_data.get("crop", "") if stored_data else ""
+    return graph_generator.create_trade_flow_map(crop, level or "countries")
+
+@callback(
+    Output("trade-flow-timeline", "data"),
     [Input("crop-data-store", "data"),
-     Input("year-range-slider", "value")]
+     Input("trade-flow-level", "value")]
 )
-def update_yearwise_production(stored_data, year_range):
-    """Update year-wise production chart."""
+@instrumented
+def update_trade_flow_timeline(stored_data, level="countries"):
+    """Trade flows of every year between countries or regions, from the precomputed edge tables."""
+    if not stored_data or not stored_data.get("crop"):
+        return {}
+    
+    try:
+        return graph_generator.create_trade_flow_timeline(analysis.trade_flows(stored_data["crop"], level or "countries"))
+    
+    except Exception as e:
+        report_error("Error creating trade flow timeline", e)
+        return {}
+
+# Moving the year selector only re-slices the stored figures in the browser (assets/clientside.js)
+for chart, figure, timeline, function_name in (
+    ("world-trade-map", "world-trade-map-figure", "trade-timeline", "showTrade"),
+    ("trade-breakdown-chart", "trade-breakdown-figure", "trade-timeline", "showTrade"),
+    ("top-producers-chart", "top-producers-figure", "production-timeline", "showProducers"),
+    ("trade-flow-map", "trade-flow-figure", "trade-flow-timeline", "showFlows"),
+):
+    clientside_callback(
+        ClientsideFunction(namespace="timeline", function_name=function_name),
+        Output(chart, "figure"),
+        [Input(figure, "data"),
+         Input(timeline, "data"),
+         Input("year-select", "value")]
+    )
+
+clientside_callback(
+    ClientsideFunction(namespace="timeline", function_name="play"),
+    [Output("year-select", "value"),
+     Output("year-play-interval", "disabled"),
+     Output("year-play", "children")],
+    [Input("year-play", "n_clicks"),
+     Input("year-play-interval", "n_intervals")],
+    [State("year-select", "value"),
+     State("year-play-interval", "disabled"),
+     State("year-select", "min"),
+     State("year-select", "max")],
+    prevent_initial_call=True
+)
+
+@callback(
+    Output("yearwise-production-figure", "data"),
+    [Input("crop-data-store", "data")]
+)
+@instrumented
+def update_yearwise_production(stored_data):
+    """Build the year-wise production chart over all years; the year slider filters it clientside."""
     if not stored_data or not stored_data.get("crop"):
         return graph_generator.create_yearwise_production_line(pd.DataFrame(), "")
     
     try:
-        production_df = pd.DataFrame(stored_data.get("production_data", []))
+        countries = []
         
-        if not production_df.empty:
-            # Get top producers for the selected countries
-            top_producers = data_processor.get_top_producers(production_df, config.TOP_N_COUNTRIES)
-            
-            # Add India if not in top producers
-            top_producers_with_india = data_processor.add_india_to_top_producers(
-                top_producers, production_df
-            )
-            
-            countries = top_producers_with_india['Area'].tolist()
-            
-            # Get year-wise data for these countries
-            yearwise_data = data_processor.get_yearwise_production(production_df, countries)
-            
-            # Filter by year range if provided
-            if year_range and len(year_range) == 2:
-                yearwise_data = yearwise_data[
-                    (yearwise_data['Year'] >= year_range[0]) & 
-                    (yearwise_data['Year'] <= year_range[1])
-                ]
-            
-            return graph_generator.create_yearwise_production_line(
-                yearwise_data, stored_data["crop"], countries
-            )
-        else:
-            return graph_generator.create_yearwise_production_line(pd.DataFrame(), stored_data["crop"])
+        def load():
+            # Top producers (plus India) for the selected countries, shared with the top producers chart
+            top_producers_with_india = analysis.top_producers(stored_data)
+            if top_producers_with_india.empty:
+                return top_producers_with_india
+            countries.extend(top_producers_with_india['Area'].tolist())
+            return db_manager.get_production_series(stored_data["crop"], countries, config.MIN_YEAR, config.MAX_YEAR)
+        
+        def render(yearwise_data):
+            if not yearwise_data.empty:
+                return graph_generator.create_yearwise_production_line(
+                    yearwise_data, stored_data["crop"], countries
+                )
+            else:
+                return graph_generator.create_yearwise_production_line(pd.DataFrame(), stored_data["crop"])
+        
+        return cached_figure("yearwise-production-chart", stored_data, load, render)
     
     except Exception as e:
-        print(f"Error creating yearwise production chart: {e}")
+        report_error("Error creating yearwise production chart", e)
         return graph_generator.create_yearwise_production_line(pd.DataFrame(), "")
 
+# Slider changes only re-filter the stored figure in the browser (assets/clientside.js)
+clientside_callback(
+    ClientsideFunction(namespace="trends", function_name="filterYears"),
+    Output("yearwise-production-chart", "figure"),
+    [Input("yearwise-production-figure", "data"),
+     Input("year-range-slider", "value"),
+     Input("year-select", "value")]
+)
+
 @callback(
     Output("summary-stats", "children"),
     [Input("crop-data-store", "data")]
 )
+@instrumented
 def update_summary_stats(stored_data):
     """Update summary statistics."""
     if not stored_data or not stored_data.get("crop"):
         return layout_manager.create_summary_cards({})
     
     try:
-        production_df = pd.DataFrame(stored_data.get("production_data", []))
+        if config.USE_PRECOMPUTED_AGGREGATES:
+            return layout_manager.create_summary_cards(db_manager.get_crop_summary(stored_data["crop"]))
+        
+        production_df = analysis.frames(stored_data)['production']
         
         if not production_df.empty:
             year_col = f"Y{config.LATEST_YEAR}"
@@ -250,5 +387,5 @@ def update_summary_stats(stored_data):
             return layout_manager.create_summary_cards({})
     
     except Exception as e:
-        print(f"Error calculating summary stats: {e}")
+        report_error("Error calculating summary stats", e)
         return layout_manager.create_summary_cards({})
\ No newline at end of file
@@ -2,71 +2,79 @@
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from typing import Dict, List
-from utils.constants import CHART_COLORS, GRAPH_CONFIG
+from typing import Dict, List, Tuple
+from utils.constants import CHART_COLORS, FLOW_LINE_WIDTHS, GRAPH_CONFIG
 import config
 
 class GraphGenerator:
     """Generates various types of graphs for the agricultural dashboard."""
     
     @staticmethod
-    def create_world_trade_map(trade_data: Dict[str, pd.DataFrame], crop: str) -> go.Figure:
-        """Create a world map showing India's trade relationships."""
+    def create_world_trade_map(crop: str, reporter: str = config.DEFAULT_REPORTER) -> go.Figure:
+        """Create the world map of a reporter's top partners: an import and an export trace.
+        
+        The traces start empty and hidden; the year selector draws one year
+        of create_trade_timeline into them in the browser.
+        """
         fig = go.Figure()
         
-        # Process import data
-        if not trade_data['imports'].empty:
-            imports = trade_data['imports']
-            # Get latest year data
-            latest_year = imports[config.TRADE_YEAR_COLUMN].max()
-            import_latest = imports[imports[config.TRADE_YEAR_COLUMN] == latest_year]
-            
-            if not import_latest.empty:
-                import_partners = import_latest.groupby(config.TRADE_PARTNER_COLUMN)[config.TRADE_VALUE_COLUMN].sum().reset_index()
-                import_partners = import_partners.sort_values(config.TRADE_VALUE_COLUMN, ascending=False).head(10)
-                
-                fig.add_trace(go.Choropleth(
-                    locations=import_partners[config.TRADE_PARTNER_COLUMN],
-                    z=import_partners[config.TRADE_VALUE_COLUMN],
-                    locationmode='country names',
-                    colorscale='Blues',
-                    name='Imports',
-                    hovertemplate='<b>%{location}</b><br>Import Value: %{z:,.0f}<extra></extra>'
-                ))
+        for name, colorscale in (('Imports', 'Blues'), ('Exports', 'Reds')):
+            fig.add_trace(go.Choropleth(
+                locations=[],
+                z=[],
+                locationmode='country names',
+                colorscale=colorscale,
+                name=name,
+                visible=False,
+                hovertemplate=f'<b>%{{location}}</b><br>{name[:-1]} Value: %{{z:,.0f}}<extra></extra>'
+            ))
         
-        # Process export data
-        if not trade_data['exports'].empty:
-            exports = trade_data['exports']
-            # Get latest year data
-            latest_year = exports[config.TRADE_YEAR_COLUMN].max()
-            export_latest = exports[exports[config.TRADE_YEAR_COLUMN] == latest_year]
-            
-            if not export_latest.empty:
-                export_partners = export_latest.groupby(config.TRADE_PARTNER_COLUMN)[config.TRADE_VALUE_COLUMN].sum().reset_index()
-                export_partners = export_partners.sort_values(config.TRADE_VALUE_COLUMN, ascending=False).head(10)
-                
-                fig.add_trace(go.Choropleth(
-                    locations=export_partners[config.TRADE_PARTNER_COLUMN],
-                    z=export_partners[config.TRADE_VALUE_COLUMN],
-                    locationmode='country names',
-                    colorscale='Reds',
-                    name='Exports',
-                    hovertemplate='<b>%{location}</b><br>Export Value: %{z:,.0f}<extra></extra>'
-                ))
+        fig.update_layout(
+            title=f"{reporter}'s {crop} Trade Partners ({config.LATEST_YEAR})",
+            geo=dict(
+                showframe=False,
+                showcoastlines=True,
+                projection_type='equirectangular'
+            ),
+            height=500
+        )
         
-        # Get the actual latest year from data
-        actual_year = config.LATEST_YEAR
-        if not trade_data['imports'].empty:
-            actual_year = trade_data['imports'][config.TRADE_YEAR_COLUMN].max()
-        elif not trade_data['exports'].empty:
-            actual_year = trade_data['exports'][config.TRADE_YEAR_COLUMN].max()
+        return fig
+    
+    @staticmethod
+    def create_trade_flow_map(crop: str, level: str = "countries") -> go.Figure:
+        """Create the trade flow map: one arc trace per line width and a trace of the areas at their ends.
+        
+        The traces start empty; the year selector draws one year of
+        create_trade_flow_timeline into them in the browser.
+        """
+        fig = go.Figure()
+        
+        for share, width in FLOW_LINE_WIDTHS:
+            fig.add_trace(go.Scattergeo(
+                lon=[], lat=[], text=[],
+                mode='lines',
+                line=dict(width=width, color='#1f77b4'),
+                opacity=0.6,
+                hoverinfo='text',
+                showlegend=False,
+                meta={'share': share}
+            ))
+        fig.add_trace(go.Scattergeo(
+            lon=[], lat=[], text=[],
+            mode='markers',
+            marker=dict(size=5, color='#343a40'),
+            hoverinfo='text',
+            showlegend=False
+        ))
         
         fig.update_layout(
-            title=f"India's {crop} Trade Partners ({actual_year})",
+            title=f"{crop} Trade Flows between {level.title()} ({config.LATEST_YEAR})",
             geo=dict(
                 showframe=False,
                 showcoastlines=True,
-                projection_type='equirectangular'
+                showcountries=True,
+                projection_type='natural earth'
             ),
             height=500
         )
@@ -74,39 +82,51 @@ class GraphGenerator:
         return fig
     
     @staticmethod
-    def create_top_producers_bar(production_data: pd.DataFrame, crop: str, year: int = None) -> go.Figure:
-        """Create bar chart of top producing countries."""
-        if production_data.empty:
-            return go.Figure().add_annotation(
-                text="No data available", 
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
+    def create_trade_flow_timeline(flows: pd.DataFrame) -> dict:
+        """Trade flows of every year for the trade flow map (see CropAnalysis.trade_flows).
         
-        if year is None:
-            year = config.LATEST_YEAR
+        Areas are listed once in 'nodes'; each year is a list of
+        [exporter, importer, value] rows indexing them, largest first.
+        """
+        if flows.empty:
+            return {}
         
-        year_col = f"Y{year}"
+        ends = pd.concat([
+            flows[['Exporter', 'ExporterLatitude', 'ExporterLongitude']].set_axis(['Name', 'Latitude', 'Longitude'], axis=1),
+            flows[['Importer', 'ImporterLatitude', 'ImporterLongitude']].set_axis(['Name', 'Latitude', 'Longitude'], axis=1),
+        ]).drop_duplicates('Name', ignore_index=True)
+        index = pd.Series(ends.index, index=ends['Name'])
+        rows = pd.DataFrame({
+            'Year': flows['Year'],
+            'from': index[flows['Exporter']].to_numpy(),
+            'to': index[flows['Importer']].to_numpy(),
+            'value': flows['Value'],
+        })
         
-        # Highlight India if present
-        colors = []
-        for country in production_data['Area']:
-            if country == 'India':
-                colors.append('#ff7f0e')  # Orange for India
-            else:
-                colors.append('#1f77b4')  # Blue for others
+        return {
+            'nodes': {'name': ends['Name'].tolist(), 'lat': ends['Latitude'].tolist(), 'lon': ends['Longitude'].tolist()},
+            'last': int(flows['Year'].max()),
+            'years': {str(year): list(zip(group['from'].tolist(), group['to'].tolist(), group['value'].tolist()))
+                      for year, group in rows.groupby('Year')},
+        }
+    
+    @staticmethod
+    def create_top_producers_bar(crop: str) -> go.Figure:
+        """Create bar chart of top producing countries.
         
+        The bar trace starts empty; the year selector draws one year of
+        create_producers_timeline into it in the browser.
+        """
         fig = go.Figure(data=[
             go.Bar(
-                x=production_data['Area'],
-                y=production_data[year_col],
-                marker_color=colors,
+                x=[],
+                y=[],
                 hovertemplate='<b>%{x}</b><br>Production: %{y:,.0f}<extra></extra>'
             )
         ])
         
         fig.update_layout(
-            title=f"Top {len(production_data)} {crop} Producers ({year})",
+            title=f"Top {config.TOP_N_COUNTRIES} {crop} Producers ({config.LATEST_YEAR})",
             xaxis_title="Country",
             yaxis_title="Production (tonnes)",
             xaxis_tickangle=-45,
@@ -115,6 +135,29 @@ class GraphGenerator:
         
         return fig
     
+    @staticmethod
+    def producer_colors(areas) -> List[str]:
+        """Bar colors of the top producers chart: orange for India, blue for others."""
+        return ['#ff7f0e' if area == 'India' else '#1f77b4' for area in areas]
+    
+    @staticmethod
+    def create_producers_timeline(producers_by_year: Dict[int, Tuple[List[str], List[float]]]) -> dict:
+        """Top producers chart data of every year, for the year selector (assets/clientside.js)."""
+        return {'years': {
+            str(year): {'x': areas, 'y': values, 'colors': GraphGenerator.producer_colors(areas)}
+            for year, (areas, values) in producers_by_year.items()
+        }}
+    
+    @staticmethod
+    def create_trade_timeline(partners_by_year: Dict[str, dict]) -> dict:
+        """Top import and export partners of every year, for the year selector (assets/clientside.js).
+        
+        Each flow also records its latest year, which the charts show for any later year.
+        """
+        return {key: {'last': max(by_year, default=None),
+                      'years': {str(year): {'x': names, 'y': values} for year, (names, values) in by_year.items()}}
+                for key, by_year in partners_by_year.items()}
+    
     @staticmethod
     def create_yearwise_production_line(yearwise_data: pd.DataFrame, crop: str, countries: List[str] = None) -> go.Figure:
         """Create line chart showing year-wise production trends."""
@@ -135,9 +178,10 @@ class GraphGenerator:
             line_color = '#ff7f0e' if country == 'India' else CHART_COLORS[i % len(CHART_COLORS)]
             line_width = 3 if country == 'India' else 2
             
+            # Plain lists, so the clientside year filter can slice them
             fig.add_trace(go.Scatter(
-                x=country_data['Year'],
-                y=country_data['Production'],
+                x=country_data['Year'].tolist(),
+                y=country_data['Production'].tolist(),
                 mode='lines+markers',
                 name=country,
                 line=dict(color=line_color, width=line_width),
@@ -155,7 +199,8 @@ class GraphGenerator:
         return fig
     
     @staticmethod
-    def create_trade_breakdown_pie(trade_data: pd.DataFrame, trade_type: str, crop: str) -> go.Figure:
+    def create_trade_breakdown_pie(trade_data: pd.DataFrame, trade_type: str, crop: str,
+                                   reporter: str = config.DEFAULT_REPORTER) -> go.Figure:
         """Create pie chart showing trade breakdown by partners."""
         if trade_data.empty:
             return go.Figure().add_annotation(
@@ -176,7 +221,7 @@ class GraphGenerator:
             )
         
         # Group by partner and sum values
-        trade_summary = year_data.groupby(config.TRADE_PARTNER_COLUMN)[config.TRADE_VALUE_COLUMN].sum().reset_index()
+        trade_summary = year_data.groupby(config.TRADE_PARTNER_COLUMN, observed=True)[config.TRADE_VALUE_COLUMN].sum().reset_index()
         trade_summary = trade_summary.sort_values(config.TRADE_VALUE_COLUMN, ascending=False).head(10)
         
         fig = go.Figure(data=[
@@ -189,62 +234,69 @@ class GraphGenerator:
         ])
         
         fig.update_layout(
-            title=f"India's {crop} {trade_type} Partners ({latest_year})",
+            title=f"{reporter}'s {crop} {trade_type} Partners ({latest_year})",
             height=500
         )
         
         return fig
     
     @staticmethod
-    def create_combined_trade_bar(trade_data: Dict[str, pd.DataFrame], crop: str) -> go.Figure:
-        """Create combined bar chart showing both imports and exports."""
+    def create_mirror_trade_chart(mirror: pd.DataFrame, crop: str,
+                                  reporter: str = config.DEFAULT_REPORTER) -> go.Figure:
+        """Create line chart of a reporter's yearly exports and imports as it and its partners reported them."""
+        if mirror.empty:
+            return go.Figure().add_annotation(
+                text="No data available", 
+                xref="paper", yref="paper",
+                x=0.5, y=0.5, showarrow=False
+            )
+        
         fig = go.Figure()
         
-        # Process imports
-        if not trade_data['imports'].empty:
-            imports = trade_data['imports']
-            latest_year = imports[config.TRADE_YEAR_COLUMN].max()
-            import_latest = imports[imports[config.TRADE_YEAR_COLUMN] == latest_year]
-            
-            if not import_latest.empty:
-                import_partners = import_latest.groupby(config.TRADE_PARTNER_COLUMN)[config.TRADE_VALUE_COLUMN].sum().reset_index()
-                import_partners = import_partners.sort_values(config.TRADE_VALUE_COLUMN, ascending=False).head(10)
-                
-                fig.add_trace(go.Bar(
-                    name='Imports',
-                    x=import_partners[config.TRADE_PARTNER_COLUMN],
-                    y=import_partners[config.TRADE_VALUE_COLUMN],
-                    marker_color='lightblue',
-                    hovertemplate='<b>%{x}</b><br>Imports: %{y:,.0f}<extra></extra>'
+        for flow, color in (('Import', 'lightblue'), ('Export', 'lightcoral')):
+            rows = mirror[mirror['Flow'] == flow]
+            for column, name, dash in (('Reported', f"{flow}s reported by {reporter}", 'solid'),
+                                       ('Mirror', f"{flow}s reported by partners", 'dash')):
+                fig.add_trace(go.Scatter(
+                    x=rows['Year'].tolist(),
+                    y=rows[column].tolist(),
+                    customdata=rows['Ratio'].tolist(),
+                    mode='lines',
+                    name=name,
+                    line=dict(color=color, width=2, dash=dash),
+                    hovertemplate='%{y:,.0f} (importer/exporter: %{customdata:.2f})'
                 ))
         
-        # Process exports
-        if not trade_data['exports'].empty:
-            exports = trade_data['exports']
-            latest_year = exports[config.TRADE_YEAR_COLUMN].max()
-            export_latest = exports[exports[config.TRADE_YEAR_COLUMN] == latest_year]
-            
-            if not export_latest.empty:
-                export_partners = export_latest.groupby(config.TRADE_PARTNER_COLUMN)[config.TRADE_VALUE_COLUMN].sum().reset_index()
-                export_partners = export_partners.sort_values(config.TRADE_VALUE_COLUMN, ascending=False).head(10)
-                
-                fig.add_trace(go.Bar(
-                    name='Exports',
-                    x=export_partners[config.TRADE_PARTNER_COLUMN],
-                    y=export_partners[config.TRADE_VALUE_COLUMN],
-                    marker_color='lightcoral',
-                    hovertemplate='<b>%{x}</b><br>Exports: %{y:,.0f}<extra></extra>'
-                ))
+        fig.update_layout(
+            title=f"{reporter}'s {crop} Trade: Reported vs Mirror Statistics",
+            xaxis_title="Year",
+            yaxis_title="Trade Value",
+            height=500,
+            hovermode='x unified'
+        )
         
-        # Get actual year from data
-        actual_year = config.LATEST_YEAR
-        if not trade_data['imports'].empty:
-            actual_year = trade_data['imports'][config.TRADE_YEAR_COLUMN].max()
-        elif not trade_data['exports'].empty:
-            actual_year = trade_data['exports'][config.TRADE_YEAR_COLUMN].max()
+        return fig
+    
+    @staticmethod
+    def create_combined_trade_bar(crop: str, reporter: str = config.DEFAULT_REPORTER) -> go.Figure:
+        """Create combined bar chart of a reporter's top import and export partners.
+        
+        Like create_world_trade_map, the traces are filled by the year selector.
+        """
+        fig = go.Figure()
+        
+        for name, color in (('Imports', 'lightblue'), ('Exports', 'lightcoral')):
+            fig.add_trace(go.Bar(
+                name=name,
+                x=[],
+                y=[],
+                marker_color=color,
+                visible=False,
+                hovertemplate=f'<b>%{{x}}</b><br>{name}: %{{y:,.0f}}<extra></extra>'
+            ))
         
         fig.update_layout(
-            title=f"India's {crop} Trade Overview ({actual_year})",
+            title=f"{reporter}'s {crop} Trade Overview ({config.LATEST_YEAR})",
             xaxis_title="Country",
             yaxis_title="Trade Value",
             barmode='group',
@@ -2,7 +2,7 @@
 import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
-from typing import List
+from typing import List, Tuple
 from utils.constants import SIDEBAR_STYLE, CONTENT_STYLE
 import config
 
@@ -10,25 +10,36 @@ class LayoutManager:
     """Manages the layout components of the dashboard."""
     
     @staticmethod
-    def create_sidebar(crops: List[str]) -> html.Div:
-        """Create the sidebar with navigation."""
+    def create_sidebar() -> html.Div:
+        """Create the sidebar with crop search and paginated navigation."""
         return html.Div([
             html.H2("Agricultural Dashboard", className="display-4"),
             html.Hr(),
             html.P("Select a crop to analyze:", className="lead"),
-            dbc.Nav([
-                dbc.NavLink(
-                    crop, 
-                    href=f"/crop/{crop.lower().replace(' ', '-')}", 
-                    active="exact",
-                    className="mb-1"
-                ) for crop in crops[:20]  # Limit to first 20 crops for display
-            ], vertical=True, pills=True),
+            dbc.Input(id="crop-search", type="search", placeholder="Search crops...",
+                      debounce=200, className="mb-2"),
+            html.Div(id="crop-results"),
+            dbc.Pagination(id="crop-pagination", max_value=1, active_page=1, fully_expanded=False,
+                           size="sm", className="mt-2"),
             html.Hr(),
             html.P(f"Data from {config.YEAR_COLUMNS[0][1:]} to {config.LATEST_YEAR}", 
                    className="text-muted small")
         ], style=SIDEBAR_STYLE)
     
+    @staticmethod
+    def create_crop_links(crops: List[Tuple[str, str]]) -> dbc.Nav:
+        """Navigation links for one page of crop search results, given (name, slug) pairs."""
+        if not crops:
+            return html.P("No matching crops.", className="text-muted small")
+        return dbc.Nav([
+            dbc.NavLink(
+                crop, 
+                href=f"/crop/{slug}", 
+                active="exact",
+                className="mb-1"
+            ) for crop, slug in crops
+        ], vertical=True, pills=True)
+    
     @staticmethod
     def create_main_content() -> html.Div:
         """Create the main content area."""
@@ -38,8 +49,12 @@ class LayoutManager:
         ], style=CONTENT_STYLE)
     
     @staticmethod
-    def create_crop_page_layout(crop: str) -> html.Div:
-        """Create layout for individual crop pages."""
+    def create_crop_page_layout(crop: str, reporters: List[str] = None) -> html.Div:
+        """Create layout for individual crop pages.
+
+        reporters lists the countries offered in the trade reporter selector.
+        """
+        reporters = reporters or [config.DEFAULT_REPORTER]
         return html.Div([
             # Header
             dbc.Row([
@@ -49,15 +64,50 @@ class LayoutManager:
                 ])
             ]),
             
-            # Loading component
+            # Year shown by the trade, trade flow and top producers charts (and marked on the trends chart)
+            dbc.Row([
+                dbc.Col([
+                    html.Label("Year:", className="mb-2"),
+                    html.Div([
+                        dbc.Button("▶ Play", id="year-play", size="sm", color="secondary", className="me-3"),
+                        html.Div(
+                            dcc.Slider(
+                                id="year-select",
+                                min=config.MIN_YEAR,
+                                max=config.LATEST_YEAR,
+                                value=config.LATEST_YEAR,
+                                marks=LayoutManager.year_marks(),
+                                step=1,
+                                updatemode="drag"
+                            ),
+                            style={"flex": 1}
+                        )
+                    ], style={"display": "flex", "alignItems": "center"}),
+                    dcc.Interval(id="year-play-interval", interval=config.YEAR_PLAY_INTERVAL_MS, disabled=True)
+                ])
+            ], className="mb-4"),
+            
+            # Loading component; the delay keeps it from flashing while the year selector redraws the charts
             dcc.Loading(
                 id="loading",
                 type="default",
+                delay_show=config.YEAR_PLAY_INTERVAL_MS,
                 children=[
-                    # India's Trade with World
+                    # Reporter's Trade with World
                     dbc.Row([
                         dbc.Col([
-                            html.H3("India's Trade Network", className="mb-3"),
+                            html.H3("Trade Network", className="mb-3"),
+                            html.Div([
+                                html.Label("Reporting country:", className="mb-2"),
+                                dcc.Dropdown(
+                                    id="reporter-select",
+                                    options=reporters,
+                                    value=(config.DEFAULT_REPORTER if config.DEFAULT_REPORTER in reporters
+                                           else reporters[0]),
+                                    clearable=False,
+                                    className="mb-3"
+                                )
+                            ]),
                             dbc.Card([
                                 dbc.CardBody([
                                     dcc.Graph(id="world-trade-map")
@@ -74,6 +124,31 @@ class LayoutManager:
                         ], width=12)
                     ], className="mb-4"),
                     
+                    # The reporter's trade as it and its partners reported it
+                    dbc.Row([
+                        dbc.Col([
+                            html.H4("Mirror Statistics", className="mb-3"),
+                            dcc.Graph(id="trade-mirror-chart")
+                        ], width=12)
+                    ], className="mb-4"),
+                    
+                    # Flows between every exporter and importer
+                    dbc.Row([
+                        dbc.Col([
+                            html.H4("Global Trade Flows", className="mb-3"),
+                            dcc.RadioItems(
+                                id="trade-flow-level",
+                                options=[{"label": " Countries", "value": "countries"},
+                                         {"label": " Regions", "value": "regions"}],
+                                value="countries",
+                                inline=True,
+                                labelStyle={"marginRight": "1rem"},
+                                className="mb-2"
+                            ),
+                            dcc.Graph(id="trade-flow-map")
+                        ], width=12)
+                    ], className="mb-4"),
+                    
                     # Top Producers
                     dbc.Row([
                         dbc.Col([
@@ -96,16 +171,10 @@ class LayoutManager:
                                         html.Label("Select Year Range:", className="mb-2"),
                                         dcc.RangeSlider(
                                             id="year-range-slider",
-                                            min=1961,
+                                            min=config.MIN_YEAR,
                                             max=config.LATEST_YEAR,
                                             value=[2000, config.LATEST_YEAR],
-                                            marks={
-                                                1961: '1961',
-                                                1980: '1980',
-                                                2000: '2000',
-                                                2020: '2020',
-                                                config.LATEST_YEAR: str(config.LATEST_YEAR)
-                                            },
+                                            marks=LayoutManager.year_marks(),
                                             step=1,
                                             className="mb-3"
                                         )
@@ -128,9 +197,26 @@ class LayoutManager:
             
             # Store components for data
             dcc.Store(id="crop-data-store"),
-            dcc.Store(id="selected-crop", data=crop)
+            dcc.Store(id="selected-crop", data=crop),
+            # Full-range trend figure; the year slider filters it in the browser
+            dcc.Store(id="yearwise-production-figure"),
+            # Latest-year figures and the top producers/partners of every year;
+            # the year selector combines them in the browser
+            dcc.Store(id="world-trade-map-figure"),
+            dcc.Store(id="trade-breakdown-figure"),
+            dcc.Store(id="top-producers-figure"),
+            dcc.Store(id="trade-flow-figure"),
+            dcc.Store(id="production-timeline"),
+            dcc.Store(id="trade-timeline"),
+            dcc.Store(id="trade-flow-timeline")
         ])
     
+    @staticmethod
+    def year_marks() -> dict:
+        """Slider marks for the year selector and the trends year range."""
+        years = [config.MIN_YEAR, 1980, 2000, 2020, config.LATEST_YEAR]
+        return {year: str(year) for year in years if config.MIN_YEAR <= year <= config.LATEST_YEAR}
+    
     @staticmethod
     def create_summary_cards(stats: dict) -> html.Div:
         """Create summary statistics cards."""
@@ -1,10 +1,74 @@
 # config.py
+import glob
 import os
 
 # Database configuration
-DATABASE_PATH = "/Users/vivek/DriveE/PROJECTS/agrishore/main_database.db"  # Update this path
+DATABASE_PATH = os.environ.get(
+    "AGRISHORE_DATABASE", "/Users/vivek/DriveE/PROJECTS/agrishore/main_database.db"
+)  # Update this path (or set AGRISHORE_DATABASE)
 PRODUCTION_TABLE = "Value_of_Production_E_All_Data"       # Update table name
 TRADE_TABLE = "Trade_Matrix_India"                # Update table name
+PRODUCTION_LONG_TABLE = "Value_of_Production_Long"  # Long (Area, Item, Element, Year, Value) copy built by data_loading.py
+
+# Per-crop summary tables built by data_aggregation.py after each load
+USE_PRECOMPUTED_AGGREGATES = True
+TOP_PRODUCERS_TABLE = "Crop_Top_Producers"
+CROP_SUMMARY_TABLE = "Crop_Summary"
+TOP_PARTNERS_TABLE = "Crop_Top_Partners"
+TRADE_EDGES_TABLE = "Trade_Edges"            # Largest exporter -> importer flows per crop and year
+REGION_EDGES_TABLE = "Trade_Region_Edges"    # All flows per crop and year, summed by region
+AREA_GEO_TABLE = "Area_Geo"                  # Centroid and region of each area
+FLOW_MAP_MAX_ARCS = 150                      # Arcs per year sent to the trade flow map
+MIRROR_TABLE = "Trade_Mirror"                # Each flow as reported by the exporter and by the importer
+
+# Storage backend: "sqlite" reads DATABASE_PATH, "parquet" reads the partitioned
+# copy that data_loading.py writes to PARQUET_DIR/generation=N (requires pyarrow)
+STORAGE_BACKEND = "sqlite"
+PARQUET_DIR = os.path.join(os.path.dirname(DATABASE_PATH), "parquet")
+
+# Read-only SQLite connection pool shared by the server's worker threads
+DB_POOL_SIZE = 8                   # Maximum open connections per process
+DB_POOL_TIMEOUT = 10               # Seconds to wait for a free connection
+DB_MMAP_SIZE = 256 * 1024 * 1024   # Bytes of the database file to memory-map
+DB_CACHE_SIZE_KB = 64 * 1024       # Page cache per connection
+
+# Server-side cache of query results, invalidated when the data version changes
+CACHE_ENABLED = True
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # Memory budget per process (LRU eviction beyond it)
+CACHE_DIR = None                     # Directory for an on-disk tier shared by worker processes
+DATA_VERSION_CHECK_SECONDS = 5       # How often the load generation is re-read
+METADATA_TABLE = "Load_Metadata"     # Written by data_loading.py; holds the load generation
+
+# Rendered figures of the static crop-page charts, keyed by chart, crop, year and data version.
+# The disk tier lets warm_figures.py pre-render them after each load for every worker process.
+FIGURE_CACHE_ENABLED = True
+FIGURE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+FIGURE_CACHE_DIR = os.path.join(os.path.dirname(DATABASE_PATH), "figure_cache")
+
+# Callback instrumentation: per-callback latency split into DB / processing / figure time,
+# served in the Prometheus text format on METRICS_ENDPOINT (local requests only by default)
+INSTRUMENTATION_ENABLED = True
+METRICS_ENDPOINT = "/metrics"
+METRICS_ALLOW_REMOTE = False
+PROFILE_SLOW_CALLBACKS = False       # Profile every callback and keep the profiles of slow ones
+PROFILE_THRESHOLD_MS = 500
+PROFILER = "cprofile"                # "cprofile" (.prof, read with pstats/snakeviz) or "pyinstrument" (.html)
+PROFILE_DIR = "profiles"
+
+# Keep crop DataFrames on the server; the browser's crop-data-store only holds a crop/version handle
+SERVER_SIDE_DATA = True
+CROP_STORE_MAX_BYTES = 128 * 1024 * 1024
+ANALYSIS_CACHE_MAX_BYTES = 128 * 1024 * 1024  # Top producers/partners and year cubes shared by a crop page's charts
+
+# Crop catalog behind the sidebar search, built from every FAOSTAT item code list in DATA_DIR.
+# The first file that lists a code names it, so the production dump (whose names the
+# database's Item column holds) comes first.
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data")
+CATALOG_ITEM_CODE_FILES = sorted(
+    glob.glob(os.path.join(DATA_DIR, "*", "*_ItemCodes.csv")),
+    key=lambda path: (not os.path.basename(path).startswith("Value_of_Production"), path)
+)
+CATALOG_PAGE_SIZE = 20
 
 # Application configuration
 APP_TITLE = "Agricultural Data Dashboard"
@@ -12,6 +76,13 @@ APP_HOST = "127.0.0.1"
 APP_PORT = 8050
 DEBUG_MODE = True
 
+# Production server (gunicorn -c gunicorn.conf.py wsgi:application)
+SERVER_WORKERS = max(2, min(os.cpu_count() or 1, 8))
+SERVER_THREADS = 4                   # Threads per worker
+SERVER_TIMEOUT = 60
+SERVER_RELOAD_CHECK_SECONDS = 30     # How often the master looks for a new database generation
+SERVER_PRELOAD_FIGURES = False       # Also render every crop's static charts in the master
+
 # Production table configuration (using Y1961, Y1962, etc. format)
 YEAR_COLUMNS = [f"Y{year}" for year in range(1961, 2024)]
 LATEST_YEAR = 2023
@@ -21,15 +92,34 @@ TOP_N_COUNTRIES = 10
 TRADE_YEAR_COLUMN = "Year"
 TRADE_VALUE_COLUMN = "Value"
 TRADE_ELEMENT_COLUMN = "Element"
-TRADE_REPORTER_COLUMN = "\"Reporter Countries\""
-TRADE_PARTNER_COLUMN = "\"Partner Countries\""
+TRADE_REPORTER_COLUMN = "Reporter Countries"    # Column names; quote them in SQL
+TRADE_PARTNER_COLUMN = "Partner Countries"
 TRADE_ITEM_COLUMN = "Item"
 TRADE_UNIT_COLUMN = "Unit"
+TRADE_FLOW_COLUMN = "Flow"  # 'Import' or 'Export', derived from Element by data_loading.py
+# Trade_By_Reporter pivots the quantity and value elements into columns (1000 USD for
+# Value; tonnes, heads or pieces for Quantity, per data_loading.TRADE_UNIT_SCALE)
+TRADE_QUANTITY_COLUMN = "Quantity"
+TRADE_UNIT_PRICE_COLUMN = "UnitPrice"  # USD per unit of Quantity
+# data_loading.TRADE_MEASURES and TRADE_UNIT_SCALE as written by the loader, for the Parquet backend
+TRADE_MEASURES_TABLE = "Trade_Measures"      # Element -> Measure ('Quantity' or 'Value')
+TRADE_UNIT_SCALE_TABLE = "Trade_Unit_Scale"  # Unit -> factor to the measure's unit
+REPORTER_TRADE_TABLE = "Trade_By_Reporter"  # Trade clustered by (reporter, item, flow), built by data_loading.py
+REPORTERS_TABLE = "Trade_Reporters"         # Reporters listed in the crop page's selector
+DEFAULT_REPORTER = "India"
+
+# Dimension tables built by data_loading.py: Id (the Categorical code), Name and FAO code.
+# Trade_By_Reporter stores their Ids instead of the names.
+AREA_TABLE = "Dim_Area"
+ITEM_TABLE = "Dim_Item"
+ELEMENT_TABLE = "Dim_Element"
+CATEGORICAL_COLUMNS = True   # Return area/item/element/unit columns as pandas Categoricals
 
 # Production table specific configuration
 PRODUCTION_AREA_COLUMN = "Area"
 PRODUCTION_ITEM_COLUMN = "Item"
 PRODUCTION_ELEMENT_COLUMN = "Element"
+PRODUCTION_ELEMENT = "Gross Production Value (current thousand US$)"
 
 # Colors for visualization
 COLORS = {
@@ -54,6 +144,7 @@ CHART_COLORS = [
 MIN_YEAR = 1961
 MAX_YEAR = 2023
 DEFAULT_YEAR_RANGE = [2000, 2023]
+YEAR_PLAY_INTERVAL_MS = 400   # Time per year when the year selector plays through the years
 
 # Trade data filtering
 IMPORT_KEYWORDS = ['Import', 'import']
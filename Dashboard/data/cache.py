@@ -0,0 +1,193 @@
+# data/cache.py
+import functools
+import hashlib
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+import pandas as pd
+import config
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if hasattr(value, 'nbytes'):
+        # NumPy arrays and the year cubes built on them
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+def is_empty(value: Any) -> bool:
+    """Empty results are what DatabaseManager returns on errors, so they are never cached."""
+    if isinstance(value, pd.DataFrame):
+        return value.empty
+    if hasattr(value, 'empty'):
+        return bool(value.empty)
+    if isinstance(value, dict):
+        return all(is_empty(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return len(value) == 0
+    return value is None
+
+class ResultCache:
+    """LRU cache of query results bounded by a memory budget.
+
+    Entries belong to a data version (``version()``, e.g. the database's
+    load generation); when it changes every entry is dropped.
+    With ``disk_dir`` set, entries are also pickled to disk so worker
+    processes share them. Concurrent misses of one key compute it once;
+    the other threads wait for that result. Cached values are shared, so
+    treat them as read-only.
+    """
+
+    def __init__(self, max_bytes: int = config.CACHE_MAX_BYTES, disk_dir: str = config.CACHE_DIR,
+                 version: Callable[[], str] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.version = version
+        self._entries = OrderedDict()  # key -> (value, size), least recently used first
+        self._bytes = 0
+        self._current_version = None
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> lock held by the thread computing it
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def _check_version(self) -> str:
+        version = str(self.version()) if self.version else ""
+        with self._lock:
+            if version != self._current_version:
+                if self._current_version is not None:
+                    self._stats['invalidations'] += 1
+                self._entries.clear()
+                self._bytes = 0
+                self._current_version = version
+                self._prune_disk(version)
+        return version
+
+    def _disk_path(self, version: str, key: str) -> str:
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.disk_dir, hashlib.sha1(version.encode()).hexdigest()[:16], f"{digest}.pkl")
+
+    def _prune_disk(self, version: str):
+        """Remove on-disk entries of other data versions."""
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return
+        keep = hashlib.sha1(version.encode()).hexdigest()[:16]
+        for name in os.listdir(self.disk_dir):
+            if name != keep:
+                shutil.rmtree(os.path.join(self.disk_dir, name), ignore_errors=True)
+
+    def _read_disk(self, version: str, key: str):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(version, key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+    def _write_disk(self, version: str, key: str, value: Any):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(version, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so other processes never read a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing cache entry: {e}")
+
+    def _store(self, key: str, value: Any):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    def _lookup(self, key: str) -> Any:
+        """The in-memory entry for key (counted as a hit), or None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._entries[key][0]
+        return None
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and caching it on a miss."""
+        version = self._check_version()
+        value = self._lookup(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.get(key)
+            # The thread that creates the key lock computes the value and removes the lock
+            created = key_lock is None
+            if created:
+                key_lock = self._key_locks[key] = threading.Lock()
+        with key_lock:
+            try:
+                # Another thread may have computed it while this one waited
+                value = self._lookup(key)
+                if value is not None:
+                    return value
+
+                value = self._read_disk(version, key)
+                if value is not None:
+                    with self._lock:
+                        self._stats['disk_hits'] += 1
+                    self._store(key, value)
+                    return value
+
+                with self._lock:
+                    self._stats['misses'] += 1
+                value = compute()
+                if not is_empty(value):
+                    self._store(key, value)
+                    self._write_disk(version, key, value)
+                return value
+            finally:
+                if created:
+                    with self._lock:
+                        if self._key_locks.get(key) is key_lock:
+                            del self._key_locks[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and current memory use."""
+        with self._lock:
+            return {**self._stats, 'entries': len(self._entries), 'bytes': self._bytes,
+                    'max_bytes': self.max_bytes}
+
+def cached(method: Callable) -> Callable:
+    """Cache a DatabaseManager method in ``self.cache``, keyed by method name and arguments."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.cache is None:
+            return method(self, *args, **kwargs)
+        key = repr((method.__name__, args, sorted(kwargs.items())))
+        return self.cache.get_or_compute(key, lambda: method(self, *args, **kwargs))
+    return wrapper
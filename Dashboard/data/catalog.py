@@ -0,0 +1,173 @@
+# data/catalog.py
+import functools
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import pandas as pd
+import config
+
+class CatalogItem(NamedTuple):
+    code: int
+    cpc_code: str
+    name: str
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of an item name or query ("Meat of sheep; fresh" -> meat, of, sheep, fresh)."""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def slugify(name: str) -> str:
+    return "-".join(tokenize(name))
+
+def item_slug(item: CatalogItem) -> str:
+    """URL slug of a catalog item, e.g. "1012-meat-of-sheep-fresh-or-chilled-indigenous".
+
+    The leading FAO Item Code identifies the item; the words are for readability.
+    """
+    return f"{item.code}-{slugify(item.name)}"
+
+class CropCatalog:
+    """Searchable list of FAOSTAT items, read from the *_ItemCodes.csv files.
+
+    Every prefix of every word of an item name maps to the items containing
+    it, so a typeahead query is one set lookup per query word. Building the
+    catalog does not touch the database.
+    """
+
+    def __init__(self, item_code_files: List[str] = config.CATALOG_ITEM_CODE_FILES):
+        items = {}
+        for path in item_code_files:
+            try:
+                codes = pd.read_csv(path, dtype=str, skipinitialspace=True)
+            except OSError as e:
+                print(f"Error reading item codes from {path}: {e}")
+                continue
+            codes.columns = codes.columns.str.strip()
+            for code, cpc_code, name in codes[['Item Code', 'CPC Code', 'Item']].itertuples(index=False):
+                # The first file that lists a code wins
+                items.setdefault(int(code), CatalogItem(int(code), cpc_code.lstrip("'"), name.strip()))
+
+        self.items: List[CatalogItem] = sorted(items.values(), key=lambda item: item.name.lower())
+        self._by_code: Dict[int, int] = {item.code: i for i, item in enumerate(self.items)}
+        self._prefixes: Dict[str, Set[int]] = defaultdict(set)
+        for i, item in enumerate(self.items):
+            for token in tokenize(item.name):
+                for end in range(1, len(token) + 1):
+                    self._prefixes[token[:end]].add(i)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def matches(self, query: str) -> List[CatalogItem]:
+        """Items whose words start with every word of the query, names starting with the query first.
+
+        A numeric query also matches the item with that FAO Item Code.
+        """
+        tokens = tokenize(query or "")
+        if not tokens:
+            return self.items
+
+        found = set.intersection(*(self._prefixes.get(token, set()) for token in tokens))
+        if query.strip().isdigit() and int(query) in self._by_code:
+            found.add(self._by_code[int(query)])
+
+        query_lower = query.strip().lower()
+        # self.items is sorted by name, so sorting indices keeps results alphabetical
+        ranked = sorted(found, key=lambda i: (not self.items[i].name.lower().startswith(query_lower), i))
+        return [self.items[i] for i in ranked]
+
+    def search(self, query: str, page: int = 1,
+               page_size: int = config.CATALOG_PAGE_SIZE) -> Tuple[List[CatalogItem], int]:
+        """One page of matches for query and the number of pages."""
+        matches = self.matches(query)
+        pages = max(1, -(-len(matches) // page_size))
+        page = min(max(page or 1, 1), pages)
+        return matches[(page - 1) * page_size:page * page_size], pages
+
+class SlugIndex:
+    """Two-way map between crop page slugs and the item names in the database.
+
+    Items listed in the catalog get an Item Code slug (see item_slug);
+    items without a code fall back to their name's words. Resolving a slug
+    is a dictionary lookup. The lowercase-and-hyphen slugs of older URLs
+    ("/crop/rice") keep resolving where they are unambiguous.
+    """
+
+    def __init__(self, catalog: CropCatalog, available: Iterable[str]):
+        codes = {item.name: item for item in catalog.items}
+        self._catalog = catalog
+        self._slugs: Dict[str, str] = {}     # item name -> slug
+        self._items: Dict[str, str] = {}     # slug -> item name
+        self._by_code: Dict[int, str] = {}   # Item Code -> item name
+        self._uncatalogued: List[str] = []   # items in the database the catalog does not list
+        legacy = {}
+        for name in available:
+            item = codes.get(name)
+            slug = item_slug(item) if item else slugify(name)
+            self._slugs[name] = slug
+            self._items[slug] = name
+            if item:
+                self._by_code[item.code] = name
+            else:
+                self._uncatalogued.append(name)
+            legacy[name.lower().replace(' ', '-')] = name
+        for slug, name in legacy.items():
+            self._items.setdefault(slug, name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._slugs
+
+    def slug(self, name: str) -> str:
+        return self._slugs.get(name) or slugify(name)
+
+    def resolve(self, slug: str) -> Optional[str]:
+        """Item name for a slug, or None if no item in the database has it."""
+        name = self._items.get(slug)
+        if name is None:
+            # Item Code slugs still resolve if the item was renamed
+            code = slug.split("-", 1)[0]
+            if code.isdigit():
+                name = self._by_code.get(int(code))
+        return name
+
+    def search(self, query: str, page: int = 1,
+               page_size: int = config.CATALOG_PAGE_SIZE) -> Tuple[List[Tuple[str, str]], int]:
+        """One page of (item name, slug) for the database items matching query, and the number of pages.
+
+        Catalog matches are kept only if the database has them; database items
+        the catalog does not list are matched on their words the same way.
+        """
+        names = [item.name for item in self._catalog.matches(query) if item.name in self]
+        tokens = tokenize(query or "")
+        for name in self._uncatalogued:
+            words = tokenize(name)
+            if all(any(word.startswith(token) for word in words) for token in tokens):
+                names.append(name)
+        query_lower = (query or "").strip().lower()
+        names.sort(key=lambda name: (not name.lower().startswith(query_lower), name.lower()))
+
+        pages = max(1, -(-len(names) // page_size))
+        page = min(max(page or 1, 1), pages)
+        return [(name, self._slugs[name]) for name in names[(page - 1) * page_size:page * page_size]], pages
+
+_slug_index = (None, None)   # (data version, SlugIndex)
+_slug_index_lock = threading.Lock()
+
+def get_slug_index(db_manager) -> SlugIndex:
+    """The slug index for the loaded data, rebuilt once per data version."""
+    global _slug_index
+    version = db_manager.data_version()
+    with _slug_index_lock:
+        if _slug_index[0] == version:
+            return _slug_index[1]
+        crops = db_manager.get_available_crops()
+        index = SlugIndex(get_catalog(), crops)
+        # An empty crop list means the query failed; try again on the next call
+        if crops:
+            _slug_index = (version, index)
+        return index
+
+@functools.lru_cache(maxsize=1)
+def get_catalog() -> CropCatalog:
+    """The process-wide catalog, built on first use."""
+    return CropCatalog()
@@ -0,0 +1,161 @@
+# data/columnar.py
+import os
+from typing import Callable, List, Dict
+from urllib.parse import quote, unquote
+import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+import config
+
+class ParquetStore:
+    """Reads the partitioned Parquet copy of the dashboard tables.
+
+    data_loading.py writes one directory per Item (and one file per reporter
+    for trade tables). Queries open only the partition for the requested crop,
+    read only the requested columns and memory-map the files. Results match
+    what DatabaseManager returns from SQLite. Each load exports to its own
+    ``generation=N`` directory; files are read from the one of the current
+    data version (``version()``, as for ResultCache), or from ``base``
+    itself for an export without generations. Discovered partitions are
+    reused until the version changes.
+    """
+
+    def __init__(self, base: str = config.PARQUET_DIR, version: Callable[[], str] = None):
+        self.base = base
+        self.root = base
+        self.version = version
+        self.filesystem = fs.LocalFileSystem(use_mmap=True)
+        # Discovered partitions and table schemas, reused across queries of one data version
+        self._datasets = {}
+        self._schemas = {}
+        self._current_version = None
+
+    def _check_version(self) -> Dict[str, ds.Dataset]:
+        """The discovered partitions of the current data version."""
+        version = str(self.version()) if self.version else ""
+        if version != self._current_version:
+            generation_dir = os.path.join(self.base, f"generation={version}")
+            self.root = generation_dir if os.path.isdir(generation_dir) else self.base
+            # Replaced rather than cleared, so a query still using the old ones is not affected
+            self._datasets = {}
+            self._schemas = {}
+            self._current_version = version
+        return self._datasets
+
+    def _item_dir(self, table: str, crop: str) -> str:
+        return os.path.join(self.root, table, f"Item={quote(crop, safe='')}")
+
+    def _columns(self, table: str) -> List[str]:
+        """Column names of a table, without the _row ordering column."""
+        schemas = self._schemas
+        if table not in schemas:
+            schema = pq.read_schema(os.path.join(self.root, table, "_common_metadata"))
+            schemas[table] = [name for name in schema.names if name != '_row']
+        return schemas[table]
+
+    def _read(self, table: str, crop: str, columns: List[str] = None, filter=None,
+              part: str = None) -> pd.DataFrame:
+        """Read one crop partition in SQLite row order.
+
+        ``part`` restricts the read to one file of the partition, e.g. one
+        reporter's trade ("Reporter Countries=India").
+        """
+        datasets = self._check_version()
+        columns = columns or self._columns(table)
+        path = self._item_dir(table, crop)
+        if part is not None:
+            path = os.path.join(path, f"{part}.parquet")
+        dataset = datasets.get(path)
+        if dataset is None:
+            if not os.path.exists(path):
+                return pd.DataFrame(columns=columns)
+            dataset = datasets[path] = ds.dataset(path, format="parquet", filesystem=self.filesystem)
+
+        table_data = dataset.to_table(columns=['_row'] + columns, filter=filter, use_threads=False)
+        if table_data.num_rows == 0:
+            return pd.DataFrame(columns=columns)
+
+        table_data = table_data.sort_by('_row').drop_columns(['_row'])
+        return table_data.to_pandas()
+
+    def get_available_crops(self) -> List[str]:
+        self._check_version()
+        table_dir = os.path.join(self.root, config.PRODUCTION_TABLE)
+        crops = [unquote(name.split("=", 1)[1]) for name in os.listdir(table_dir) if name.startswith("Item=")]
+        return sorted(crops)
+
+    def get_production_data(self, crop: str) -> pd.DataFrame:
+        return self._read(config.PRODUCTION_TABLE, crop,
+                          filter=pc.field('Element') == config.PRODUCTION_ELEMENT)
+
+    def get_production_series(self, crop: str, countries: List[str], start_year: int,
+                              end_year: int) -> pd.DataFrame:
+        production = self.get_production_data(crop)
+        production = production[production['Area'].isin(countries)]
+        return self._melt_years(production, start_year, end_year)
+
+    def get_production_history(self, crop: str) -> pd.DataFrame:
+        history = self._melt_years(self.get_production_data(crop), config.MIN_YEAR, config.MAX_YEAR)
+        return history.drop(columns=['Item'])
+
+    @staticmethod
+    def _melt_years(production: pd.DataFrame, start_year: int, end_year: int) -> pd.DataFrame:
+        """Year columns of the wide production table as long Area, Item, Year, Production rows."""
+        year_columns = [f"Y{year}" for year in range(start_year, end_year + 1) if f"Y{year}" in production.columns]
+        series = production.melt(id_vars=['Area', 'Item'], value_vars=year_columns,
+                                 var_name='Year', value_name='Production').dropna(subset=['Production'])
+        series['Year'] = series['Year'].str[1:].astype(int)
+        return series.sort_values(['Area', 'Year'], ignore_index=True)
+
+    def get_trade_data(self, crop: str, trade_type: str = None) -> pd.DataFrame:
+        condition = pc.field('Element').isin(['Import value', 'Export value'])
+        if trade_type:
+            condition = condition & (pc.field(config.TRADE_FLOW_COLUMN) == trade_type)
+        return self._read(config.TRADE_TABLE, crop, filter=condition)
+
+    def get_trade_partners(self, crop: str, reporter: str, measures: Dict[str, str],
+                           unit_scale: Dict[str, float]) -> Dict[str, pd.DataFrame]:
+        """A reporter's import and export partners, read from that reporter's file only.
+
+        Quantity and value elements are pivoted into columns as in the
+        reporter table in SQLite, with the loader's ``measures`` (element ->
+        measure) and ``unit_scale`` (see DatabaseManager.get_trade_units).
+        """
+        keys = [config.TRADE_PARTNER_COLUMN, config.TRADE_YEAR_COLUMN]
+        df = self._read(config.TRADE_TABLE, crop,
+                        keys + [config.TRADE_ELEMENT_COLUMN, config.TRADE_UNIT_COLUMN,
+                                config.TRADE_VALUE_COLUMN, config.TRADE_FLOW_COLUMN],
+                        filter=pc.field(config.TRADE_FLOW_COLUMN).is_valid()
+                        & pc.field(config.TRADE_ELEMENT_COLUMN).isin(list(measures)),
+                        part=f"{config.TRADE_REPORTER_COLUMN}={quote(reporter, safe='')}")
+        scale = df[config.TRADE_UNIT_COLUMN].astype(object).map(unit_scale).fillna(1)
+        df = df.assign(**{
+            'Measure': df[config.TRADE_ELEMENT_COLUMN].map(measures),
+            config.TRADE_VALUE_COLUMN: df[config.TRADE_VALUE_COLUMN] * scale,
+        })
+        partners = {}
+        for key, flow in (('imports', 'Import'), ('exports', 'Export')):
+            # Summed and sorted by key like the reporter table in SQLite
+            flow_df = (df[df[config.TRADE_FLOW_COLUMN] == flow]
+                       .groupby(keys + ['Measure'])[config.TRADE_VALUE_COLUMN].sum(min_count=1)
+                       .unstack('Measure')
+                       .reindex(columns=['Quantity', 'Value'])
+                       .rename(columns={'Quantity': config.TRADE_QUANTITY_COLUMN, 'Value': config.TRADE_VALUE_COLUMN})
+                       .reset_index().rename_axis(columns=None))
+            quantity = flow_df[config.TRADE_QUANTITY_COLUMN]
+            flow_df[config.TRADE_UNIT_PRICE_COLUMN] = (flow_df[config.TRADE_VALUE_COLUMN] * 1000
+                                                       / quantity.where(quantity > 0))
+            flow_df.insert(0, config.TRADE_REPORTER_COLUMN, reporter)
+            partners[key] = flow_df
+        return partners
+
+    def get_reporters(self) -> List[str]:
+        self._check_version()
+        table_dir = os.path.join(self.root, config.TRADE_TABLE)
+        prefix = f"{config.TRADE_REPORTER_COLUMN}="
+        reporters = {unquote(name[len(prefix):-len(".parquet")])
+                     for item_dir in os.listdir(table_dir) if item_dir.startswith("Item=")
+                     for name in os.listdir(os.path.join(table_dir, item_dir)) if name.startswith(prefix)}
+        return sorted(reporters)
@@ -0,0 +1,33 @@
+# data/crop_store.py
+import pandas as pd
+from typing import Dict
+from data.cache import ResultCache
+import config
+
+class CropDataStore:
+    """Process-local store of the DataFrames behind a crop page.
+
+    With config.SERVER_SIDE_DATA the crop-data-store in the browser only
+    holds a handle ({'crop', 'version'}); chart callbacks fetch the
+    production and trade frames from here instead of rebuilding them from
+    JSON records.
+    """
+
+    def __init__(self, db_manager, max_bytes: int = config.CROP_STORE_MAX_BYTES):
+        self.db_manager = db_manager
+        self.cache = ResultCache(max_bytes=max_bytes, disk_dir=None, version=db_manager.data_version)
+
+    def handle(self, crop: str) -> Dict[str, str]:
+        """The small payload stored in the browser for a crop."""
+        return {"crop": crop, "version": self.db_manager.data_version()}
+
+    def get(self, crop: str) -> Dict[str, pd.DataFrame]:
+        """Production, import and export frames for a crop."""
+        def build():
+            trade = self.db_manager.get_trade_partners(crop)
+            return {
+                'production': self.db_manager.get_production_data(crop),
+                'imports': trade['imports'],
+                'exports': trade['exports'],
+            }
+        return self.cache.get_or_compute(repr(('crop_frames', crop)), build)
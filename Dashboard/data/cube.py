@@ -0,0 +1,75 @@
+# data/cube.py
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+class YearCube:
+    """One crop's values as a label × year matrix, NaN where there is no data.
+
+    Labels are the areas of the production table or a reporter's partners.
+    Reading a year is a column slice, and the ranking of every year comes
+    from a single argsort over the matrix.
+    """
+
+    def __init__(self, labels: np.ndarray, years: np.ndarray, values: np.ndarray):
+        self.labels = labels
+        self.years = years
+        self.values = values
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, label_column: str, year_column: str, value_column: str) -> 'YearCube':
+        """Sum the values of long rows per label and year."""
+        if df.empty:
+            return cls(np.array([], dtype=object), np.array([], dtype=np.int16), np.empty((0, 0)))
+        values = df[value_column].to_numpy(dtype=np.float64, na_value=np.nan)
+        present = ~np.isnan(values)
+        label_codes, labels = pd.factorize(df[label_column], sort=True)
+        year_codes, years = pd.factorize(df[year_column], sort=True)
+        cells = (label_codes[present], year_codes[present])
+
+        matrix = np.zeros((len(labels), len(years)))
+        np.add.at(matrix, cells, values[present])
+        seen = np.zeros(matrix.shape, dtype=bool)
+        seen[cells] = True
+        matrix[~seen] = np.nan
+        return cls(np.asarray(labels, dtype=object), np.asarray(years, dtype=np.int16), matrix)
+
+    @property
+    def empty(self) -> bool:
+        return self.values.size == 0
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.years.nbytes + sum(len(label) for label in self.labels))
+
+    def year(self, year: int) -> pd.Series:
+        """Values of one year by label, without the labels that have no data that year."""
+        column = np.searchsorted(self.years, year)
+        if column == len(self.years) or self.years[column] != year:
+            return pd.Series(dtype=float)
+        values = pd.Series(self.values[:, column], index=self.labels)
+        return values.dropna()
+
+    def top_by_year(self, n: int, always: str = None) -> Dict[int, Tuple[List[str], List[float]]]:
+        """The n largest labels of every year that has data, largest first.
+
+        ``always`` (e.g. India) is added in order when it has a value that
+        year but is not among the n largest.
+        """
+        if self.empty:
+            return {}
+        ranked = np.where(np.isnan(self.values), -np.inf, self.values)
+        order = np.argsort(-ranked, axis=0, kind='stable')[:n]
+        extra = np.flatnonzero(self.labels == always)
+        extra = int(extra[0]) if len(extra) else None
+
+        top = {}
+        for column, year in enumerate(self.years):
+            rows = [row for row in order[:, column] if ranked[row, column] > -np.inf]
+            if not rows:
+                continue
+            if extra is not None and extra not in rows and ranked[extra, column] > -np.inf:
+                rows.append(extra)
+                rows.sort(key=lambda row: -ranked[row, column])
+            top[int(year)] = (self.labels[rows].tolist(), self.values[rows, column].tolist())
+        return top
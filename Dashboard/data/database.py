@@ -1,45 +1,268 @@
 # data/database.py
-import sqlite3
+import os
+import time
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Optional
+from data.pool import ConnectionPool
+from data.cache import ResultCache, cached
+from utils.instrumentation import report_error
 import config
 
 class DatabaseManager:
     """Handles all database operations for the agricultural dashboard."""
     
-    def __init__(self, db_path: str = config.DATABASE_PATH):
+    # Every SQL statement the dashboard issues. data/query_plans.py checks
+    # that each one is answered from an index rather than a table scan.
+    QUERIES = {
+        'available_crops': f"SELECT DISTINCT Item FROM {config.PRODUCTION_TABLE}",
+        'production_data': f"""
+            SELECT * FROM {config.PRODUCTION_TABLE}
+            WHERE Item = ? AND Element = ?
+        """,
+        'production_series': f"""
+            SELECT Area, Item, Year, Value AS Production FROM {config.PRODUCTION_LONG_TABLE}
+            WHERE Item = ? AND Element = ? AND Area IN ({{countries}})
+            AND Year BETWEEN ? AND ?
+        """,
+        'production_history': f"""
+            SELECT Area, Year, Value AS Production FROM {config.PRODUCTION_LONG_TABLE}
+            WHERE Item = ? AND Element = ?
+        """,
+        'trade_data': f"""
+            SELECT * FROM {config.TRADE_TABLE}
+            WHERE Item = ? AND Element IN ('Import value', 'Export value')
+        """,
+        'trade_data_by_flow': f"""
+            SELECT * FROM {config.TRADE_TABLE}
+            WHERE Item = ? AND Element IN ('Import value', 'Export value') AND {config.TRADE_FLOW_COLUMN} = ?
+        """,
+        'reporter_trade': f"""
+            SELECT ReporterId, PartnerId, Year, Quantity, Value, UnitPrice, Flow
+            FROM {config.REPORTER_TRADE_TABLE}
+            WHERE ReporterId = ? AND ItemId = ?
+        """,
+        'reporters': f"SELECT Reporter FROM {config.REPORTERS_TABLE} ORDER BY Reporter",
+        'trade_measures': f"SELECT Element, Measure FROM {config.TRADE_MEASURES_TABLE}",
+        'trade_unit_scale': f"SELECT Unit, Scale FROM {config.TRADE_UNIT_SCALE_TABLE}",
+        'areas': f"SELECT Id, Name FROM {config.AREA_TABLE}",
+        'items': f"SELECT Id, Name FROM {config.ITEM_TABLE}",
+        'elements': f"SELECT Id, Name FROM {config.ELEMENT_TABLE}",
+        'top_producers': f"""
+            SELECT Area, Value FROM {config.TOP_PRODUCERS_TABLE}
+            WHERE Item = ? AND Element = ? AND Year = ?
+            ORDER BY Rank
+        """,
+        'crop_summary': f"""
+            SELECT GlobalProduction, FocusProduction, FocusRank, GrowthRate
+            FROM {config.CROP_SUMMARY_TABLE}
+            WHERE Item = ? AND Element = ? AND Year = ?
+        """,
+        'trade_edges': f"""
+            SELECT Year, Exporter, Importer, Value FROM {config.TRADE_EDGES_TABLE}
+            WHERE Item = ? AND Rank <= ?
+        """,
+        'region_edges': f"""
+            SELECT Year, Exporter, Importer, Value FROM {config.REGION_EDGES_TABLE}
+            WHERE Item = ?
+        """,
+        'area_geo': f"SELECT Name, Region, Latitude, Longitude FROM {config.AREA_GEO_TABLE}",
+        # Ratio: importers' over exporters' reports, of the pairs both reported
+        'trade_mirror': f"""
+            SELECT 'Export' AS Flow, Year, SUM(Exported) AS Reported, SUM(Imported) AS Mirror,
+                   SUM(Reconciled) AS Reconciled,
+                   SUM(CASE WHEN Exported IS NOT NULL THEN Imported END)
+                   / SUM(CASE WHEN Imported IS NOT NULL THEN Exported END) AS Ratio
+            FROM {config.MIRROR_TABLE}
+            WHERE Item = ? AND Measure = 'Value' AND Exporter = ?
+            GROUP BY Year
+            UNION ALL
+            SELECT 'Import', Year, SUM(Imported), SUM(Exported), SUM(Reconciled),
+                   SUM(CASE WHEN Exported IS NOT NULL THEN Imported END)
+                   / SUM(CASE WHEN Imported IS NOT NULL THEN Exported END)
+            FROM {config.MIRROR_TABLE}
+            WHERE Item = ? AND Measure = 'Value' AND Importer = ?
+            GROUP BY Year
+            ORDER BY Flow, Year
+        """,
+        'top_trade_partners': f"""
+            SELECT Partner AS "{config.TRADE_PARTNER_COLUMN}", Year, Value
+            FROM {config.TOP_PARTNERS_TABLE}
+            WHERE Item = ? AND Reporter = ? AND Flow = ? AND Year = (
+                SELECT MAX(Year) FROM {config.TOP_PARTNERS_TABLE}
+                WHERE Item = ? AND Reporter = ? AND Flow = ?
+            )
+            ORDER BY Rank
+        """,
+    }
+    
+    # Name columns returned as Categoricals, and the dimension query whose names
+    # become their categories (None: the categories found in the frame)
+    CATEGORY_DIMENSIONS = {
+        'Area': 'areas',
+        config.TRADE_REPORTER_COLUMN: 'areas',
+        config.TRADE_PARTNER_COLUMN: 'areas',
+        'Item': 'items',
+        'Element': 'elements',
+        'Unit': None,
+    }
+    
+    def __init__(self, db_path: str = config.DATABASE_PATH, backend: str = config.STORAGE_BACKEND,
+                 parquet_dir: str = config.PARQUET_DIR):
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
+        self.cache = ResultCache(version=self.data_version) if config.CACHE_ENABLED else None
+        self._version = None
+        self._version_checked_at = 0.0
+        self.columnar = None
+        if backend == "parquet":
+            # Imported lazily so pyarrow is only required for the columnar backend
+            from data.columnar import ParquetStore
+            self.columnar = ParquetStore(parquet_dir, version=self.data_version)
     
     def get_connection(self):
-        """Create database connection."""
-        return sqlite3.connect(self.db_path)
+        """Check out a pooled read-only connection (use as a context manager)."""
+        return self.pool.connection()
+    
+    def data_version(self) -> str:
+        """Identify the loaded data by its load generation.
+        
+        data_loading.py advances the generation on every full and incremental
+        load, so the version is the same in every process reading the same
+        data. A database without one is identified by its main file's mtime,
+        read once the connection is open: a read-only connection on a WAL
+        database creates the -wal file, so its mtime says nothing about the data.
+        Re-read at most every DATA_VERSION_CHECK_SECONDS.
+        """
+        now = time.monotonic()
+        if self._version is not None and now - self._version_checked_at < config.DATA_VERSION_CHECK_SECONDS:
+            return self._version
+        
+        version = "0-0"
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute(
+                    f"SELECT value FROM {config.METADATA_TABLE} WHERE key = 'generation'"
+                ).fetchone()
+                if row:
+                    version = str(int(row[0]))
+        except Exception:
+            row = None
+        if not row and os.path.exists(self.db_path):
+            version = f"0-{os.stat(self.db_path).st_mtime_ns}"
+        
+        self._version = version
+        self._version_checked_at = now
+        return self._version
+    
+    @cached
+    def get_categories(self, dimension: str) -> Optional[pd.CategoricalDtype]:
+        """Names of a dimension table ('areas', 'items' or 'elements') as a CategoricalDtype.
+        
+        The Ids are 0..n-1, so the Id of a name is its Categorical code.
+        """
+        try:
+            with self.get_connection() as conn:
+                rows = conn.execute(self.QUERIES[dimension]).fetchall()
+            names = [None] * len(rows)
+            for id_, name in rows:
+                names[id_] = name
+            return pd.CategoricalDtype(names)
+        except Exception as e:
+            report_error(f"Error getting {dimension}", e)
+            return None
+    
+    def to_categorical(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Convert the name columns of a result frame to Categoricals (see CATEGORY_DIMENSIONS).
+        
+        Columns share their dimension's categories, so frames of different
+        crops concatenate and compare without converting back to strings.
+        """
+        if not config.CATEGORICAL_COLUMNS:
+            return df
+        for column, dimension in self.CATEGORY_DIMENSIONS.items():
+            if column not in df.columns or df[column].dtype != object:
+                continue
+            dtype = self.get_categories(dimension) if dimension else None
+            values = df[column].astype(dtype) if dtype is not None else None
+            # A name missing from the dimension would silently become NaN
+            if values is None or values.isna().sum() != df[column].isna().sum():
+                values = df[column].astype('category')
+            df[column] = values
+        return df
+    
+    def decode(self, codes: pd.Series, dimension: str) -> pd.Series:
+        """Names for the dimension Ids in codes, as a Categorical (or strings with CATEGORICAL_COLUMNS off)."""
+        values = pd.Series(pd.Categorical.from_codes(codes, dtype=self.get_categories(dimension)))
+        return values if config.CATEGORICAL_COLUMNS else values.astype(object)
     
+    def dimension_id(self, dimension: str, name: str) -> Optional[int]:
+        """Id of a name in a dimension table, or None if it is not there."""
+        dtype = self.get_categories(dimension)
+        if dtype is None or name not in dtype.categories:
+            return None
+        return int(dtype.categories.get_loc(name))
+    
+    @cached
     def get_available_crops(self) -> List[str]:
         """Get list of all available crops from the database."""
         try:
+            if self.columnar:
+                return self.columnar.get_available_crops()
             with self.get_connection() as conn:
-                # Assuming there's a 'Crop' or 'Item' column
-                query = f"SELECT DISTINCT Item FROM {config.PRODUCTION_TABLE}"
-                crops = pd.read_sql_query(query, conn)['Item'].tolist()
+                crops = pd.read_sql_query(self.QUERIES['available_crops'], conn)['Item'].tolist()
                 return sorted(crops)
         except Exception as e:
-            print(f"Error getting crops: {e}")
+            report_error("Error getting crops", e)
             return []
     
+    @cached
     def get_production_data(self, crop: str) -> pd.DataFrame:
         """Get production data for a specific crop."""
         try:
+            if self.columnar:
+                return self.to_categorical(self.columnar.get_production_data(crop))
+            with self.get_connection() as conn:
+                df = pd.read_sql_query(self.QUERIES['production_data'], conn,
+                                       params=[crop, config.PRODUCTION_ELEMENT])
+                return self.to_categorical(df)
+        except Exception as e:
+            report_error("Error getting production data", e)
+            return pd.DataFrame()
+    
+    @cached
+    def get_production_series(self, crop: str, countries: List[str], start_year: int = config.MIN_YEAR,
+                              end_year: int = config.MAX_YEAR) -> pd.DataFrame:
+        """Get year-wise production of a crop for some countries within a year range.
+        
+        Reads the long production table, so only the requested
+        country/year rows are touched. Columns: Area, Item, Year, Production.
+        """
+        try:
+            if self.columnar:
+                return self.to_categorical(self.columnar.get_production_series(crop, countries, start_year, end_year))
+            with self.get_connection() as conn:
+                query = self.QUERIES['production_series'].format(countries=", ".join("?" * len(countries)))
+                params = [crop, config.PRODUCTION_ELEMENT, *countries, start_year, end_year]
+                return self.to_categorical(pd.read_sql_query(query, conn, params=params))
+        except Exception as e:
+            report_error("Error getting production series", e)
+            return pd.DataFrame()
+    
+    @cached
+    def get_production_history(self, crop: str) -> pd.DataFrame:
+        """Get every country's production of a crop in every year, as columns Area, Year, Production."""
+        try:
+            if self.columnar:
+                return self.to_categorical(self.columnar.get_production_history(crop))
             with self.get_connection() as conn:
-                query = f"""
-                SELECT * FROM {config.PRODUCTION_TABLE} 
-                WHERE Item = ? AND Element = 'Gross Production Value (current thousand US$)'
-                """
-                df = pd.read_sql_query(query, conn, params=[crop])
-                return df
+                df = pd.read_sql_query(self.QUERIES['production_history'], conn,
+                                       params=[crop, config.PRODUCTION_ELEMENT])
+                return self.to_categorical(df)
         except Exception as e:
-            print(f"Error getting production data: {e}")
+            report_error("Error getting production history", e)
             return pd.DataFrame()
     
+    @cached
     def get_trade_data(self, crop: str, trade_type: str = None) -> pd.DataFrame:
         """Get trade data for a specific crop.
         
@@ -48,49 +271,158 @@ class DatabaseManager:
             trade_type: 'Import' or 'Export' or None for both
         """
         try:
+            if self.columnar:
+                return self.to_categorical(self.columnar.get_trade_data(crop, trade_type))
             with self.get_connection() as conn:
                 if trade_type:
-                    query = f"""
-                    SELECT * FROM {config.TRADE_TABLE} 
-                    WHERE Item = ? AND Element = ?
-                    """
-                    df = pd.read_sql_query(query, conn, params=[crop, trade_type])
+                    df = pd.read_sql_query(self.QUERIES['trade_data_by_flow'], conn, params=[crop, trade_type])
                 else:
-                    query = f"""
-                    SELECT * FROM {config.TRADE_TABLE} 
-                    WHERE Item = ? AND Element IN ('Import value', 'Export value')
-                    """
-                    df = pd.read_sql_query(query, conn, params=[crop])
-                return df
+                    df = pd.read_sql_query(self.QUERIES['trade_data'], conn, params=[crop])
+                return self.to_categorical(df)
         except Exception as e:
-            print(f"Error getting trade data: {e}")
+            report_error("Error getting trade data", e)
             return pd.DataFrame()
     
+    @cached
+    def get_trade_partners(self, crop: str, reporter: str = config.DEFAULT_REPORTER) -> Dict[str, pd.DataFrame]:
+        """Get a reporter's import and export partners for a specific crop.
+
+        Both flows come from one range read of the reporter-clustered trade
+        table, so the cost depends on the reporter's own rows only. The table
+        holds dimension Ids, which become the codes of the returned Categoricals.
+        Each partner and year is one row of Quantity, Value and UnitPrice.
+        """
+        try:
+            if self.columnar:
+                partners = self.columnar.get_trade_partners(crop, reporter, **self.get_trade_units())
+                return {key: self.to_categorical(df) for key, df in partners.items()}
+            reporter_id, item_id = self.dimension_id('areas', reporter), self.dimension_id('items', crop)
+            if reporter_id is None or item_id is None:
+                return {'imports': pd.DataFrame(), 'exports': pd.DataFrame()}
+            with self.get_connection() as conn:
+                rows = pd.read_sql_query(self.QUERIES['reporter_trade'], conn, params=[reporter_id, item_id])
+            df = pd.DataFrame({
+                config.TRADE_REPORTER_COLUMN: self.decode(rows['ReporterId'], 'areas'),
+                config.TRADE_PARTNER_COLUMN: self.decode(rows['PartnerId'], 'areas'),
+                config.TRADE_YEAR_COLUMN: rows['Year'],
+                config.TRADE_QUANTITY_COLUMN: rows['Quantity'],
+                config.TRADE_VALUE_COLUMN: rows['Value'],
+                config.TRADE_UNIT_PRICE_COLUMN: rows['UnitPrice'],
+            })
+            flow = rows[config.TRADE_FLOW_COLUMN]
+            return {
+                'imports': df[flow == 'Import'].reset_index(drop=True),
+                'exports': df[flow == 'Export'].reset_index(drop=True),
+            }
+        except Exception as e:
+            report_error("Error getting trade partners", e)
+            return {'imports': pd.DataFrame(), 'exports': pd.DataFrame()}
+
+    @cached
+    def get_trade_units(self) -> Dict[str, Dict]:
+        """The loader's trade measures (element -> measure) and unit factors (unit -> scale)."""
+        with self.get_connection() as conn:
+            return {
+                'measures': dict(conn.execute(self.QUERIES['trade_measures']).fetchall()),
+                'unit_scale': dict(conn.execute(self.QUERIES['trade_unit_scale']).fetchall()),
+            }
+
     def get_india_trade_partners(self, crop: str) -> Dict[str, pd.DataFrame]:
         """Get India's trade partners for a specific crop."""
+        return self.get_trade_partners(crop, 'India')
+
+    @cached
+    def get_reporters(self) -> List[str]:
+        """Get the countries that report trade, for the reporter selector."""
+        try:
+            if self.columnar:
+                return self.columnar.get_reporters()
+            with self.get_connection() as conn:
+                return [row[0] for row in conn.execute(self.QUERIES['reporters'])]
+        except Exception as e:
+            report_error("Error getting reporters", e)
+            return []
+    
+    @cached
+    def get_top_producers(self, crop: str, year: int = config.LATEST_YEAR) -> pd.DataFrame:
+        """Get the precomputed top producers of a crop as columns Area and Y{year}."""
+        try:
+            with self.get_connection() as conn:
+                df = pd.read_sql_query(self.QUERIES['top_producers'], conn,
+                                       params=[crop, config.PRODUCTION_ELEMENT, year])
+                return df.rename(columns={'Value': f"Y{year}"})
+        except Exception as e:
+            report_error("Error getting top producers", e)
+            return pd.DataFrame()
+    
+    @cached
+    def get_crop_summary(self, crop: str, year: int = config.LATEST_YEAR) -> Dict[str, float]:
+        """Get the precomputed global production, India's production and rank, and 10-year CAGR."""
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute(self.QUERIES['crop_summary'],
+                                   [crop, config.PRODUCTION_ELEMENT, year]).fetchone()
+            if row is None:
+                return {}
+            keys = ['global_production', 'india_production', 'india_rank', 'growth_rate']
+            return {key: value for key, value in zip(keys, row) if value is not None}
+        except Exception as e:
+            report_error("Error getting crop summary", e)
+            return {}
+    
+    @cached
+    def get_top_trade_partners(self, crop: str, reporter: str = config.DEFAULT_REPORTER) -> Dict[str, pd.DataFrame]:
+        """Get a reporter's precomputed top import and export partners in the latest year."""
+        try:
+            with self.get_connection() as conn:
+                return {
+                    key: pd.read_sql_query(self.QUERIES['top_trade_partners'], conn,
+                                           params=[crop, reporter, flow] * 2)
+                    for key, flow in (('imports', 'Import'), ('exports', 'Export'))
+                }
+        except Exception as e:
+            report_error("Error getting top trade partners", e)
+            return {'imports': pd.DataFrame(), 'exports': pd.DataFrame()}
+    
+    @cached
+    def get_trade_edges(self, crop: str, level: str = "countries", limit: int = None) -> pd.DataFrame:
+        """Get the precomputed exporter -> importer trade flows of a crop in every year.
+        
+        level is "countries" (the largest flows, at most limit per year) or
+        "regions" (all flows summed by the regions of both areas).
+        Columns: Year, Exporter, Importer, Value.
+        """
+        try:
+            with self.get_connection() as conn:
+                if level == "regions":
+                    return pd.read_sql_query(self.QUERIES['region_edges'], conn, params=[crop])
+                return pd.read_sql_query(self.QUERIES['trade_edges'], conn,
+                                         params=[crop, limit or config.FLOW_MAP_MAX_ARCS])
+        except Exception as e:
+            report_error("Error getting trade edges", e)
+            return pd.DataFrame()
+    
+    @cached
+    def get_area_geo(self) -> pd.DataFrame:
+        """Get the centroid (Latitude, Longitude) and Region of every located area, by Name."""
         try:
             with self.get_connection() as conn:
-                # Import partners (countries India imports from)
-                import_query = f"""
-                SELECT {config.TRADE_REPORTER_COLUMN}, {config.TRADE_PARTNER_COLUMN}, 
-                       {config.TRADE_ELEMENT_COLUMN}, {config.TRADE_YEAR_COLUMN}, {config.TRADE_VALUE_COLUMN}
-                FROM {config.TRADE_TABLE} 
-                WHERE {config.TRADE_ITEM_COLUMN} = ? AND {config.TRADE_REPORTER_COLUMN} = 'India' 
-                AND {config.TRADE_ELEMENT_COLUMN} LIKE '%Import%'
-                """
-                imports = pd.read_sql_query(import_query, conn, params=[crop])
-                
-                # Export partners (countries India exports to)
-                export_query = f"""
-                SELECT {config.TRADE_REPORTER_COLUMN}, {config.TRADE_PARTNER_COLUMN}, 
-                       {config.TRADE_ELEMENT_COLUMN}, {config.TRADE_YEAR_COLUMN}, {config.TRADE_VALUE_COLUMN}
-                FROM {config.TRADE_TABLE} 
-                WHERE {config.TRADE_ITEM_COLUMN} = ? AND {config.TRADE_REPORTER_COLUMN} = 'India' 
-                AND {config.TRADE_ELEMENT_COLUMN} LIKE '%Export%'
-                """
-                exports = pd.read_sql_query(export_query, conn, params=[crop])
-                
-                return {'imports': imports, 'exports': exports}
+                return pd.read_sql_query(self.QUERIES['area_geo'], conn)
         except Exception as e:
-            print(f"Error getting India trade data: {e}")
-            return {'imports': pd.DataFrame(), 'exports': pd.DataFrame()}
\ No newline at end of file
+            report_error("Error getting area centroids", e)
+            return pd.DataFrame()
+    
+    @cached
+    def get_trade_mirror(self, crop: str, reporter: str = config.DEFAULT_REPORTER) -> pd.DataFrame:
+        """Get a reporter's yearly trade value of a crop as it reported it and as its partners did.
+        
+        One row per Flow ('Export', 'Import') and Year: Reported (the
+        reporter's own figures), Mirror (its partners' figures for the same
+        flows), Reconciled and Ratio (importers' / exporters' reports).
+        """
+        try:
+            with self.get_connection() as conn:
+                return pd.read_sql_query(self.QUERIES['trade_mirror'], conn, params=[crop, reporter] * 2)
+        except Exception as e:
+            report_error("Error getting mirror trade", e)
+            return pd.DataFrame()
@@ -0,0 +1,111 @@
+# data/pool.py
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+from urllib.parse import quote
+import config
+
+class ConnectionPool:
+    """Thread-safe pool of read-only SQLite connections.
+
+    Connections are opened lazily with ``mode=ro`` and the read pragmas from
+    config, up to ``size`` of them. Released connections go back on a LIFO
+    stack, so a thread that queries repeatedly keeps getting the same warm
+    connection, and nested checkouts in one thread reuse the connection the
+    thread already holds. When all connections are busy, waiting threads are
+    served in arrival order. The database itself is switched to WAL by
+    data_loading.py, so readers never block on a running load.
+    """
+
+    def __init__(self, db_path: str, size: int = config.DB_POOL_SIZE,
+                 timeout: float = config.DB_POOL_TIMEOUT):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._idle = []                  # stack of released connections
+        self._waiters = deque()          # threads waiting for a connection, first come first served
+        self._open = 0
+        self._metrics = {'checkouts': 0, 'waits': 0, 'wait_seconds': 0.0}
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute(f"PRAGMA mmap_size = {config.DB_MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = -{config.DB_CACHE_SIZE_KB}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            self._metrics['checkouts'] += 1
+            if self._idle:
+                return self._idle.pop()
+            if self._open < self.size:
+                # Reserve the slot before connecting so concurrent threads cannot overshoot size
+                self._open += 1
+                waiter = None
+            else:
+                waiter = {'ready': threading.Event(), 'conn': None}
+                self._waiters.append(waiter)
+                self._metrics['waits'] += 1
+
+        if waiter is None:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._open -= 1
+                raise
+
+        start = time.perf_counter()
+        waiter['ready'].wait(self.timeout)
+        with self._lock:
+            self._metrics['wait_seconds'] += time.perf_counter() - start
+            if waiter['conn'] is None:
+                self._waiters.remove(waiter)
+                raise TimeoutError(f"No database connection available after {self.timeout}s")
+        return waiter['conn']
+
+    def _release(self, conn: sqlite3.Connection):
+        with self._lock:
+            if self._waiters:
+                # Hand the connection straight to the longest waiting thread
+                waiter = self._waiters.popleft()
+                waiter['conn'] = conn
+                waiter['ready'].set()
+            else:
+                self._idle.append(conn)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a ``with`` block."""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            yield held
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    def metrics(self) -> Dict[str, float]:
+        """Checkouts, waits for a free connection, and open connections so far."""
+        with self._lock:
+            return {**self._metrics, 'open_connections': self._open}
+
+    def close_all(self):
+        """Close idle connections, e.g. after the database file was replaced."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            conn.close()
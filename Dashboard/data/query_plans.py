@@ -0,0 +1,59 @@
+# data/query_plans.py
+"""Verify that every DatabaseManager query is answered from an index.
+
+    python -m data.query_plans [path/to/database.db]
+
+Runs EXPLAIN QUERY PLAN on each statement in DatabaseManager.QUERIES and
+exits with status 1 if any of them has a SCAN step, with or without a
+covering index, unless the query is listed in WHOLE_TABLE_QUERIES.
+"""
+import sqlite3
+import sys
+from typing import Dict, List
+from data.database import DatabaseManager
+import config
+
+def explain(conn: sqlite3.Connection, query: str) -> List[str]:
+    """Return the EXPLAIN QUERY PLAN detail lines for a query."""
+    # Placeholders only need the right arity for the planner
+    query = query.format(countries="?, ?")
+    params = [None] * query.count("?")
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+# Queries that read a whole table or index on purpose, each once per data version
+WHOLE_TABLE_QUERIES = {
+    'area_geo',         # one row per area, read whole for the maps
+    'available_crops',  # the distinct items, from the Item prefix of the covering index
+    'reporters',        # one row per reporter, the whole list is the result
+    'trade_measures',   # the loader's few trade elements and unit factors
+    'trade_unit_scale',
+    'areas',            # dimension tables are read whole to build the categories
+    'items',
+    'elements',
+}
+
+def is_full_scan(detail: str) -> bool:
+    """A SCAN step visits every row of a table or index, covering or not."""
+    return detail.startswith("SCAN")
+
+def check_query_plans(db_path: str = config.DATABASE_PATH) -> Dict[str, List[str]]:
+    """Return the plan of every query that scans a whole table."""
+    failures = {}
+    with sqlite3.connect(db_path) as conn:
+        for name, query in DatabaseManager.QUERIES.items():
+            plan = explain(conn, query)
+            if name not in WHOLE_TABLE_QUERIES and any(is_full_scan(detail) for detail in plan):
+                failures[name] = plan
+    return failures
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else config.DATABASE_PATH
+    failures = check_query_plans(db_path)
+    for name in DatabaseManager.QUERIES:
+        print(f"{'FULL SCAN' if name in failures else 'ok':<10}{name}")
+        for detail in failures.get(name, []):
+            print(f"          {detail}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
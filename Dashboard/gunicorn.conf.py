@@ -0,0 +1,41 @@
+# gunicorn.conf.py
+"""gunicorn settings for the dashboard: ``gunicorn -c gunicorn.conf.py wsgi:application``.
+
+The app is imported (and its data preloaded) once in the master; workers
+are forked from it. A thread in the master checks for a new database
+generation every SERVER_RELOAD_CHECK_SECONDS, preloads the new data and
+sends itself SIGHUP, which replaces the workers gracefully.
+"""
+import os
+import signal
+import threading
+import time
+# gunicorn reads every module-level name here as a setting, and 'config' is one of them
+import config as dashboard_config
+
+bind = f"{dashboard_config.APP_HOST}:{dashboard_config.APP_PORT}"
+workers = dashboard_config.SERVER_WORKERS
+threads = dashboard_config.SERVER_THREADS
+worker_class = "gthread"
+timeout = dashboard_config.SERVER_TIMEOUT
+graceful_timeout = dashboard_config.SERVER_TIMEOUT
+preload_app = True
+
+def when_ready(server):
+    import wsgi
+
+    def watch_generation():
+        while True:
+            time.sleep(dashboard_config.SERVER_RELOAD_CHECK_SECONDS)
+            try:
+                if wsgi.current_version() == wsgi.loaded_version:
+                    continue
+                server.log.info("New data version found, preloading and reloading workers")
+                wsgi.preload()
+                os.kill(os.getpid(), signal.SIGHUP)
+            except Exception as e:
+                server.log.error(f"Error reloading data: {e}")
+
+    # wsgi.preload_lock is held across each fork of a worker, so a worker never
+    # starts in the middle of a preload or version check
+    threading.Thread(target=watch_generation, name="generation-watcher", daemon=True).start()
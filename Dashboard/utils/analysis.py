@@ -0,0 +1,93 @@
+# utils/analysis.py
+import pandas as pd
+from typing import Dict, List, Tuple
+from data.cache import ResultCache
+from data.cube import YearCube
+from utils.data_processing import DataProcessor
+from utils.geo import locate, region_centroids
+import config
+
+class CropAnalysis:
+    """Aggregations behind the chart callbacks of a crop page, computed once per crop.
+
+    The trend chart plots the top producers with India added. The top
+    producers chart, the world map and the trade breakdown are drawn from
+    area × year and partner × year cubes of the crop, which rank every
+    year in one pass; the year selector shows one year of them in the
+    browser, including the latest. Each aggregation is memoized by crop
+    (and reporter) and data version, so opening a page runs it once
+    whichever callback asks first.
+    """
+
+    def __init__(self, db_manager, crop_store, max_bytes: int = config.ANALYSIS_CACHE_MAX_BYTES):
+        self.db_manager = db_manager
+        self.crop_store = crop_store
+        self.cache = ResultCache(max_bytes=max_bytes, disk_dir=None, version=db_manager.data_version)
+
+    def frames(self, stored_data: dict) -> Dict[str, pd.DataFrame]:
+        """Production, import and export frames for the crop in crop-data-store."""
+        if config.SERVER_SIDE_DATA:
+            return self.crop_store.get(stored_data["crop"])
+        return {
+            'production': pd.DataFrame(stored_data.get("production_data", [])),
+            'imports': pd.DataFrame(stored_data.get("trade_imports", [])),
+            'exports': pd.DataFrame(stored_data.get("trade_exports", [])),
+        }
+
+    def top_producers(self, stored_data: dict) -> pd.DataFrame:
+        """Top producers of the stored crop (columns Area and Y{LATEST_YEAR}), with India added."""
+        crop = stored_data["crop"]
+
+        def build():
+            if config.USE_PRECOMPUTED_AGGREGATES:
+                top = self.db_manager.get_top_producers(crop)
+                return DataProcessor.add_india_from_summary(top, self.db_manager.get_crop_summary(crop))
+
+            production = self.frames(stored_data)['production']
+            if production.empty:
+                return pd.DataFrame()
+            top = DataProcessor.get_top_producers(production, config.TOP_N_COUNTRIES)
+            return DataProcessor.add_india_to_top_producers(top, production)
+
+        return self.cache.get_or_compute(repr(('top_producers', crop)), build)
+
+    def production_cube(self, crop: str) -> YearCube:
+        """Every country's production of crop as an area × year cube."""
+        return self.cache.get_or_compute(repr(('production_cube', crop)), lambda: YearCube.from_frame(
+            self.db_manager.get_production_history(crop), 'Area', 'Year', 'Production'
+        ))
+
+    def trade_cubes(self, crop: str, reporter: str = config.DEFAULT_REPORTER) -> Dict[str, YearCube]:
+        """A reporter's imports and exports of crop, by trade value, as partner × year cubes."""
+        def build():
+            trade = self.db_manager.get_trade_partners(crop, reporter)
+            return {key: YearCube.from_frame(trade[key], config.TRADE_PARTNER_COLUMN,
+                                             config.TRADE_YEAR_COLUMN, config.TRADE_VALUE_COLUMN)
+                    for key in ('imports', 'exports')}
+
+        return self.cache.get_or_compute(repr(('trade_cubes', crop, reporter)), build)
+
+    def producers_by_year(self, crop: str) -> Dict[int, Tuple[List[str], List[float]]]:
+        """Top producers of crop (with India added) in every year: year -> (areas, values)."""
+        return self.production_cube(crop).top_by_year(config.TOP_N_COUNTRIES, always='India')
+
+    def partners_by_year(self, crop: str, reporter: str = config.DEFAULT_REPORTER) -> Dict[str, dict]:
+        """A reporter's top import and export partners of crop in every year: year -> (partners, values)."""
+        return {key: cube.top_by_year(config.TOP_N_COUNTRIES) for key, cube in self.trade_cubes(crop, reporter).items()}
+
+    def trade_flows(self, crop: str, level: str = "countries") -> pd.DataFrame:
+        """Drawable exporter -> importer flows of crop, at most FLOW_MAP_MAX_ARCS per year, largest first.
+
+        level is "countries" or "regions" (see DatabaseManager.get_trade_edges).
+        Columns: Year, Exporter, Importer, Value and the centroids of both ends.
+        """
+        def build():
+            area_geo = self.db_manager.get_area_geo()
+            edges = self.db_manager.get_trade_edges(crop, level)
+            if edges.empty or area_geo.empty:
+                return pd.DataFrame()
+            flows = locate(edges, region_centroids(area_geo) if level == "regions" else area_geo)
+            flows = flows.sort_values(['Year', 'Value'], ascending=[True, False], kind='stable')
+            return flows.groupby('Year').head(config.FLOW_MAP_MAX_ARCS).reset_index(drop=True)
+
+        return self.cache.get_or_compute(repr(('trade_flows', crop, level)), build)
@@ -26,6 +26,9 @@ CHART_COLORS = [
     '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf'
 ]
 
+# Arcs of the trade flow map: (minimum share of the year's largest flow, line width)
+FLOW_LINE_WIDTHS = [(0.0, 1), (0.1, 2), (0.25, 3.5), (0.5, 6)]
+
 # Layout constants
 SIDEBAR_STYLE = {
     "position": "fixed",
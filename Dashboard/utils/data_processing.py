@@ -72,21 +72,19 @@ class DataProcessor:
             year = config.LATEST_YEAR
         
         # Filter data for the specified year
-        year_data = df[df[config.TRADE_YEAR_COLUMN] == year].copy()
+        year_data = df[df[config.TRADE_YEAR_COLUMN] == year]
         
         if year_data.empty:
             # If no data for specified year, get the latest available year
             latest_year = df[config.TRADE_YEAR_COLUMN].max()
-            year_data = df[df[config.TRADE_YEAR_COLUMN] == latest_year].copy()
+            year_data = df[df[config.TRADE_YEAR_COLUMN] == latest_year]
         
         if year_data.empty:
             return pd.DataFrame()
         
-        # Group by partner and sum values for different elements (quantity and value)
-        trade_summary = year_data.groupby([config.TRADE_PARTNER_COLUMN, config.TRADE_ELEMENT_COLUMN])[config.TRADE_VALUE_COLUMN].sum().reset_index()
-        
-        # Get top partners by total trade value
-        partner_totals = trade_summary.groupby(config.TRADE_PARTNER_COLUMN)[config.TRADE_VALUE_COLUMN].sum().reset_index()
+        # Sum each partner's trade value (quantities are a column of their own) in one pass;
+        # with Categorical partners the groups are found from the integer codes
+        partner_totals = year_data.groupby(config.TRADE_PARTNER_COLUMN, observed=True)[config.TRADE_VALUE_COLUMN].sum().reset_index()
         top_partners = partner_totals.sort_values(config.TRADE_VALUE_COLUMN, ascending=False).head(n)
         
         return top_partners
@@ -158,4 +156,19 @@ class DataProcessor:
                 combined = pd.concat([top_producers, india_row], ignore_index=True)
                 return combined.sort_values(year_col, ascending=False)
         
-        return top_producers
\ No newline at end of file
+        return top_producers
+    
+    @staticmethod
+    def add_india_from_summary(top_producers: pd.DataFrame, summary: Dict[str, float], year: int = None) -> pd.DataFrame:
+        """Ensure India is included in a precomputed top producers list, using its value from the crop summary."""
+        if year is None:
+            year = config.LATEST_YEAR
+        
+        year_col = f"Y{year}"
+        
+        if top_producers.empty or 'India' in top_producers['Area'].values or 'india_production' not in summary:
+            return top_producers
+        
+        india_row = pd.DataFrame({'Area': ['India'], year_col: [summary['india_production']]})
+        combined = pd.concat([top_producers, india_row], ignore_index=True)
+        return combined.sort_values(year_col, ascending=False)
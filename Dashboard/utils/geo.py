@@ -0,0 +1,33 @@
+# utils/geo.py
+import numpy as np
+import pandas as pd
+
+def region_centroids(area_geo: pd.DataFrame) -> pd.DataFrame:
+    """Centroid of each region: the spherical mean of its areas' centroids.
+
+    Averaging on the sphere keeps regions that straddle the antimeridian
+    (e.g. Polynesia) in the Pacific instead of near longitude 0.
+    Columns: Name, Latitude, Longitude.
+    """
+    if area_geo.empty:
+        return pd.DataFrame(columns=['Name', 'Latitude', 'Longitude'])
+    lat, lon = np.radians(area_geo['Latitude'].to_numpy()), np.radians(area_geo['Longitude'].to_numpy())
+    points = pd.DataFrame({'x': np.cos(lat) * np.cos(lon), 'y': np.cos(lat) * np.sin(lon), 'z': np.sin(lat)})
+    mean = points.groupby(area_geo['Region'].to_numpy()).mean()
+    return pd.DataFrame({
+        'Name': mean.index,
+        'Latitude': np.degrees(np.arctan2(mean['z'], np.hypot(mean['x'], mean['y']))).round(2),
+        'Longitude': np.degrees(np.arctan2(mean['y'], mean['x'])).round(2),
+    }).reset_index(drop=True)
+
+def locate(edges: pd.DataFrame, centroids: pd.DataFrame) -> pd.DataFrame:
+    """Add the centroids of both ends to exporter -> importer edges.
+
+    Edges with an end that has no centroid, or that start and end at the
+    same place, cannot be drawn and are dropped.
+    """
+    points = centroids.set_index('Name')[['Latitude', 'Longitude']]
+    located = (edges
+               .join(points.add_prefix('Exporter'), on='Exporter', how='inner')
+               .join(points.add_prefix('Importer'), on='Importer', how='inner'))
+    return located[located['Exporter'] != located['Importer']].reset_index(drop=True)
@@ -0,0 +1,263 @@
+# utils/instrumentation.py
+import cProfile
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Callable, Dict, List
+import config
+
+# Upper bounds (seconds) of the callback latency histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Timing of the callback running in the current thread/context
+_current = ContextVar("callback_timing", default=None)
+
+class CallbackTiming:
+    """Wall time spent per phase ('db', 'processing', 'figure') during one callback."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.phases = defaultdict(float)
+        self.active_phase = None
+
+class MetricsRegistry:
+    """Thread-safe per-callback counters, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = defaultdict(int)
+        self._seconds = defaultdict(float)
+        self._buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+        self._phase_seconds = defaultdict(float)   # (callback, phase) -> seconds
+        self._errors = defaultdict(int)
+        self._response_bytes = defaultdict(int)
+        self._collectors = []                      # (prefix, function returning {name: number})
+
+    def observe(self, timing: CallbackTiming, seconds: float):
+        with self._lock:
+            self._calls[timing.name] += 1
+            self._seconds[timing.name] += seconds
+            buckets = self._buckets[timing.name]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            other = seconds
+            for phase, phase_seconds in timing.phases.items():
+                self._phase_seconds[(timing.name, phase)] += phase_seconds
+                other -= phase_seconds
+            self._phase_seconds[(timing.name, 'other')] += max(other, 0.0)
+
+    def count_error(self, name: str):
+        with self._lock:
+            self._errors[name] += 1
+
+    def add_response_bytes(self, name: str, size: int):
+        with self._lock:
+            self._response_bytes[name] += size
+
+    def add_collector(self, prefix: str, collect: Callable[[], Dict[str, float]]):
+        """Export the numeric values of ``collect()`` as gauges named ``<prefix>_<key>``."""
+        self._collectors.append((prefix, collect))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-callback calls, mean seconds and per-phase seconds, e.g. for benchmarks."""
+        with self._lock:
+            return {
+                name: {
+                    'calls': calls,
+                    'seconds': self._seconds[name],
+                    'errors': self._errors[name],
+                    'response_bytes': self._response_bytes[name],
+                    'phases': {phase: seconds for (callback, phase), seconds in self._phase_seconds.items()
+                               if callback == name},
+                }
+                for name, calls in self._calls.items()
+            }
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            lines += ["# HELP dash_callback_duration_seconds Wall time of Dash callbacks",
+                      "# TYPE dash_callback_duration_seconds histogram"]
+            for name, calls in sorted(self._calls.items()):
+                for bound, count in zip(LATENCY_BUCKETS, self._buckets[name]):
+                    lines.append(f'dash_callback_duration_seconds_bucket{{callback="{name}",le="{bound}"}} {count}')
+                lines.append(f'dash_callback_duration_seconds_bucket{{callback="{name}",le="+Inf"}} {calls}')
+                lines.append(f'dash_callback_duration_seconds_sum{{callback="{name}"}} {self._seconds[name]:.6f}')
+                lines.append(f'dash_callback_duration_seconds_count{{callback="{name}"}} {calls}')
+
+            lines += ["# HELP dash_callback_phase_seconds_total Callback time spent in database, processing "
+                      "and figure code",
+                      "# TYPE dash_callback_phase_seconds_total counter"]
+            for (name, phase), seconds in sorted(self._phase_seconds.items()):
+                lines.append(f'dash_callback_phase_seconds_total{{callback="{name}",phase="{phase}"}} {seconds:.6f}')
+
+            lines += ["# HELP dash_callback_errors_total Errors reported while running callbacks",
+                      "# TYPE dash_callback_errors_total counter"]
+            for name, count in sorted(self._errors.items()):
+                lines.append(f'dash_callback_errors_total{{callback="{name}"}} {count}')
+
+            lines += ["# HELP dash_callback_response_bytes_total Serialized size of callback responses",
+                      "# TYPE dash_callback_response_bytes_total counter"]
+            for name, size in sorted(self._response_bytes.items()):
+                lines.append(f'dash_callback_response_bytes_total{{callback="{name}"}} {size}')
+            collectors = list(self._collectors)
+
+        for prefix, collect in collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                print(f"Error collecting {prefix} metrics: {e}")
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            for counters in (self._calls, self._seconds, self._buckets, self._phase_seconds,
+                             self._errors, self._response_bytes):
+                counters.clear()
+
+metrics = MetricsRegistry()
+
+def timed_phase(phase: str, func: Callable) -> Callable:
+    """Add the wall time of ``func`` to ``phase`` of the running callback.
+
+    Nested calls (a cached DatabaseManager method calling another one, or a
+    DataProcessor method called from GraphGenerator) count once, for the
+    outermost phase.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timing = _current.get()
+        if timing is None or timing.active_phase is not None:
+            return func(*args, **kwargs)
+        timing.active_phase = phase
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timing.phases[phase] += time.perf_counter() - start
+            timing.active_phase = None
+    return wrapper
+
+def instrument_class(cls: type, phase: str):
+    """Time every public method of ``cls`` as ``phase`` (no-op unless INSTRUMENTATION_ENABLED)."""
+    if not config.INSTRUMENTATION_ENABLED or getattr(cls, '_instrumented_phase', None):
+        return
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('_'):
+            continue
+        if isinstance(attr, staticmethod):
+            setattr(cls, name, staticmethod(timed_phase(phase, attr.__func__)))
+        elif inspect.isfunction(attr):
+            setattr(cls, name, timed_phase(phase, attr))
+    cls._instrumented_phase = phase
+
+def _profile_path(name: str, seconds: float, extension: str) -> str:
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(config.PROFILE_DIR, f"{name}-{stamp}-{seconds * 1000:.0f}ms.{extension}")
+
+def _run_profiled(name: str, func: Callable, args, kwargs):
+    """Run func under the configured profiler and keep the profile if it was slow."""
+    if config.PROFILER == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            Profiler = None
+        if Profiler is not None:
+            profiler = Profiler()
+            profiler.start()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                profiler.stop()
+                if seconds * 1000 >= config.PROFILE_THRESHOLD_MS:
+                    with open(_profile_path(name, seconds, "html"), "w") as f:
+                        f.write(profiler.output_html())
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is active in this thread
+        return func(*args, **kwargs)
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        profiler.disable()
+        if seconds * 1000 >= config.PROFILE_THRESHOLD_MS:
+            profiler.dump_stats(_profile_path(name, seconds, "prof"))
+
+def instrumented(func: Callable) -> Callable:
+    """Record wall time, phase split and errors of a Dash callback.
+
+    Apply below ``@callback`` so Dash registers the instrumented function.
+    """
+    if not config.INSTRUMENTATION_ENABLED:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timing = CallbackTiming(func.__name__)
+        token = _current.set(timing)
+        _set_request_callback(timing.name)
+        start = time.perf_counter()
+        try:
+            if config.PROFILE_SLOW_CALLBACKS:
+                return _run_profiled(timing.name, func, args, kwargs)
+            return func(*args, **kwargs)
+        except Exception:
+            metrics.count_error(timing.name)
+            raise
+        finally:
+            metrics.observe(timing, time.perf_counter() - start)
+            _current.reset(token)
+    return wrapper
+
+def report_error(message: str, error: Exception):
+    """Print an error as before and count it against the running callback."""
+    print(f"{message}: {error}")
+    if config.INSTRUMENTATION_ENABLED:
+        timing = _current.get()
+        metrics.count_error(timing.name if timing else "none")
+
+def _set_request_callback(name: str):
+    """Remember which callback serves the current Flask request, for the response size."""
+    try:
+        import flask
+        if flask.has_request_context():
+            flask.g.instrumented_callback = name
+    except ImportError:
+        pass
+
+def register_endpoint(server):
+    """Serve metrics on config.METRICS_ENDPOINT and record callback response sizes."""
+    if not config.INSTRUMENTATION_ENABLED:
+        return
+    import flask
+
+    @server.after_request
+    def record_response_size(response):
+        name = flask.g.get('instrumented_callback')
+        if name and response.content_length:
+            metrics.add_response_bytes(name, response.content_length)
+        return response
+
+    @server.route(config.METRICS_ENDPOINT)
+    def metrics_endpoint():
+        if not config.METRICS_ALLOW_REMOTE and flask.request.remote_addr not in ('127.0.0.1', '::1'):
+            flask.abort(403)
+        return flask.Response(metrics.render(), mimetype="text/plain; version=0.0.4")
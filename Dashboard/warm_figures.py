@@ -0,0 +1,38 @@
+# warm_figures.py
+"""Pre-render every crop's static charts into the figure cache.
+
+    python warm_figures.py [--db main_database.db]
+
+Run after each data load (data_loading.py or data_aggregation.py). Figures
+are written to FIGURE_CACHE_DIR under the new data version, so every
+dashboard process serves them without rendering.
+"""
+import argparse
+import time
+import config
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=config.DATABASE_PATH, help="SQLite database")
+    args = parser.parse_args()
+
+    if not config.FIGURE_CACHE_ENABLED or not config.FIGURE_CACHE_DIR:
+        print("Figure cache is disabled (FIGURE_CACHE_ENABLED / FIGURE_CACHE_DIR), nothing to warm")
+        return
+
+    config.DATABASE_PATH = args.db
+    # callbacks creates its DatabaseManager at import time, so import it after choosing the database
+    from components import callbacks
+
+    crops = callbacks.db_manager.get_available_crops()
+    start = time.perf_counter()
+    for crop in crops:
+        stored = callbacks.load_crop_data(crop)
+        callbacks.update_trade_mirror(stored)
+        callbacks.update_yearwise_production(stored)
+    stats = callbacks.figure_cache.stats()
+    print(f"Rendered {stats['misses']} figures for {len(crops)} crops into {config.FIGURE_CACHE_DIR} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
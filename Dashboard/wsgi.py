@@ -0,0 +1,85 @@
+# wsgi.py
+"""Production entry point: ``gunicorn -c gunicorn.conf.py wsgi:application``.
+
+With ``preload_app`` (set in gunicorn.conf.py) the master imports this
+module once, so the crop list and per-crop aggregates are loaded into the
+process caches before the workers are forked. Every worker starts warm and
+shares those pages copy-on-write. gunicorn.conf.py watches for a new
+database generation, preloads again and gracefully replaces the workers.
+"""
+import gc
+import os
+import threading
+import time
+import config
+from app import app
+from components import callbacks
+from data.catalog import get_catalog
+
+# Held while preloading or reading the version, and across every fork of this process,
+# so no worker inherits an open SQLite connection or a lock held by another thread
+preload_lock = threading.Lock()
+os.register_at_fork(before=preload_lock.acquire, after_in_parent=preload_lock.release,
+                    after_in_child=preload_lock.release)
+loaded_version = None
+
+def preload_crop(crop: str):
+    """Everything the crop page reads for crop, into the caches."""
+    db_manager = callbacks.db_manager
+    if config.USE_PRECOMPUTED_AGGREGATES:
+        db_manager.get_top_producers(crop)
+        db_manager.get_crop_summary(crop)
+    else:
+        callbacks.crop_store.get(crop)
+    if config.USE_PRECOMPUTED_AGGREGATES or config.SERVER_SIDE_DATA:
+        # The top producers the trend chart plots
+        stored = callbacks.crop_store.handle(crop)
+        callbacks.analysis.top_producers(stored)
+    # The year selector's area × year and partner × year cubes
+    callbacks.analysis.production_cube(crop)
+    callbacks.analysis.trade_cubes(crop)
+    # The trade flow map's country flows and the default reporter's mirror statistics
+    callbacks.analysis.trade_flows(crop)
+    db_manager.get_trade_mirror(crop)
+    
+    if config.SERVER_PRELOAD_FIGURES:
+        stored = callbacks.load_crop_data(crop)
+        callbacks.update_trade_mirror(stored)
+        callbacks.update_yearwise_production(stored)
+
+def preload() -> str:
+    """Load the crop catalog, crop list and per-crop aggregates; return the data version they belong to."""
+    global loaded_version
+    with preload_lock:
+        start = time.perf_counter()
+        gc.unfreeze()
+        get_catalog()
+        crops = callbacks.db_manager.get_available_crops()
+        for crop in crops:
+            preload_crop(crop)
+        loaded_version = callbacks.db_manager.data_version()
+        
+        # SQLite connections must not be shared across fork; workers open their own
+        callbacks.db_manager.pool.close_all()
+        # Move the preloaded objects out of the collector's generations, so garbage
+        # collection in the workers does not write to (and copy) their pages
+        gc.collect()
+        gc.freeze()
+        print(f"Preloaded {len(crops)} crops for data version {loaded_version} "
+              f"in {time.perf_counter() - start:.1f}s")
+        return loaded_version
+
+def current_version() -> str:
+    """The data version on disk, without keeping a connection open."""
+    with preload_lock:
+        version = callbacks.db_manager.data_version()
+        callbacks.db_manager.pool.close_all()
+        return version
+
+def create_app(preload_data: bool = True):
+    """Return the WSGI application, with the data preloaded unless preload_data is False."""
+    if preload_data:
+        preload()
+    return app.server
+
+application = create_app()
@@ -0,0 +1,423 @@
+import sqlite3
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from data_loading import TRADE_MEASURES, unit_scale_sql
+
+# Configuration
+PRODUCTION_LONG_TABLE = "Value_of_Production_Long"  # Built by data_loading.build_long_tables
+TRADE_TABLE = "Trade_Matrix_India"
+FOCUS_COUNTRY = "India"  # Country whose production and rank are tracked
+TOP_N = 10
+GROWTH_YEARS = 10  # CAGR window
+
+# Summary tables read by the dashboard
+TOP_PRODUCERS_TABLE = "Crop_Top_Producers"
+SUMMARY_TABLE = "Crop_Summary"
+TOP_PARTNERS_TABLE = "Crop_Top_Partners"
+
+# Exporter -> importer trade edges of every reporter for the trade flow map:
+# the EDGE_TOP_K largest per item and year, and all of them summed by region
+AREA_GEO_TABLE = "Area_Geo"  # Built by data_loading.build_area_geo
+TRADE_EDGES_TABLE = "Trade_Edges"
+REGION_EDGES_TABLE = "Trade_Region_Edges"
+EDGE_TOP_K = 500
+
+# Each pair's flow as reported by the exporter and, mirrored, by the importer
+MIRROR_TABLE = "Trade_Mirror"
+# Measure: (the exporter's element, the importer's element)
+MIRROR_MEASURES = {measure: (export, import_) for measure, (import_, export) in TRADE_MEASURES.items()}
+EXPORT_VALUE, IMPORT_VALUE = MIRROR_MEASURES['Value']
+MIRROR_CHUNK_ROWS = 1_000_000  # Trade rows held in memory at a time
+
+
+def table_exists(conn, table_name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (table_name,)).fetchone() is not None
+
+def reset_table(conn, table_name, items):
+    """Drop table_name, or with ``items`` only delete their rows; returns the matching source filter"""
+    if items is None:
+        conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+        return "1"
+    conn.execute(f'DELETE FROM "{table_name}" WHERE Item IN (SELECT Item FROM temp.changed_items)')
+    return "Item IN (SELECT Item FROM temp.changed_items)"
+
+def build_top_producers(conn, items=None):
+    """Top TOP_N producing areas per item, element and year"""
+    item_filter = reset_table(conn, TOP_PRODUCERS_TABLE, items)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS "{TOP_PRODUCERS_TABLE}" (
+            Item TEXT NOT NULL,
+            Element TEXT NOT NULL,
+            Year INTEGER NOT NULL,
+            Rank INTEGER NOT NULL,
+            Area TEXT NOT NULL,
+            Value REAL NOT NULL,
+            PRIMARY KEY (Item, Element, Year, Rank)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        INSERT INTO "{TOP_PRODUCERS_TABLE}"
+        SELECT Item, Element, Year, Rank, Area, Value FROM (
+            SELECT Item, Element, Year, Area, Value,
+                   ROW_NUMBER() OVER (PARTITION BY Item, Element, Year ORDER BY Value DESC) AS Rank
+            FROM "{PRODUCTION_LONG_TABLE}"
+            WHERE {item_filter}
+        ) WHERE Rank <= ?
+    """, (TOP_N,))
+
+def summarize_production(long_df):
+    """Global total, the focus country's value and rank, and mean CAGR per Item, Element and Year.
+
+    ``long_df`` holds (Area, Item, Element, Year, Value) rows for any number
+    of items; everything is computed in one pass of groupbys and array
+    operations. The growth rate for a year is the mean over areas of the
+    CAGR between Year - GROWTH_YEARS and Year; areas without a positive
+    starting value are skipped.
+    """
+    keys = ['Item', 'Element', 'Year']
+    groups = long_df.groupby(keys, observed=True, sort=True)['Value']
+    summary = groups.sum().rename('GlobalProduction').to_frame()
+
+    ranks = groups.rank(method='first', ascending=False)
+    focus = (long_df['Area'] == FOCUS_COUNTRY).to_numpy()
+    focus_rows = long_df.loc[focus, keys].assign(
+        FocusProduction=long_df['Value'].to_numpy()[focus], FocusRank=ranks.to_numpy()[focus]
+    ).set_index(keys)
+    summary = summary.join(focus_rows)
+
+    # One row per Item/Element/Area and one column per year, so the start
+    # value of every CAGR is the same row GROWTH_YEARS columns to the left
+    series = long_df.groupby(['Item', 'Element', 'Area'], observed=True, sort=False).ngroup().to_numpy()
+    pairs = long_df.groupby(['Item', 'Element'], observed=True, sort=True)
+    pair_ids = pairs.ngroup().to_numpy()
+    first_year = int(long_df['Year'].min())
+    n_years = int(long_df['Year'].max()) - first_year + 1
+
+    matrix = np.full((series.max() + 1, n_years), np.nan)
+    matrix[series, long_df['Year'].to_numpy() - first_year] = long_df['Value'].to_numpy()
+    series_pair = np.empty(series.max() + 1, dtype=np.int64)
+    series_pair[series] = pair_ids
+
+    end, start = matrix[:, GROWTH_YEARS:], matrix[:, :-GROWTH_YEARS]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = np.where(start > 0, ((end / start) ** (1 / GROWTH_YEARS) - 1) * 100, np.nan)
+    growth_years = np.arange(first_year + GROWTH_YEARS, first_year + n_years)
+    growth = pd.DataFrame(cagr, columns=growth_years).groupby(series_pair).mean()
+    growth.index = pairs.size().index
+    growth = growth.stack().rename('GrowthRate')
+    growth.index = growth.index.set_names(keys)
+    summary = summary.join(growth)
+
+    summary['FocusRank'] = summary['FocusRank'].astype('Int64')
+    return summary.reset_index()
+
+def read_long_table(conn, element=None, chunksize=1_000_000):
+    """Read the long production table with Area/Item/Element as categoricals to keep memory low"""
+    query = f'SELECT Area, Item, Element, Year, Value FROM "{PRODUCTION_LONG_TABLE}"'
+    params = []
+    if element:
+        query += " WHERE Element = ?"
+        params.append(element)
+
+    chunks = []
+    for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize):
+        chunks.append(chunk.astype({'Area': 'category', 'Item': 'category', 'Element': 'category'}))
+    if not chunks:
+        return pd.DataFrame(columns=['Area', 'Item', 'Element', 'Year', 'Value'])
+
+    long_df = pd.DataFrame({
+        column: union_categoricals([chunk[column] for chunk in chunks])
+        for column in ('Area', 'Item', 'Element')
+    })
+    long_df['Year'] = np.concatenate([chunk['Year'].to_numpy(np.int64) for chunk in chunks])
+    long_df['Value'] = np.concatenate([chunk['Value'].to_numpy(np.float64) for chunk in chunks])
+    return long_df
+
+def summary_stats(db_path, element=None):
+    """Global totals, focus country value and rank, and CAGR for every item and year in one pass"""
+    with sqlite3.connect(db_path) as conn:
+        long_df = read_long_table(conn, element)
+    if long_df.empty:
+        return pd.DataFrame()
+    summary = summarize_production(long_df)
+    for column in ('Item', 'Element'):
+        summary[column] = summary[column].astype(str)
+    return summary
+
+def build_summary(conn, items=None):
+    """Per item/element/year totals, focus country rank and CAGR, computed one item at a time"""
+    item_filter = reset_table(conn, SUMMARY_TABLE, items)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS "{SUMMARY_TABLE}" (
+            Item TEXT NOT NULL,
+            Element TEXT NOT NULL,
+            Year INTEGER NOT NULL,
+            GlobalProduction REAL,
+            FocusProduction REAL,
+            FocusRank INTEGER,
+            GrowthRate REAL,
+            PRIMARY KEY (Item, Element, Year)
+        ) WITHOUT ROWID
+    """)
+    items = [row[0] for row in conn.execute(f'SELECT DISTINCT Item FROM "{PRODUCTION_LONG_TABLE}" '
+                                            f'WHERE {item_filter}')]
+    for item in items:
+        long_df = pd.read_sql_query(f'SELECT * FROM "{PRODUCTION_LONG_TABLE}" WHERE Item = ?', conn, params=[item])
+        summary = summarize_production(long_df)
+        summary = summary[['Item', 'Element', 'Year', 'GlobalProduction', 'FocusProduction', 'FocusRank', 'GrowthRate']]
+        summary = summary.astype(object).where(summary.notna(), None)
+        conn.executemany(f'INSERT INTO "{SUMMARY_TABLE}" VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         summary.itertuples(index=False, name=None))
+
+def build_top_partners(conn, items=None):
+    """Top TOP_N partners per item, reporter, flow and year by trade value in 1000 USD (not quantity)"""
+    item_filter = reset_table(conn, TOP_PARTNERS_TABLE, items)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS "{TOP_PARTNERS_TABLE}" (
+            Item TEXT NOT NULL,
+            Reporter TEXT NOT NULL,
+            Flow TEXT NOT NULL,
+            Year INTEGER NOT NULL,
+            Rank INTEGER NOT NULL,
+            Partner TEXT NOT NULL,
+            Value REAL NOT NULL,
+            PRIMARY KEY (Item, Reporter, Flow, Year, Rank)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        INSERT INTO "{TOP_PARTNERS_TABLE}"
+        SELECT Item, Reporter, Flow, Year, Rank, Partner, Value FROM (
+            SELECT Item, Reporter, Flow, Year, Partner, Value,
+                   ROW_NUMBER() OVER (PARTITION BY Item, Reporter, Flow, Year ORDER BY Value DESC) AS Rank
+            FROM (
+                SELECT Item, "Reporter Countries" AS Reporter, Flow, Year,
+                       "Partner Countries" AS Partner, SUM(Value * {unit_scale_sql()}) AS Value
+                FROM "{TRADE_TABLE}"
+                WHERE Element IN ('{IMPORT_VALUE}', '{EXPORT_VALUE}') AND Value IS NOT NULL AND {item_filter}
+                GROUP BY Item, "Reporter Countries", Flow, Year, "Partner Countries"
+            )
+        ) WHERE Rank <= ?
+    """, (TOP_N,))
+
+def trade_edges_query(item_filter):
+    """Value of each exporter -> importer flow per item and year, in 1000 USD.
+
+    The exporter's reported exports are used; flows that only the importer
+    reported (its imports from that partner) fill the gaps.
+    """
+    return f"""
+        SELECT Item, Year, Exporter, Importer, Value FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY Item, Year, Exporter, Importer ORDER BY Mirror) AS Pick
+            FROM (
+                SELECT Item, Year, "Reporter Countries" AS Exporter, "Partner Countries" AS Importer,
+                       SUM(Value * {unit_scale_sql()}) AS Value, 0 AS Mirror
+                FROM "{TRADE_TABLE}"
+                WHERE Element = '{EXPORT_VALUE}' AND Value IS NOT NULL AND {item_filter}
+                GROUP BY Item, Year, "Reporter Countries", "Partner Countries"
+                UNION ALL
+                SELECT Item, Year, "Partner Countries", "Reporter Countries", SUM(Value * {unit_scale_sql()}), 1
+                FROM "{TRADE_TABLE}"
+                WHERE Element = '{IMPORT_VALUE}' AND Value IS NOT NULL AND {item_filter}
+                GROUP BY Item, Year, "Reporter Countries", "Partner Countries"
+            )
+        ) WHERE Pick = 1
+    """
+
+def build_trade_edges(conn, items=None):
+    """Largest EDGE_TOP_K exporter -> importer flows per item and year"""
+    item_filter = reset_table(conn, TRADE_EDGES_TABLE, items)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS "{TRADE_EDGES_TABLE}" (
+            Item TEXT NOT NULL,
+            Year INTEGER NOT NULL,
+            Rank INTEGER NOT NULL,
+            Exporter TEXT NOT NULL,
+            Importer TEXT NOT NULL,
+            Value REAL NOT NULL,
+            PRIMARY KEY (Item, Year, Rank)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        INSERT INTO "{TRADE_EDGES_TABLE}"
+        SELECT Item, Year, Rank, Exporter, Importer, Value FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY Item, Year ORDER BY Value DESC) AS Rank
+            FROM ({trade_edges_query(item_filter)})
+        ) WHERE Rank <= ?
+    """, (EDGE_TOP_K,))
+
+def build_region_edges(conn, items=None):
+    """All exporter -> importer flows per item and year, summed by the regions of both areas"""
+    item_filter = reset_table(conn, REGION_EDGES_TABLE, items)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS "{REGION_EDGES_TABLE}" (
+            Item TEXT NOT NULL,
+            Year INTEGER NOT NULL,
+            Exporter TEXT NOT NULL,
+            Importer TEXT NOT NULL,
+            Value REAL NOT NULL,
+            PRIMARY KEY (Item, Year, Exporter, Importer)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        INSERT INTO "{REGION_EDGES_TABLE}"
+        SELECT e.Item, e.Year, x.Region, m.Region, SUM(e.Value)
+        FROM ({trade_edges_query(item_filter)}) e
+        JOIN "{AREA_GEO_TABLE}" x ON x.Name = e.Exporter
+        JOIN "{AREA_GEO_TABLE}" m ON m.Name = e.Importer
+        GROUP BY e.Item, e.Year, x.Region, m.Region
+    """)
+
+def reconcile_mirror(trade_df):
+    """Join each exporter's reported exports with the importer's reported imports of the same flow.
+
+    ``trade_df`` holds (Item, Year, Element, Reporter, Partner, Value) rows
+    of the MIRROR_MEASURES elements. Each Item, Measure, Year, Exporter and
+    Importer gets Exported (the exporter's report), Imported (the
+    importer's), Ratio = Imported / Exported where both reported, and
+    Reconciled: the importer's report when there is one, since customs
+    record imports more completely, else the exporter's.
+    """
+    keys = ['Item', 'Measure', 'Year', 'Exporter', 'Importer']
+    sides = []
+    for side, element_index, ends in (('Exported', 0, ['Exporter', 'Importer']),
+                                      ('Imported', 1, ['Importer', 'Exporter'])):
+        measures = {elements[element_index]: measure for measure, elements in MIRROR_MEASURES.items()}
+        rows = trade_df[trade_df['Element'].isin(measures.keys())]
+        sides.append(pd.DataFrame({
+            'Item': rows['Item'].to_numpy(),
+            'Measure': rows['Element'].map(measures).to_numpy(),
+            'Year': rows['Year'].to_numpy(),
+            ends[0]: rows['Reporter'].to_numpy(),
+            ends[1]: rows['Partner'].to_numpy(),
+            side: rows['Value'].to_numpy(np.float64),
+        }).groupby(keys, sort=False)[side].sum())
+
+    mirror = pd.concat(sides, axis=1, join='outer').reset_index()
+    exported, imported = mirror['Exported'].to_numpy(), mirror['Imported'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mirror['Ratio'] = np.where(exported > 0, imported / exported, np.nan)
+    mirror['Reconciled'] = np.where(np.isnan(imported), exported, imported)
+    return mirror[keys + ['Exported', 'Imported', 'Reconciled', 'Ratio']]
+
+def mirror_chunks(conn, item_filter, chunksize=MIRROR_CHUNK_ROWS):
+    """Trade rows of the MIRROR_MEASURES elements in chunks that hold whole (Item, Year) partitions.
+
+    Both reports of a flow share its Item and Year, so every chunk can be
+    reconciled on its own and memory stays bounded by the chunk size.
+    """
+    elements = [element for pair in MIRROR_MEASURES.values() for element in pair]
+    query = f"""
+        SELECT Item, Year, Element, "Reporter Countries" AS Reporter, "Partner Countries" AS Partner,
+               Value * {unit_scale_sql()} AS Value
+        FROM "{TRADE_TABLE}"
+        WHERE Element IN ({", ".join("?" * len(elements))}) AND Value IS NOT NULL
+          AND "Reporter Countries" != "Partner Countries" AND {item_filter}
+        ORDER BY Item, Year
+    """
+    carry = None
+    for chunk in pd.read_sql_query(query, conn, params=elements, chunksize=chunksize):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        # The last partition may continue in the next chunk
+        last = (chunk['Item'].to_numpy() == chunk['Item'].iat[-1]) & (chunk['Year'].to_numpy() == chunk['Year'].iat[-1])
+        carry = chunk[last]
+        if not last.all():
+            yield chunk[~last]
+    if carry is not None:
+        yield carry
+
+def build_trade_mirror(conn, items=None, chunksize=MIRROR_CHUNK_ROWS):
+    """Exporter- and importer-reported flows per item, measure, year and pair, with their ratio and reconciled value"""
+    item_filter = reset_table(conn, MIRROR_TABLE, items)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS "{MIRROR_TABLE}" (
+            Item TEXT NOT NULL,
+            Measure TEXT NOT NULL,
+            Exporter TEXT NOT NULL,
+            Importer TEXT NOT NULL,
+            Year INTEGER NOT NULL,
+            Exported REAL,
+            Imported REAL,
+            Reconciled REAL NOT NULL,
+            Ratio REAL,
+            PRIMARY KEY (Item, Measure, Exporter, Importer, Year)
+        ) WITHOUT ROWID
+    """)
+    # The primary key serves an exporter's flows; this index an importer's
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{MIRROR_TABLE}_Importer" '
+                 f'ON "{MIRROR_TABLE}" (Item, Measure, Importer)')
+    for chunk in mirror_chunks(conn, item_filter, chunksize):
+        mirror = reconcile_mirror(chunk)
+        # Inserting in primary key order keeps the B-tree appends sequential
+        key = ['Item', 'Measure', 'Exporter', 'Importer', 'Year']
+        mirror = mirror[key + ['Exported', 'Imported', 'Reconciled', 'Ratio']].sort_values(key)
+        mirror = mirror.astype(object).where(mirror.notna(), None)
+        conn.executemany(f'INSERT INTO "{MIRROR_TABLE}" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         mirror.itertuples(index=False, name=None))
+    # Without statistics the planner reads an importer's flows through the primary key
+    conn.execute(f'ANALYZE "{MIRROR_TABLE}"')
+
+def build_aggregates(db_path, items=None):
+    """Materialize the per-crop summary tables the dashboard reads instead of recomputing them.
+
+    With ``items`` only the rows of those Items are rebuilt.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if items is not None:
+            conn.execute("CREATE TEMP TABLE changed_items (Item TEXT PRIMARY KEY)")
+            conn.executemany("INSERT INTO temp.changed_items VALUES (?)", ((item,) for item in items))
+        for table_name, sources, build in (
+            (TOP_PRODUCERS_TABLE, [PRODUCTION_LONG_TABLE], build_top_producers),
+            (SUMMARY_TABLE, [PRODUCTION_LONG_TABLE], build_summary),
+            (TOP_PARTNERS_TABLE, [TRADE_TABLE], build_top_partners),
+            (TRADE_EDGES_TABLE, [TRADE_TABLE], build_trade_edges),
+            (REGION_EDGES_TABLE, [TRADE_TABLE, AREA_GEO_TABLE], build_region_edges),
+            (MIRROR_TABLE, [TRADE_TABLE], build_trade_mirror),
+        ):
+            missing = [source for source in sources if not table_exists(conn, source)]
+            if missing:
+                print(f"Skipping {table_name}: table {missing[0]} not found")
+                continue
+            start = time.perf_counter()
+            conn.execute("BEGIN")
+            try:
+                build(conn, items if table_exists(conn, table_name) else None)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            rows = conn.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+            print(f"Built {table_name}: {rows:,} rows in {time.perf_counter() - start:.1f}s")
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the dashboard's per-crop summary tables, "
+                                                 "or write summary statistics for every crop and year.")
+    parser.add_argument("db", nargs="?", default="main_database.db", help="SQLite database")
+    parser.add_argument("--stats", metavar="PATH",
+                        help="write global totals, focus country rank and CAGR for all crops to a "
+                             ".csv or .parquet file instead of building the summary tables")
+    parser.add_argument("--element", help="restrict --stats to one Element")
+    args = parser.parse_args()
+
+    if not args.stats:
+        build_aggregates(args.db)
+        return
+
+    start = time.perf_counter()
+    stats = summary_stats(args.db, args.element)
+    if args.stats.endswith(".parquet"):
+        stats.to_parquet(args.stats, index=False)
+    else:
+        stats.to_csv(args.stats, index=False)
+    print(f"Wrote {len(stats):,} item/element/year rows to {args.stats} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
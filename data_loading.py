@@ -1,4 +1,11 @@
+import argparse
 import os
+import sys
+import time
+import sqlite3
+import resource
+import shutil
+from urllib.parse import quote
 import pandas as pd
 import sqlalchemy as sa
 from sqlalchemy import MetaData, Table, Column, Integer, String, Float, DateTime, create_engine
@@ -9,6 +16,86 @@ import datetime
 # Configuration
 CSV_DIRECTORY = "./Data"  # Directory containing your CSV files
 MAIN_DB_URI = "sqlite:///main_database.db"  # Change to your preferred database URI
+CHUNK_SIZE = 100_000  # Rows read from a CSV (and inserted with one executemany) at a time
+PARQUET_DIR = "./parquet"  # Columnar copy of the dashboard tables; None to skip (needs pyarrow)
+
+# Wide Y1961..Y2023 tables that are also materialized in long (Area, Item, Element, Year, Value) form
+LONG_TABLES = {
+    "Value_of_Production_E_All_Data": "Value_of_Production_Long",
+}
+
+# Bilateral trade tables that get an indexed Flow ('Import'/'Export') column derived from Element
+TRADE_TABLES = ["Trade_Matrix_India"]
+
+# Trade tables copied into a table clustered by (Reporter, Item, Flow), so one reporter's
+# imports and exports of a crop are a single contiguous range of the primary key
+REPORTER_TABLES = {
+    "Trade_Matrix_India": "Trade_By_Reporter",
+}
+REPORTERS_TABLE = "Trade_Reporters"   # One row per reporter, for the dashboard's selector
+
+# Trade elements pivoted into the reporter table's Quantity and Value columns (each
+# measure's import element, then its export element), the units of those columns
+# (tonnes, heads or pieces; 1000 USD) and the factors that bring the other units to
+# them. Rows in any other unit are summed unscaled, with a warning. Both are written to
+# the tables below with the reporter table, and the dashboard's Parquet backend reads
+# them from there, so this is their only definition.
+TRADE_MEASURES = {
+    "Quantity": ["Import quantity", "Export quantity"],
+    "Value": ["Import value", "Export value"],
+}
+TRADE_BASE_UNITS = {"t", "Head", "An", "No", "1000 USD"}
+TRADE_UNIT_SCALE = {"1000 t": 1000, "1000 Head": 1000, "1000 An": 1000, "1000 No": 1000, "USD": 0.001}
+TRADE_MEASURES_TABLE = "Trade_Measures"       # Element -> Measure
+TRADE_UNIT_SCALE_TABLE = "Trade_Unit_Scale"   # Unit -> Scale
+
+# Dimension tables of the names repeated in every fact row: (type of the FAO code, and the
+# (table, name column, code column) pairs they are collected from). Each name gets a dense
+# integer Id from 0, so Ids double as pandas Categorical codes; Ids are never reused or
+# renumbered by incremental loads, so rows of unchanged items stay valid.
+DIMENSIONS = {
+    "Dim_Area": ("TEXT", [
+        ("Value_of_Production_E_All_Data", "Area", "Area Code (M49)"),
+        ("Trade_Matrix_India", "Reporter Countries", "Reporter Country Code (M49)"),
+        ("Trade_Matrix_India", "Partner Countries", "Partner Country Code (M49)"),
+    ]),
+    "Dim_Item": ("INTEGER", [
+        ("Value_of_Production_E_All_Data", "Item", "Item Code"),
+        ("Trade_Matrix_India", "Item", None),   # the trade export only has CPC codes
+    ]),
+    "Dim_Element": ("INTEGER", [
+        ("Value_of_Production_E_All_Data", "Element", "Element Code"),
+        ("Trade_Matrix_India", "Element", "Element Code"),
+    ]),
+}
+
+# Centroid and UN M49 region of each area, matched to Dim_Area by M49 code (or by name when
+# the dump has no codes), for the dashboard's trade flow map and region-level trade edges
+AREA_GEO_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Data", "area_centroids.csv")
+AREA_GEO_TABLE = "Area_Geo"
+
+# Indexes matched to the dashboard's queries (see Dashboard/data/database.py);
+# trade partner lookups read the reporter table's primary key instead
+INDEXES = {
+    "Value_of_Production_E_All_Data": [
+        ["Item", "Element"],
+    ],
+    "Trade_Matrix_India": [
+        ["Item", "Element"],
+    ],
+}
+
+# Tables exported to PARQUET_DIR and the columns they are partitioned by
+PARQUET_TABLES = {
+    "Value_of_Production_E_All_Data": ["Item"],
+    "Trade_Matrix_India": ["Item", "Reporter Countries"],
+}
+
+METADATA_TABLE = "Load_Metadata"  # key/value table holding the load generation
+ITEM_HASHES_TABLE = "Load_Item_Hashes"  # content hash of each table's rows per Item, for incremental loads
+
+# Code and flag columns that the dashboard never reads
+CODE_COLUMNS = {'Area Code (M49)', 'Item Code', 'Element Code'}
 
 def create_connection(db_uri):
     """Create a database engine connection"""
@@ -25,6 +112,654 @@ def load_csv_to_dataframe(csv_path):
         return None
 
 
+def sqlite_path(db_uri):
+    """Return the file path of a sqlite:/// database URI"""
+    return db_uri.split("sqlite:///", 1)[-1]
+
+def is_code_column(column):
+    """True for FAO code columns and the per-year flag/note columns (Y1961F, Y1961N)"""
+    if column in CODE_COLUMNS:
+        return True
+    return len(column) == 6 and column[0] == 'Y' and column[1:5].isdigit() and column[5] in 'FN'
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def sqlite_type(dtype):
+    """Map a pandas dtype to a SQLite column type"""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+def configure_bulk_load(conn):
+    """Trade durability for speed while a table is being (re)built.
+
+    The whole load runs in one transaction, so an interrupted load simply
+    leaves the previous table in place. A database already in WAL mode (one
+    the dashboard may be reading) stays in it, so readers keep seeing the
+    previous tables until the transaction commits.
+    """
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+        conn.execute("PRAGMA synchronous = NORMAL")
+    else:
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -262144")  # 256 MB page cache
+
+def item_hashes(chunk):
+    """Content hash and row count of each Item's rows in a chunk, as {Item: (hash, rows)}.
+
+    A row hashes the same whichever chunk it lands in (numbers are hashed as
+    floats, missing values alike), and an Item's hash is the sum of its row
+    hashes modulo 2**64, so it does not depend on row order either.
+    """
+    normalized = chunk.apply(lambda column: column.astype('float64')
+                             if pd.api.types.is_numeric_dtype(column) else column)
+    hashes = pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+    grouped = pd.DataFrame({'Item': chunk['Item'], 'hash': hashes}).groupby('Item', dropna=False)['hash']
+    sums, sizes = grouped.sum(), grouped.size()
+    return {item: (int(h), int(rows)) for item, h, rows in zip(sums.index, sums.values, sizes.values)}
+
+def add_item_hashes(totals, chunk_hashes):
+    for item, (h, rows) in chunk_hashes.items():
+        total_h, total_rows = totals.get(item, (0, 0))
+        totals[item] = ((total_h + h) % 2**64, total_rows + rows)
+
+def create_item_hashes_table(conn, schema="main"):
+    conn.execute(f'CREATE TABLE IF NOT EXISTS {schema}."{ITEM_HASHES_TABLE}" '
+                 f'(table_name TEXT, Item TEXT, hash INTEGER, rows INTEGER, PRIMARY KEY (table_name, Item))')
+
+def write_item_hashes(conn, table_name, totals):
+    """Replace table_name's rows of ITEM_HASHES_TABLE (hashes are stored as signed 64-bit integers)"""
+    create_item_hashes_table(conn)
+    conn.execute(f'DELETE FROM "{ITEM_HASHES_TABLE}" WHERE table_name = ?', (table_name,))
+    conn.executemany(f'INSERT INTO "{ITEM_HASHES_TABLE}" VALUES (?, ?, ?, ?)',
+                     ((table_name, None if pd.isna(item) else item, h - 2**64 if h >= 2**63 else h, rows)
+                      for item, (h, rows) in totals.items()))
+
+def stream_csv_to_sqlite(csv_path, db_path, table_name, drop_column=is_code_column, dtype=None,
+                         chunksize=CHUNK_SIZE, hash_items=False):
+    """Stream a CSV file into a SQLite table chunk by chunk.
+
+    Only one chunk is held in memory at a time, so memory use does not grow
+    with the file size. Columns for which ``drop_column`` returns True are
+    never parsed, and ``dtype(column)`` can force the parsed type of a column.
+    The table is replaced inside a single transaction. With ``hash_items``
+    the content hash of every Item's rows is stored in ITEM_HASHES_TABLE too.
+    """
+    usecols = (lambda column: not drop_column(column)) if drop_column else None
+    dtypes = None
+    if dtype:
+        header = pd.read_csv(csv_path, nrows=0, usecols=usecols).columns
+        dtypes = {column: dtype(column) for column in header if dtype(column)}
+    reader = pd.read_csv(csv_path, usecols=usecols, dtype=dtypes, chunksize=chunksize)
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        configure_bulk_load(conn)
+        start = time.perf_counter()
+        rows = 0
+        insert_sql = None
+        hashes = {}
+        conn.execute("BEGIN")
+        for chunk in reader:
+            if insert_sql is None:
+                columns = ", ".join(f'"{col}" {sqlite_type(dtype)}' for col, dtype in chunk.dtypes.items())
+                conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+                conn.execute(f'CREATE TABLE "{table_name}" ({columns})')
+                placeholders = ", ".join("?" * len(chunk.columns))
+                insert_sql = f'INSERT INTO "{table_name}" VALUES ({placeholders})'
+
+            # sqlite3 cannot bind numpy scalars or NaN, so hand it Python objects and None
+            values = chunk.astype(object).where(chunk.notna(), None)
+            conn.executemany(insert_sql, values.itertuples(index=False, name=None))
+            rows += len(chunk)
+            if hash_items and 'Item' in chunk:
+                add_item_hashes(hashes, item_hashes(chunk))
+        if hash_items:
+            write_item_hashes(conn, table_name, hashes)
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    print(f"  {rows:,} rows in {elapsed:.1f}s ({stats['rows_per_second']:,.0f} rows/s), "
+          f"peak RSS {stats['peak_rss_mb']:.0f} MB")
+    return stats
+
+
+def table_exists(conn, table_name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (table_name,)).fetchone() is not None
+
+def stage_items(conn, items):
+    """Put items into temp.changed_items, for ``Item IN (SELECT Item FROM temp.changed_items)``"""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS changed_items (Item TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.changed_items")
+    conn.executemany("INSERT INTO temp.changed_items VALUES (?)", ((item,) for item in items))
+
+def build_long_table(db_path, wide_table, long_table, chunksize=CHUNK_SIZE, items=None):
+    """Materialize a wide FAOSTAT table as (Area, Item, Element, Year, Value).
+
+    The table is clustered on its primary key, so one crop/element/country
+    year range is a contiguous slice of the B-tree. Missing values are not
+    stored. The wide table is read in chunks to keep memory bounded. With
+    ``items`` only those Items are rebuilt and the rest of the table is kept.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        configure_bulk_load(conn)
+        start = time.perf_counter()
+        rows = 0
+        if items is not None and not table_exists(conn, long_table):
+            items = None
+        conn.execute("BEGIN")
+        if items is None:
+            conn.execute(f'DROP TABLE IF EXISTS "{long_table}"')
+            source = f'SELECT * FROM "{wide_table}"'
+        else:
+            stage_items(conn, items)
+            conn.execute(f'DELETE FROM "{long_table}" WHERE Item IN (SELECT Item FROM temp.changed_items)')
+            source = f'SELECT * FROM "{wide_table}" WHERE Item IN (SELECT Item FROM temp.changed_items)'
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS "{long_table}" (
+                Area TEXT NOT NULL,
+                Item TEXT NOT NULL,
+                Element TEXT NOT NULL,
+                Year INTEGER NOT NULL,
+                Value REAL NOT NULL,
+                PRIMARY KEY (Item, Element, Area, Year)
+            ) WITHOUT ROWID
+        """)
+        insert_sql = f'INSERT INTO "{long_table}" VALUES (?, ?, ?, ?, ?)'
+        for chunk in pd.read_sql_query(source, conn, chunksize=chunksize):
+            year_columns = [col for col in chunk.columns if len(col) == 5 and col[0] == 'Y' and col[1:].isdigit()]
+            long = chunk.melt(id_vars=['Area', 'Item', 'Element'], value_vars=year_columns,
+                              var_name='Year', value_name='Value')
+            long = long.dropna(subset=['Value'])
+            long['Year'] = long['Year'].str[1:].astype(int)
+            conn.executemany(insert_sql, zip(long['Area'], long['Item'], long['Element'],
+                                             long['Year'].tolist(), long['Value'].tolist()))
+            rows += len(long)
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    scope = f" ({len(items)} items)" if items is not None else ""
+    print(f"Built {long_table} from {wide_table}{scope}: {rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+def build_long_tables(db_path, tables=LONG_TABLES, changed=None):
+    """Build every configured long table whose wide source table exists.
+
+    ``changed`` is as for post_load.
+    """
+    with sqlite3.connect(db_path) as conn:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for wide_table, long_table in tables.items():
+        if wide_table not in existing:
+            print(f"Skipping {long_table}: table {wide_table} not found")
+        elif changed is None:
+            build_long_table(db_path, wide_table, long_table)
+        elif wide_table in changed:
+            build_long_table(db_path, wide_table, long_table, items=changed[wide_table])
+
+
+def add_flow_column(db_path, table_name, items=None):
+    """Derive Flow ('Import' or 'Export') from Element so trade queries can use an index instead of LIKE.
+
+    Only rows without a Flow are updated; ``items`` limits that to those Items.
+    """
+    with sqlite3.connect(db_path) as conn:
+        columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')]
+        if "Flow" not in columns:
+            conn.execute(f'ALTER TABLE "{table_name}" ADD COLUMN Flow TEXT')
+            items = None
+        condition = "Flow IS NULL"
+        if items is not None:
+            stage_items(conn, items)
+            condition += " AND Item IN (SELECT Item FROM temp.changed_items)"
+        conn.execute(f"""
+            UPDATE "{table_name}" SET Flow = CASE
+                WHEN Element LIKE '%Import%' THEN 'Import'
+                WHEN Element LIKE '%Export%' THEN 'Export'
+            END
+            WHERE {condition}
+        """)
+
+def build_dimensions(db_path, dimensions=DIMENSIONS, changed=None):
+    """Collect the distinct names (and FAO codes) of the fact tables into the dimension tables.
+
+    A full load renumbers every dimension. With ``changed`` (as for
+    post_load) only the changed Items' rows are scanned and new names are
+    appended after the existing Ids.
+    """
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.execute("BEGIN")
+        for dimension, (code_type, sources) in dimensions.items():
+            if changed is None:
+                conn.execute(f'DROP TABLE IF EXISTS "{dimension}"')
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{dimension}" '
+                         f'(Id INTEGER PRIMARY KEY, Name TEXT NOT NULL UNIQUE, Code {code_type})')
+            ids = {name: id_ for id_, name in conn.execute(f'SELECT Id, Name FROM "{dimension}"')}
+
+            codes = {}
+            for table_name, name_column, code_column in sources:
+                if table_name not in existing or (changed is not None and table_name not in changed):
+                    continue
+                columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')}
+                code = f'"{code_column}"' if code_column in columns else "NULL"
+                condition = ""
+                if changed is not None and changed[table_name] is not None:
+                    stage_items(conn, changed[table_name])
+                    condition = "AND Item IN (SELECT Item FROM temp.changed_items)"
+                for name, value in conn.execute(f'SELECT DISTINCT "{name_column}", {code} FROM "{table_name}" '
+                                                f'WHERE "{name_column}" IS NOT NULL {condition}'):
+                    if codes.get(name) is None:
+                        # Bulk-download M49 codes carry a leading apostrophe ('004)
+                        codes[name] = value.lstrip("'") if isinstance(value, str) else value
+
+            next_id = max(ids.values(), default=-1) + 1
+            new_names = sorted(codes.keys() - ids.keys())
+            conn.executemany(f'INSERT INTO "{dimension}" VALUES (?, ?, ?)',
+                             ((next_id + i, name, codes[name]) for i, name in enumerate(new_names)))
+            conn.executemany(f'UPDATE "{dimension}" SET Code = ? WHERE Name = ? AND Code IS NULL',
+                             ((value, name) for name, value in codes.items()
+                              if value is not None and name in ids))
+            print(f"Built {dimension}: {len(ids) + len(new_names):,} names ({len(new_names):,} new)")
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    print(f"Built dimension tables in {time.perf_counter() - start:.1f}s")
+
+def build_area_geo(db_path, geo_file=AREA_GEO_FILE):
+    """Store the centroid and region of every Dim_Area name listed in geo_file.
+
+    Areas are matched on their M49 code, or on their name when the dump
+    carried no code. Areas missing from the file get no row.
+    """
+    if not os.path.exists(geo_file):
+        print(f"Skipping {AREA_GEO_TABLE}: {geo_file} not found")
+        return
+    geo = pd.read_csv(geo_file, dtype={'Area Code (M49)': str})
+    columns = ['Region', 'Latitude', 'Longitude']
+    by_code = dict(zip(geo['Area Code (M49)'], geo[columns].itertuples(index=False, name=None)))
+    by_name = dict(zip(geo['Area'], geo[columns].itertuples(index=False, name=None)))
+    with sqlite3.connect(db_path) as conn:
+        areas = conn.execute('SELECT Name, Code FROM "Dim_Area"').fetchall()
+        rows = [(name,) + (by_code.get(code) or by_name[name])
+                for name, code in areas if code in by_code or name in by_name]
+        conn.execute(f'DROP TABLE IF EXISTS "{AREA_GEO_TABLE}"')
+        conn.execute(f'CREATE TABLE "{AREA_GEO_TABLE}" (Name TEXT PRIMARY KEY, Region TEXT NOT NULL, '
+                     f'Latitude REAL NOT NULL, Longitude REAL NOT NULL) WITHOUT ROWID')
+        conn.executemany(f'INSERT INTO "{AREA_GEO_TABLE}" VALUES (?, ?, ?, ?)', rows)
+    print(f"Built {AREA_GEO_TABLE}: {len(rows):,} of {len(areas):,} areas located")
+
+def unit_scale_sql(unit_column="Unit"):
+    """SQL factor that brings a trade row's Value to its TRADE_MEASURES column's unit"""
+    scales = " ".join(f"WHEN '{unit}' THEN {scale}" for unit, scale in TRADE_UNIT_SCALE.items())
+    return f"CASE {unit_column} {scales} ELSE 1 END"
+
+def measure_sql(measure):
+    """SQL summing one TRADE_MEASURES column of trade rows t, with every unit scaled to the column's"""
+    elements = ", ".join(f"'{element}'" for element in TRADE_MEASURES[measure])
+    return f"SUM(CASE WHEN t.Element IN ({elements}) THEN t.Value * {unit_scale_sql('t.Unit')} END)"
+
+def check_trade_units(conn, source_table, item_filter=""):
+    """Warn about trade rows in units that neither TRADE_BASE_UNITS nor TRADE_UNIT_SCALE cover"""
+    elements = ", ".join(f"'{element}'" for measure in TRADE_MEASURES.values() for element in measure)
+    known = ", ".join(f"'{unit}'" for unit in TRADE_BASE_UNITS | set(TRADE_UNIT_SCALE))
+    unknown = conn.execute(f"""
+        SELECT Unit, COUNT(*) FROM "{source_table}" t
+        WHERE t.Element IN ({elements}) AND t.Unit NOT IN ({known}) {item_filter}
+        GROUP BY Unit
+    """).fetchall()
+    for unit, rows in unknown:
+        print(f"Warning: {rows:,} rows of {source_table} are in unit {unit!r}, which TRADE_UNIT_SCALE "
+              f"does not cover; they are summed unscaled")
+
+def write_trade_units(conn):
+    """Record TRADE_MEASURES and TRADE_UNIT_SCALE for the dashboard's Parquet backend"""
+    conn.execute(f'DROP TABLE IF EXISTS "{TRADE_MEASURES_TABLE}"')
+    conn.execute(f'CREATE TABLE "{TRADE_MEASURES_TABLE}" (Element TEXT PRIMARY KEY, Measure TEXT NOT NULL)')
+    conn.executemany(f'INSERT INTO "{TRADE_MEASURES_TABLE}" VALUES (?, ?)',
+                     [(element, measure) for measure, elements in TRADE_MEASURES.items() for element in elements])
+    conn.execute(f'DROP TABLE IF EXISTS "{TRADE_UNIT_SCALE_TABLE}"')
+    conn.execute(f'CREATE TABLE "{TRADE_UNIT_SCALE_TABLE}" (Unit TEXT PRIMARY KEY, Scale REAL NOT NULL)')
+    conn.executemany(f'INSERT INTO "{TRADE_UNIT_SCALE_TABLE}" VALUES (?, ?)', TRADE_UNIT_SCALE.items())
+
+def build_reporter_table(db_path, source_table, reporter_table, items=None):
+    """Copy a trade table into a WITHOUT ROWID table clustered by reporter, item and flow.
+
+    Reporter, partner and item are stored as the Ids of their dimension
+    tables (see build_dimensions), which must be built first. The quantity
+    and value elements of each reporter, partner, item, flow and year are
+    pivoted into one row of Quantity, Value and UnitPrice (USD per tonne,
+    head or piece) columns.
+    With ``items`` only those Items are copied again; the rest of the table is kept.
+    """
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        configure_bulk_load(conn)
+        if items is not None and not (table_exists(conn, reporter_table) and table_exists(conn, REPORTERS_TABLE)):
+            items = None
+        conn.execute("BEGIN")
+        if items is None:
+            conn.execute(f'DROP TABLE IF EXISTS "{reporter_table}"')
+            conn.execute(f'DROP TABLE IF EXISTS "{REPORTERS_TABLE}"')
+            item_filter = ""
+        else:
+            stage_items(conn, items)
+            # ItemId is the second key column, so delete each (reporter, item) range
+            reporter_ids = [row[0] for row in conn.execute(
+                f'SELECT Id FROM Dim_Area WHERE Name IN (SELECT Reporter FROM "{REPORTERS_TABLE}")')]
+            item_ids = [row[0] for row in conn.execute(
+                'SELECT Id FROM Dim_Item WHERE Name IN (SELECT Item FROM temp.changed_items)')]
+            conn.executemany(f'DELETE FROM "{reporter_table}" WHERE ReporterId = ? AND ItemId = ?',
+                             ((reporter, item) for reporter in reporter_ids for item in item_ids))
+            item_filter = "AND t.Item IN (SELECT Item FROM temp.changed_items)"
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS "{reporter_table}" (
+                ReporterId INTEGER NOT NULL,
+                ItemId INTEGER NOT NULL,
+                Flow TEXT NOT NULL,
+                PartnerId INTEGER NOT NULL,
+                Year INTEGER NOT NULL,
+                Quantity REAL,
+                Value REAL,
+                UnitPrice REAL,
+                PRIMARY KEY (ReporterId, ItemId, Flow, PartnerId, Year)
+            ) WITHOUT ROWID
+        """)
+        # GROUP BY folds the elements, and any duplicate rows of the export, into one
+        # row per key; the joins leave out rows without a reporter or partner
+        elements = ", ".join(f"'{element}'" for measure in TRADE_MEASURES.values() for element in measure)
+        rows = conn.execute(f"""
+            INSERT INTO "{reporter_table}"
+            SELECT ReporterId, ItemId, Flow, PartnerId, Year, Quantity, Value,
+                   CASE WHEN Quantity > 0 THEN Value * 1000 / Quantity END
+            FROM (
+                SELECT r.Id AS ReporterId, i.Id AS ItemId, t.Flow, p.Id AS PartnerId, t.Year,
+                       {measure_sql("Quantity")} AS Quantity, {measure_sql("Value")} AS Value
+                FROM "{source_table}" t
+                JOIN Dim_Area r ON r.Name = t."Reporter Countries"
+                JOIN Dim_Area p ON p.Name = t."Partner Countries"
+                JOIN Dim_Item i ON i.Name = t.Item
+                WHERE t.Flow IS NOT NULL AND t.Element IN ({elements}) {item_filter}
+                GROUP BY r.Id, i.Id, t.Flow, p.Id, t.Year
+            )
+        """).rowcount
+        check_trade_units(conn, source_table, item_filter)
+        write_trade_units(conn)
+
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{REPORTERS_TABLE}" (Reporter TEXT PRIMARY KEY)')
+        if items is None:
+            conn.execute(f'INSERT INTO "{REPORTERS_TABLE}" SELECT Name FROM Dim_Area '
+                         f'WHERE Id IN (SELECT DISTINCT ReporterId FROM "{reporter_table}")')
+        else:
+            # Only reporters of the changed items can have appeared or disappeared
+            candidates = set(reporter_ids) | {row[0] for row in conn.execute(
+                f'SELECT DISTINCT r.Id FROM "{source_table}" t JOIN Dim_Area r ON r.Name = t."Reporter Countries" '
+                f'WHERE t.Item IN (SELECT Item FROM temp.changed_items)'
+            )}
+            conn.execute(f'DELETE FROM "{REPORTERS_TABLE}"')
+            conn.executemany(
+                f'INSERT INTO "{REPORTERS_TABLE}" SELECT Name FROM Dim_Area WHERE Id = ? AND EXISTS '
+                f'(SELECT 1 FROM "{reporter_table}" WHERE ReporterId = ?)',
+                ((reporter, reporter) for reporter in sorted(candidates))
+            )
+        conn.execute("COMMIT")
+        reporters = conn.execute(f'SELECT COUNT(*) FROM "{REPORTERS_TABLE}"').fetchone()[0]
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    scope = f" ({len(items)} items)" if items is not None else ""
+    print(f"Built {reporter_table} from {source_table}{scope}: {rows:,} rows, {reporters} reporters "
+          f"in {time.perf_counter() - start:.1f}s")
+
+def index_name(table_name, columns):
+    return "idx_" + "_".join([table_name] + [col.replace(" ", "") for col in columns])
+
+def create_indexes(db_path, indexes=INDEXES, analyze=True):
+    """Create the indexes the dashboard's queries rely on and refresh planner statistics"""
+    with sqlite3.connect(db_path) as conn:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table_name, table_indexes in indexes.items():
+            if table_name not in existing:
+                continue
+            for columns in table_indexes:
+                column_list = ", ".join(f'"{col}"' for col in columns)
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "{index_name(table_name, columns)}" '
+                             f'ON "{table_name}" ({column_list})')
+            print(f"Indexed {table_name}")
+        if analyze:
+            conn.execute("ANALYZE")
+
+def post_load(db_path, changed=None, parquet_dir=None):
+    """Build the derived tables, columns and indexes the dashboard reads.
+
+    ``changed`` maps each table an incremental load touched to the Items
+    whose rows changed (None for all of them). Derived tables are then
+    only rebuilt for those Items; without it everything is rebuilt.
+    With ``parquet_dir`` the Parquet copy of the new generation is written
+    (see export_generation) before the generation is advanced.
+    """
+    build_long_tables(db_path, changed=changed)
+    with sqlite3.connect(db_path) as conn:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table_name in TRADE_TABLES:
+        if table_name in existing and (changed is None or table_name in changed):
+            add_flow_column(db_path, table_name, items=changed[table_name] if changed else None)
+    build_dimensions(db_path, changed=changed)
+    build_area_geo(db_path)
+    for source_table, reporter_table in REPORTER_TABLES.items():
+        if source_table in existing and (changed is None or source_table in changed):
+            build_reporter_table(db_path, source_table, reporter_table,
+                                 items=changed[source_table] if changed else None)
+    # Planner statistics barely move with a delta, so only full loads refresh them
+    create_indexes(db_path, analyze=changed is None)
+
+    # Per-crop summary tables are derived from the long and trade tables built above
+    from data_aggregation import build_aggregates
+    aggregate_items = None
+    if changed is not None and all(items is not None for items in changed.values()):
+        aggregate_items = set().union(*changed.values())
+    build_aggregates(db_path, aggregate_items)
+
+    # WAL lets the dashboard's read-only connections keep reading while a later load writes
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("PRAGMA journal_mode = WAL")
+    # Readers switch to the new Parquet files with the generation, so they must be complete first
+    if parquet_dir:
+        export_generation(db_path, parquet_dir, current_generation(db_path) + 1, changed)
+    bump_generation(db_path)
+
+def current_generation(db_path):
+    """The load generation recorded in the database, 0 before the first load"""
+    with sqlite3.connect(db_path) as conn:
+        if not table_exists(conn, METADATA_TABLE):
+            return 0
+        row = conn.execute(f'SELECT value FROM "{METADATA_TABLE}" WHERE key = ?', ("generation",)).fetchone()
+    return int(row[0]) if row else 0
+
+def bump_generation(db_path):
+    """Increment the load generation that dashboard caches are keyed on"""
+    generation = current_generation(db_path) + 1
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{METADATA_TABLE}" (key TEXT PRIMARY KEY, value TEXT)')
+        conn.execute(f'INSERT OR REPLACE INTO "{METADATA_TABLE}" VALUES (?, ?)', ("generation", str(generation)))
+    print(f"Data generation is now {generation}")
+    return generation
+
+def remove_database(db_path):
+    """Delete a database file and its WAL and shared-memory files"""
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def open_shadow(db_path):
+    """Copy the live database to a shadow file for a load to write to.
+
+    The base tables, derived tables and generation are all rebuilt in the
+    shadow; swap_in_shadow then publishes them together, so readers never
+    see new base rows next to old derived tables.
+    """
+    shadow_path = db_path + ".loading"
+    # Left behind by a load that did not finish
+    remove_database(shadow_path)
+    if os.path.exists(db_path):
+        start = time.perf_counter()
+        with sqlite3.connect(db_path) as live, sqlite3.connect(shadow_path) as shadow:
+            live.backup(shadow)
+        print(f"Copied {db_path} to {shadow_path} in {time.perf_counter() - start:.1f}s")
+    return shadow_path
+
+def swap_in_shadow(shadow_path, db_path):
+    """Replace the live database's contents with the shadow's in a single transaction.
+
+    The backup writes every page in one step, so readers of the WAL-mode
+    live database keep their snapshot of the previous load until it commits.
+    """
+    start = time.perf_counter()
+    with sqlite3.connect(shadow_path) as shadow, sqlite3.connect(db_path) as live:
+        shadow.backup(live)
+    remove_database(shadow_path)
+    print(f"Published {shadow_path} to {db_path} in {time.perf_counter() - start:.1f}s")
+
+
+def partition_dir_name(column, value):
+    """Hive-style directory name for a partition value, safe for any FAO item name"""
+    return f"{column}={quote(str(value), safe='')}"
+
+def export_parquet(db_path, out_dir, tables=PARQUET_TABLES, changed=None):
+    """Write tables as partitioned Parquet for the dashboard's columnar backend.
+
+    Each table gets one directory per Item, and trade tables one file per
+    reporter inside it, so one reporter's trade in a crop is a single file.
+    Files keep every column (including the partition columns) plus ``_row``,
+    the SQLite rowid, so readers can restore SQLite's row order.
+    Tables are exported one Item at a time to keep memory bounded.
+    ``changed`` is as for post_load: only the changed Items are rewritten.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("pyarrow is not installed; skipping Parquet export")
+        return
+
+    conn = sqlite3.connect(db_path)
+    try:
+        for table_name, partition_by in tables.items():
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                  (table_name,)).fetchone()
+            if not exists:
+                print(f"Skipping Parquet export of {table_name}: table not found")
+                continue
+
+            table_dir = os.path.join(out_dir, table_name)
+            items_changed = changed.get(table_name) if changed is not None else None
+            if changed is not None and table_name not in changed:
+                continue
+            if items_changed is None or not os.path.exists(table_dir):
+                items_changed = None
+                if os.path.exists(table_dir):
+                    shutil.rmtree(table_dir)
+                os.makedirs(table_dir)
+
+            start = time.perf_counter()
+            schema_df = pd.read_sql_query(f'SELECT rowid AS _row, * FROM "{table_name}" LIMIT 0', conn)
+            metadata_path = os.path.join(table_dir, "_common_metadata")
+            # Replaced rather than overwritten: it may be a hard link into an earlier generation
+            if os.path.exists(metadata_path):
+                os.remove(metadata_path)
+            pq.write_metadata(pa.Schema.from_pandas(schema_df, preserve_index=False), metadata_path)
+
+            if items_changed is None:
+                items = [row[0] for row in conn.execute(f'SELECT DISTINCT Item FROM "{table_name}"')]
+            else:
+                items = sorted(items_changed)
+            for item in items:
+                df = pd.read_sql_query(f'SELECT rowid AS _row, * FROM "{table_name}" WHERE Item = ?',
+                                       conn, params=[item])
+                item_dir = os.path.join(table_dir, partition_dir_name("Item", item))
+                if os.path.exists(item_dir):
+                    shutil.rmtree(item_dir)
+                if df.empty:
+                    continue
+                os.makedirs(item_dir)
+                if len(partition_by) > 1:
+                    column = partition_by[1]
+                    for value, part_df in df.groupby(column):
+                        part_df.to_parquet(os.path.join(item_dir, f"{partition_dir_name(column, value)}.parquet"),
+                                           index=False)
+                else:
+                    df.to_parquet(os.path.join(item_dir, "part-0.parquet"), index=False)
+            print(f"Exported {table_name} ({len(items)} items) to {table_dir} "
+                  f"in {time.perf_counter() - start:.1f}s")
+    finally:
+        conn.close()
+
+def generation_dirs(parquet_dir):
+    """Generation number -> directory of the Parquet exports in parquet_dir"""
+    if not os.path.isdir(parquet_dir):
+        return {}
+    return {int(name.split("=", 1)[1]): os.path.join(parquet_dir, name)
+            for name in os.listdir(parquet_dir) if name.startswith("generation=")}
+
+def export_generation(db_path, parquet_dir, generation, changed=None):
+    """Export the tables to parquet_dir/generation=N, leaving the files readers use untouched.
+
+    The dashboard reads the directory of the database's generation, so the
+    new files are only read once bump_generation records it. An incremental
+    export starts from hard links to the previous generation's files and
+    rewrites the changed Items. Generations before the previous one are removed.
+    """
+    exports = generation_dirs(parquet_dir)
+    target = os.path.join(parquet_dir, f"generation={generation}")
+    if generation in exports:
+        # Left behind by a load that did not finish
+        shutil.rmtree(target)
+    previous = max((number for number in exports if number < generation), default=None)
+    if changed is not None and previous is not None:
+        shutil.copytree(exports[previous], target, copy_function=os.link)
+    else:
+        changed = None
+    export_parquet(db_path, target, changed=changed)
+    for number, path in exports.items():
+        if number < generation - 1:
+            shutil.rmtree(path, ignore_errors=True)
+
+
 def record_metadata(session, metadata_class, data):
     """Record metadata in the metadata database"""
     new_record = metadata_class(**data)
@@ -32,50 +767,26 @@ def record_metadata(session, metadata_class, data):
     session.commit()
 
 def main():
-    # Create database connections
-    main_engine = create_connection(MAIN_DB_URI)
-    
-    # Get list of CSV files
-    # csv_files = [f for f in os.listdir(CSV_DIRECTORY) if f.endswith('.csv')]
-    
-    if False:
-        csv_path = os.path.join(CSV_DIRECTORY, "Value_of_Production_E_All_Data/Value_of_Production_E_All_Data_Processed.csv")
-        
-        # Load CSV to DataFrame
-        df = load_csv_to_dataframe(csv_path)
-        
-        # Generate table name from file name (remove .csv and convert to lowercase)
-        table_name = "Value_of_Production_E_All_Data"
-        
-        # Save DataFrame to main database
-        df.to_sql(table_name, main_engine, if_exists='replace', index=False)
-        print(f"Loaded {table_name} into table '{table_name}'")
-
-    if False:
-        csv_path = os.path.join(CSV_DIRECTORY, "Production_Crops_Livestock_E_All_Data/Production_Crops_Livestock_E_All_Data_Processed.csv")
-        
-        # Load CSV to DataFrame
-        df = load_csv_to_dataframe(csv_path)
-        
-        # Generate table name from file name (remove .csv and convert to lowercase)
-        table_name = "Production_Crops_Livestock"
-        
-        # Save DataFrame to main database
-        df.to_sql(table_name, main_engine, if_exists='replace', index=False)
-        print(f"Loaded {table_name} into table '{table_name}'")
-    
-    if True:
-        csv_path = os.path.join(CSV_DIRECTORY, "FAOSTAT_data_en_5-22-2025_Processed.csv")
-        
-        # Load CSV to DataFrame
-        df = load_csv_to_dataframe(csv_path)
-        
-        # Generate table name from file name (remove .csv and convert to lowercase)
-        table_name = "Trade_Matrix_India"
-        
-        # Save DataFrame to main database
-        df.to_sql(table_name, main_engine, if_exists='replace', index=False)
-        print(f"Loaded {table_name} into table '{table_name}'")
+    parser = argparse.ArgumentParser(description="Load the FAOSTAT dumps in Data/ into the main database.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="apply only the rows that changed since the last load, and rebuild "
+                             "derived tables for the changed items only")
+    args = parser.parse_args()
+    db_path = sqlite_path(MAIN_DB_URI)
+
+    # The per-dataset pipeline lives in data_prep; it streams raw dumps into a shadow copy of
+    # MAIN_DB_URI, which replaces the live database only once everything is rebuilt
+    from data_prep import process_csv_files
+    shadow_path = open_shadow(db_path)
+    try:
+        changed = process_csv_files(shadow_path, incremental=args.incremental)
+        if args.incremental and not changed:
+            print("No rows changed; the database is up to date.")
+            return
+        post_load(shadow_path, changed if args.incremental else None, parquet_dir=PARQUET_DIR)
+        swap_in_shadow(shadow_path, db_path)
+    finally:
+        remove_database(shadow_path)
 
     print("Data loading complete!")
     print(f"Main database created at: {MAIN_DB_URI}")
@@ -1,186 +1,269 @@
 import os
-import pandas as pd
-import glob
-
-def process_csv_files():
-    # Get current directory
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Find all subfolders in the current directory
-    # Define specific folders to process
-    folder1 = "Production_Crops_Livestock_E_All_Data"
-    folder2 = "Production_Indices_E_All_Data"
-    folder3 = "Trade_DetailedTradeMatrix_E_All_Data"
-    folder4 = "Value_of_Production_E_All_Data"
-
-    
-    if os.path.exists(os.path.join(base_dir, folder1)) and False:
-        folder = os.path.join(base_dir, folder1)
-        # Find CSV files ending with All_Data.csv in each subfolder
-        csv_files = glob.glob(os.path.join(folder, "*All_Data.csv"))
-        
-        for file_path in csv_files:
-            print(f"Processing: {file_path}")
-            
-            try:
-                # Read the CSV file
-                df = pd.read_csv(file_path)
-                
-                # Get original column count
-                original_cols = len(df.columns)
-                
-                code_columns = ['Area Code (M49)','Item Code', 'Element Code']
-                code_columns += [f'Y{year}N' for year in range(1900, 2500)]
-                code_columns += [f'Y{year}F' for year in range(1900, 2500)]
-                df = df.drop(columns=code_columns, errors='ignore')
-                
-                # Get new column count
-                new_cols = len(df.columns)
-                
-                # Generate output filename (same as input)
-                output_path = file_path[:-4]+"_Processed.csv"
-                
-                # Save the modified DataFrame back to CSV
-                df.to_csv(output_path, index=False)
-                
-                print(f"  Removed {original_cols - new_cols} columns with 'code' in name")
-                print(f"  Saved to: {output_path}")
-                
-            except Exception as e:
-                print(f"  Error processing {file_path}: {e}")
-    if os.path.exists(os.path.join(base_dir, folder2)) and False:
-        folder = os.path.join(base_dir, folder2)
-        # Find CSV files ending with All_Data.csv in each subfolder
-        csv_files = glob.glob(os.path.join(folder, "*All_Data.csv"))
-        
-        for file_path in csv_files:
-            print(f"Processing: {file_path}")
-            
-            try:
-                # Read the CSV file
-                df = pd.read_csv(file_path)
-                
-                # Get original column count
-                original_cols = len(df.columns)
-                
-                code_columns = ['Area Code (M49)','Item Code', 'Element Code']
-                code_columns += [f'Y{year}F' for year in range(1900, 2500)]
-                df = df.drop(columns=code_columns, errors='ignore')
-                
-                # Get new column count
-                new_cols = len(df.columns)
-                
-                # Generate output filename (same as input)
-                output_path = file_path[:-4]+"_Processed.csv"
-                
-                # Save the modified DataFrame back to CSV
-                df.to_csv(output_path, index=False)
-                
-                print(f"  Removed {original_cols - new_cols} columns with 'code' in name")
-                print(f"  Saved to: {output_path}")
-                
-            except Exception as e:
-                print(f"  Error processing {file_path}: {e}")
-    if os.path.exists(os.path.join(base_dir, folder3)) and False:
-        folder = os.path.join(base_dir, folder3)
-        # Find CSV files ending with All_Data.csv in each subfolder
-        csv_files = glob.glob(os.path.join(folder, "*All_Data.csv"))
-        
-        for file_path in csv_files:
-            print(f"Processing: {file_path}")
-            
-            try:
-                # Read the CSV file
-                df = pd.read_csv(file_path)
-                
-                # Get original column count
-                original_cols = len(df.columns)
-                
-                code_columns = ['Area Code (M49)','Item Code', 'Element Code']
-                code_columns += [f'Y{year}F' for year in range(1900, 2500)]
-                df = df.drop(columns=code_columns, errors='ignore')
-                
-                # Get new column count
-                new_cols = len(df.columns)
-                
-                # Generate output filename (same as input)
-                output_path = file_path[:-4]+"_Processed.csv"
-                
-                # Save the modified DataFrame back to CSV
-                df.to_csv(output_path, index=False)
-                
-                print(f"  Removed {original_cols - new_cols} columns with 'code' in name")
-                print(f"  Saved to: {output_path}")
-                
-            except Exception as e:
-                print(f"  Error processing {file_path}: {e}")            
-    if os.path.exists(os.path.join(base_dir, folder4)) and False:
-        folder = os.path.join(base_dir, folder4)
-        # Find CSV files ending with All_Data.csv in each subfolder
-        csv_files = glob.glob(os.path.join(folder, "*All_Data.csv"))
-        
-        for file_path in csv_files:
-            print(f"Processing: {file_path}")
-            
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from data_loading import (stream_csv_to_sqlite, sqlite_path, stage_items, create_item_hashes_table,
+                          MAIN_DB_URI, ITEM_HASHES_TABLE)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "Data")
+
+# Every FAOSTAT dump that feeds the dashboard and how it is projected into a table:
+#   source      - raw CSV, relative to Data/
+#   table       - destination table in the main database
+#   drop        - columns that are never parsed
+#   year_flags  - suffixes of the per-year flag/note columns to drop (Y1961F, Y1961N)
+#   dtypes      - pandas dtypes forced while parsing; Y#### columns are always float64
+# The M49, Item and Element codes are kept for the dimension tables (data_loading.DIMENSIONS).
+# M49 codes are text so their leading zeros survive.
+CODE_DTYPES = {
+    'Area Code (M49)': 'str',
+    'Reporter Country Code (M49)': 'str',
+    'Partner Country Code (M49)': 'str',
+    'Item Code': 'Int64',
+    'Element Code': 'Int64',
+}
+
+DATASETS = [
+    {
+        'source': "Production_Crops_Livestock_E_All_Data/Production_Crops_Livestock_E_All_Data.csv",
+        'table': "Production_Crops_Livestock",
+        'drop': [],
+        'year_flags': "FN",
+        'dtypes': {'Area Code': 'Int64', **CODE_DTYPES},
+    },
+    {
+        'source': "Production_Indices_E_All_Data/Production_Indices_E_All_Data.csv",
+        'table': "Production_Indices_E_All_Data",
+        'drop': [],
+        'year_flags': "F",
+        'dtypes': {'Area Code': 'Int64', **CODE_DTYPES},
+    },
+    {
+        'source': "Trade_DetailedTradeMatrix_E_All_Data/Trade_DetailedTradeMatrix_E_All_Data.csv",
+        'table': "Trade_DetailedTradeMatrix_E_All_Data",
+        'drop': [],
+        'year_flags': "F",
+        'dtypes': CODE_DTYPES,
+    },
+    {
+        'source': "Value_of_Production_E_All_Data/Value_of_Production_E_All_Data.csv",
+        'table': "Value_of_Production_E_All_Data",
+        'drop': [],
+        'year_flags': "F",
+        'dtypes': {'Area Code': 'Int64', **CODE_DTYPES},
+    },
+    {
+        'source': "FAOSTAT_data_en_5-22-2025.csv",
+        'table': "Trade_Matrix_India",
+        'drop': ['Domain Code', 'Domain', 'Item Code (CPC)', 'Year Code', 'Flag', 'Flag Description'],
+        'year_flags': "",
+        'dtypes': {'Year': 'Int64', 'Value': 'float64', **CODE_DTYPES},
+    },
+]
+
+
+def is_year_column(column):
+    """True for wide-format year columns such as Y1961"""
+    return len(column) == 5 and column[0] == 'Y' and column[1:].isdigit()
+
+
+class ColumnProjection:
+    """Picklable column filter and dtype map for one dataset."""
+
+    def __init__(self, dataset):
+        self.drop = set(dataset['drop'])
+        self.year_flags = dataset['year_flags']
+        self.dtypes = dataset['dtypes']
+
+    def __call__(self, column):
+        """Return True if the column should be dropped."""
+        if column in self.drop:
+            return True
+        return (len(column) == 6 and column[0] == 'Y' and column[1:5].isdigit()
+                and column[5] in self.year_flags)
+
+    def dtype(self, column):
+        if is_year_column(column):
+            return 'float64'
+        return self.dtypes.get(column)
+
+
+def prepare_dataset(dataset, staging_path):
+    """Stream one raw dump into its own staging database. Runs in a worker process."""
+    projection = ColumnProjection(dataset)
+    csv_path = os.path.join(DATA_DIR, dataset['source'])
+    print(f"Processing: {csv_path}")
+    return stream_csv_to_sqlite(csv_path, staging_path, dataset['table'],
+                                drop_column=projection, dtype=projection.dtype, hash_items=True)
+
+
+def merge_staging_table(db_path, staging_path, table_name):
+    """Move a staged table into the main database in one transaction.
+
+    ``INSERT INTO ... SELECT *`` between identical schemas is copied page by
+    page by SQLite, so this is much cheaper than parsing the CSV again.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS staging", (staging_path,))
+        create_sql = conn.execute(
+            "SELECT sql FROM staging.sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+        ).fetchone()[0]
+        conn.execute("BEGIN")
+        conn.execute(f'DROP TABLE IF EXISTS main."{table_name}"')
+        conn.execute(create_sql)
+        conn.execute(f'INSERT INTO main."{table_name}" SELECT * FROM staging."{table_name}"')
+        # Keep the staged item hashes so the next incremental load can diff against them
+        copy_item_hashes(conn, table_name)
+        conn.execute("COMMIT")
+        conn.execute("DETACH DATABASE staging")
+    finally:
+        conn.close()
+
+
+def table_columns(conn, schema, table_name):
+    """(name, declared type) of every column of schema.table_name"""
+    return [(row[1], row[2].upper()) for row in conn.execute(f'PRAGMA {schema}.table_info("{table_name}")')]
+
+
+def read_item_hashes(conn, schema, table_name):
+    """{Item: (hash, rows)} of a table as recorded when it was staged"""
+    if not table_columns(conn, schema, ITEM_HASHES_TABLE):
+        return {}
+    return {item: (h, rows) for item, h, rows in conn.execute(
+        f'SELECT Item, hash, rows FROM {schema}."{ITEM_HASHES_TABLE}" WHERE table_name = ?', (table_name,))}
+
+
+def copy_item_hashes(conn, table_name, items=None):
+    """Copy a table's item hashes from the attached staging database to main (only ``items`` if given)."""
+    create_item_hashes_table(conn, "main")
+    condition = "table_name = ?"
+    if items is not None:
+        condition += " AND Item IN (SELECT Item FROM temp.changed_items)"
+    conn.execute(f'DELETE FROM main."{ITEM_HASHES_TABLE}" WHERE {condition}', (table_name,))
+    if table_columns(conn, "staging", ITEM_HASHES_TABLE):
+        conn.execute(f'INSERT INTO main."{ITEM_HASHES_TABLE}" '
+                     f'SELECT * FROM staging."{ITEM_HASHES_TABLE}" WHERE {condition}', (table_name,))
+
+
+def apply_staging_delta(db_path, staging_path, table_name):
+    """Bring a main table up to date with its staged copy, rewriting only the Items that changed.
+
+    The content hash of every Item's rows is recorded when a dump is staged
+    and kept in the main database after each load; Items whose hash differs
+    (or that appear on one side only) have their rows replaced in one
+    transaction; data_loading.main applies it to a shadow copy of the
+    database (see data_loading.open_shadow). Returns the number of rows deleted and
+    inserted and the changed Items, or None when the table has to be
+    replaced in full: it is missing, its columns changed, or one side has
+    no item hashes (e.g. it was loaded before they were recorded).
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS staging", (staging_path,))
+        staged = table_columns(conn, "staging", table_name)
+        # The main table may have extra derived columns (Flow), never fewer
+        main = dict(table_columns(conn, "main", table_name))
+        if not main or any(main.get(name) != type_ for name, type_ in staged):
+            return None
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            old, new = read_item_hashes(conn, "main", table_name), read_item_hashes(conn, "staging", table_name)
+            # Rows without an Item cannot be matched to a partition
+            if not old or not new or None in old or None in new:
+                conn.execute("ROLLBACK")
+                return None
+            items = {item for item in old.keys() | new.keys() if old.get(item) != new.get(item)}
+            stage_items(conn, items)
+
+            column_list = ", ".join(f'"{name}"' for name, _ in staged)
+            deleted = conn.execute(f'DELETE FROM main."{table_name}" '
+                                   f'WHERE Item IN (SELECT Item FROM temp.changed_items)').rowcount
+            inserted = conn.execute(f'INSERT INTO main."{table_name}" ({column_list}) '
+                                    f'SELECT {column_list} FROM staging."{table_name}" '
+                                    f'WHERE Item IN (SELECT Item FROM temp.changed_items)').rowcount
+            copy_item_hashes(conn, table_name, items)
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return {'deleted': deleted, 'inserted': inserted, 'items': items}
+    finally:
+        conn.close()
+
+
+def process_csv_files(db_path=None, datasets=DATASETS, workers=None, incremental=False):
+    """Load every available FAOSTAT dump into the main database.
+
+    Each dump is parsed, projected and typed in its own worker process into a
+    private staging database, so a full refresh takes about as long as the
+    slowest file. Staged tables are then merged into the main database, or
+    with ``incremental`` only their changed rows are applied (see
+    apply_staging_delta).
+
+    Returns the loaded tables mapped to the Items whose rows changed, or to
+    None where the whole table was replaced. Incremental loads leave out
+    tables without changes.
+    """
+    db_path = db_path or sqlite_path(MAIN_DB_URI)
+    db_dir = os.path.dirname(os.path.abspath(db_path))
+
+    available = []
+    for dataset in datasets:
+        if os.path.exists(os.path.join(DATA_DIR, dataset['source'])):
+            available.append(dataset)
+        else:
+            print(f"Skipping {dataset['table']}: {dataset['source']} not found")
+    if not available:
+        print("Nothing to process.")
+        return {}
+
+    start = time.perf_counter()
+    staged = {}
+    with ProcessPoolExecutor(max_workers=workers or len(available)) as pool:
+        futures = {}
+        for dataset in available:
+            staging_path = os.path.join(db_dir, f".staging_{dataset['table']}.db")
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+            futures[pool.submit(prepare_dataset, dataset, staging_path)] = (dataset, staging_path)
+
+        for future in as_completed(futures):
+            dataset, staging_path = futures[future]
             try:
-                # Read the CSV file
-                df = pd.read_csv(file_path)
-                
-                # Get original column count
-                original_cols = len(df.columns)
-                
-                code_columns = ['Area Code (M49)','Item Code', 'Element Code']
-                code_columns += [f'Y{year}F' for year in range(1900, 2500)]
-                df = df.drop(columns=code_columns, errors='ignore')
-                
-                # Get new column count
-                new_cols = len(df.columns)
-                
-                # Generate output filename (same as input)
-                output_path = file_path[:-4]+"_Processed.csv"
-                
-                # Save the modified DataFrame back to CSV
-                df.to_csv(output_path, index=False)
-                
-                print(f"  Removed {original_cols - new_cols} columns with 'code' in name")
-                print(f"  Saved to: {output_path}")
-                
+                future.result()
+                staged[dataset['table']] = staging_path
             except Exception as e:
-                print(f"  Error processing {file_path}: {e}")
-    
-    if True:
-        folder = os.path.join(base_dir)
-        # Find CSV files ending with All_Data.csv in each subfolder
-        file_path = "Data/FAOSTAT_data_en_5-22-2025.csv"
-        
-        print(f"Processing: {file_path}")
-        
+                print(f"  Error processing {dataset['source']}: {e}")
+                if os.path.exists(staging_path):
+                    os.remove(staging_path)
+
+    changed = {}
+    for table_name, staging_path in staged.items():
         try:
-            # Read the CSV file
-            df = pd.read_csv(file_path)
-            
-            # Get original column count
-            original_cols = len(df.columns)
-            # Domain Code,Domain,Reporter Country Code (M49),Reporter Countries,Partner Country Code (M49),Partner Countries,Element Code,Element,Item Code (CPC),Item,Year Code,Year,Unit,Value,Flag,Flag Description
-
-            code_columns = ['Domain Code', 'Domain', 'Reporter Country Code (M49)', 'Partner Country Code (M49)', 'Element Code', 'Item Code (CPC)', 'Year Code', 'Flag', 'Flag Description']
-            df = df.drop(columns=code_columns, errors='ignore')
-            
-            # Get new column count
-            new_cols = len(df.columns)
-            
-            # Generate output filename (same as input)
-            output_path = file_path[:-4]+"_Processed.csv"
-            
-            # Save the modified DataFrame back to CSV
-            df.to_csv(output_path, index=False)
-            
-            print(f"  Removed {original_cols - new_cols} columns with 'code' in name")
-            print(f"  Saved to: {output_path}")
-            
+            delta = apply_staging_delta(db_path, staging_path, table_name) if incremental else None
+            if delta is None:
+                if incremental:
+                    print(f"  {table_name} cannot be diffed; replacing it in full")
+                merge_staging_table(db_path, staging_path, table_name)
+                changed[table_name] = None
+                print(f"Loaded {table_name} into table '{table_name}'")
+            else:
+                if delta['deleted'] or delta['inserted']:
+                    changed[table_name] = delta['items']
+                items = f", {len(delta['items'])} items" if delta['items'] is not None else ""
+                print(f"Updated {table_name}: {delta['inserted']:,} rows inserted, "
+                      f"{delta['deleted']:,} deleted{items}")
         except Exception as e:
-            print(f"  Error processing {file_path}: {e}")
-    print("Processing complete!")
+            print(f"  Error loading {table_name}: {e}")
+        finally:
+            os.remove(staging_path)
+
+    print(f"Processing complete in {time.perf_counter() - start:.1f}s!")
+    return changed
 
 if __name__ == "__main__":
-    process_csv_files()
\ No newline at end of file
+    process_csv_files()